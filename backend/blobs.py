@@ -0,0 +1,166 @@
+"""
+Content-addressed store for large event payloads.
+
+Tool outputs (extracted pages, researcher reports) can be hundreds of
+kilobytes, and every event is kept in the replay history and sent to every
+subscriber. `BlobStore.offload` keeps text up to `threshold` bytes inline;
+larger text is stored once under its SHA-256 and replaced by a preview, its
+size and the blob id, which the UI resolves through `/api/blobs/{id}` only
+when the user opens the tool call. Identical outputs share one blob. The
+store is bounded by `max_bytes`, evicting least recently used blobs.
+
+With a `directory`, every blob is also written there, and a blob evicted
+from memory (or stored before a restart) is read back from disk, so the ids
+in durably logged sessions keep resolving when those sessions are replayed.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from research_workbench.metrics import REGISTRY
+
+BLOB_EVENTS = REGISTRY.counter(
+    "research_workbench_blobs_total",
+    "Large event payloads offloaded to the blob store, by outcome (stored, "
+    "deduplicated, evicted).",
+    ("outcome",),
+)
+BLOB_BYTES_OFFLOADED = REGISTRY.counter(
+    "research_workbench_blob_bytes_offloaded_total",
+    "Payload bytes kept out of events by offloading them to the blob store.",
+)
+BLOB_STORE_BYTES = REGISTRY.gauge(
+    "research_workbench_blob_store_bytes", "Bytes held in the blob store."
+)
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+_BLOB_ID = re.compile(r"[0-9a-f]{64}")
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    The inclusive (start, end) byte range requested by a `Range` header, or
+    None to send the whole blob. Only single ranges are supported; a
+    multi-range or malformed header is ignored, as RFC 9110 allows.
+    """
+    match = _RANGE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+class BlobStore:
+    def __init__(
+        self,
+        threshold: int,
+        preview_chars: int,
+        max_bytes: int,
+        directory: Optional[str] = None,
+    ):
+        self.threshold = threshold
+        self.preview_chars = preview_chars
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        BLOB_STORE_BYTES.set_function(lambda: self._size)
+
+    def put(self, data: bytes) -> str:
+        blob_id = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if blob_id in self._blobs:
+                self._blobs.move_to_end(blob_id)
+                BLOB_EVENTS.inc(outcome="deduplicated")
+                return blob_id
+            self._blobs[blob_id] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._blobs) > 1:
+                _, evicted = self._blobs.popitem(last=False)
+                self._size -= len(evicted)
+                BLOB_EVENTS.inc(outcome="evicted")
+        if self.directory:
+            self._write(blob_id, data)
+        BLOB_EVENTS.inc(outcome="stored")
+        return blob_id
+
+    def get(self, blob_id: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._blobs.get(blob_id)
+            if data is not None:
+                self._blobs.move_to_end(blob_id)
+                return data
+        return self._read(blob_id)
+
+    def _path(self, blob_id: str) -> Optional[str]:
+        if not self.directory or not _BLOB_ID.fullmatch(blob_id):
+            return None
+        return os.path.join(self.directory, blob_id)
+
+    def _write(self, blob_id: str, data: bytes) -> None:
+        path = self._path(blob_id)
+        if os.path.exists(path):
+            return
+        # Written under a temporary name so a crash never leaves a torn blob.
+        partial = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(partial, "wb") as f:
+                f.write(data)
+            os.replace(partial, path)
+        except OSError:
+            logger.exception(f"Could not persist blob {blob_id}")
+
+    def _read(self, blob_id: str) -> Optional[bytes]:
+        path = self._path(blob_id)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def offload(self, text: str, field: str = "output") -> Dict[str, Any]:
+        """
+        Event payload fields for `text`: `{field: text}` when it is small,
+        otherwise `{field: preview, fieldSize: bytes, fieldBlobId: id}`.
+        """
+        # A UTF-8 character is at most 4 bytes, so short text skips encoding.
+        if not self.threshold or len(text) <= self.threshold // 4:
+            return {field: text}
+        data = text.encode("utf-8")
+        if len(data) <= self.threshold:
+            return {field: text}
+        blob_id = self.put(data)
+        preview = text[: self.preview_chars]
+        BLOB_BYTES_OFFLOADED.inc(len(data) - len(preview.encode("utf-8")))
+        return {
+            field: preview,
+            f"{field}Size": len(data),
+            f"{field}BlobId": blob_id,
+        }
@@ -0,0 +1,324 @@
+"""
+Event bus between research runs and SSE subscribers.
+
+`emit_event` publishes every UI event to the bus. Each `/api/events` client
+subscribes to it and gets the history of the current session (the events
+since the last GRAPH_RESET), then live events.
+
+- `InProcessEventBus` keeps history and subscribers in this process, so the
+  server must run as a single worker.
+- `BrokerEventBus` publishes through a broker that every worker connects to,
+  and delivers what the broker sends back to its own subscribers. A client
+  connected to any worker sees the runs of all of them, in one order. The
+  broker keeps a replay tail of the current session, from which a worker
+  catches up when it connects or reconnects. Events published while the
+  broker is unreachable are held, up to `MAX_PENDING_EVENTS`, and sent on
+  reconnect; beyond that they are dropped and counted.
+
+`Broker` is a stand-in broker speaking JSON lines over TCP:
+
+    python -m backend.event_bus --port 7400
+
+A worker opens with `{"op": "subscribe", "broker": <id>, "after": <seq>}`
+and then sends `{"op": "publish", "event": ...}` lines. The broker answers
+`{"broker": <id>, "resync": <bool>}`, then sends every event after `after`
+as `{"seq": <n>, "event": ...}`, followed by each event published from then
+on. `resync` means the broker could not continue from `after` (it restarted,
+or the events fell out of its tail) and is sending its whole tail instead.
+"""
+
+import argparse
+import asyncio
+import json
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from research_workbench.metrics import DEFAULT_SIZE_BUCKETS, REGISTRY
+
+# Largest JSON line read from a broker connection.
+LINE_LIMIT = 16 * 1024 * 1024
+# Events kept while the broker is unreachable; later ones are dropped.
+MAX_PENDING_EVENTS = 10_000
+
+SSE_QUEUE_DEPTH = REGISTRY.histogram(
+    "research_workbench_sse_queue_depth",
+    "Per-subscriber SSE queue depth observed after each broadcast.",
+    buckets=DEFAULT_SIZE_BUCKETS,
+)
+EVENT_BUS_CONNECTIONS = REGISTRY.counter(
+    "research_workbench_event_bus_connections_total",
+    "Connections to the event broker, by outcome (connected, failed, lost, resync).",
+    ("outcome",),
+)
+EVENT_BUS_DROPPED = REGISTRY.counter(
+    "research_workbench_event_bus_dropped_events_total",
+    "Events dropped because the broker was unreachable and the backlog was full.",
+)
+
+
+class EventBus(ABC):
+    """Fans published events out to subscribers, replaying history first."""
+
+    def __init__(self):
+        self.history: List[Dict[str, Any]] = []
+        self._subscribers: List[asyncio.Queue] = []
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(self, event: Dict[str, Any]) -> None:
+        """Send `event` to every subscriber (and record it in the history)."""
+
+    async def _deliver(self, event: Dict[str, Any]) -> None:
+        if event.get("type") == "GRAPH_RESET":
+            self.history.clear()
+        self.history.append(event)
+        for q in self._subscribers:
+            await q.put(event)
+            SSE_QUEUE_DEPTH.observe(q.qsize())
+
+    async def subscribe(self) -> AsyncGenerator[Dict[str, Any], None]:
+        q: asyncio.Queue = asyncio.Queue()
+        # Taken together with registering the queue, so no event falls
+        # between the history and the live stream.
+        backlog = list(self.history)
+        self._subscribers.append(q)
+        try:
+            for event in backlog:
+                yield event
+            while True:
+                yield await q.get()
+        finally:
+            self._subscribers.remove(q)
+
+
+class InProcessEventBus(EventBus):
+    async def publish(self, event: Dict[str, Any]) -> None:
+        await self._deliver(event)
+
+
+class BrokerEventBus(EventBus):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        reconnect_delay: float = 0.5,
+        max_pending: int = MAX_PENDING_EVENTS,
+    ):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.reconnect_delay = reconnect_delay
+        self._broker_id: Optional[str] = None
+        self._seq = 0
+        self._writer: Optional[asyncio.StreamWriter] = None
+        # Published while disconnected; sent once the connection is back.
+        self._pending: List[bytes] = []
+        self.max_pending = max_pending
+        # Dropped since the backlog last filled up.
+        self._dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="event-bus-broker")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        line = json.dumps({"op": "publish", "event": event}).encode() + b"\n"
+        writer = self._writer
+        if writer is None:
+            self._hold(line)
+            return
+        try:
+            writer.write(line)
+            await writer.drain()
+        except (ConnectionError, OSError):
+            self._hold(line)
+
+    def _hold(self, line: bytes) -> None:
+        if len(self._pending) >= self.max_pending:
+            if not self._dropped:
+                logger.error("event bus: broker backlog full, dropping events")
+            self._dropped += 1
+            EVENT_BUS_DROPPED.inc()
+            return
+        self._pending.append(line)
+
+    async def _run(self) -> None:
+        connected_before = False
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(
+                    self.host, self.port, limit=LINE_LIMIT
+                )
+            except OSError as e:
+                EVENT_BUS_CONNECTIONS.inc(outcome="failed")
+                logger.warning(f"event bus: broker {self.host}:{self.port}: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            subscribe = {"op": "subscribe", "broker": self._broker_id}
+            writer.write(json.dumps({**subscribe, "after": self._seq}).encode())
+            writer.write(b"\n")
+            pending, self._pending = self._pending, []
+            writer.writelines(pending)
+            if self._dropped:
+                logger.warning(f"event bus: {self._dropped} events were dropped")
+                self._dropped = 0
+            self._writer = writer
+            EVENT_BUS_CONNECTIONS.inc(outcome="connected")
+            if connected_before:
+                logger.info(f"event bus: reconnected to {self.host}:{self.port}")
+            connected_before = True
+            try:
+                await self._consume(reader)
+            except (ConnectionError, OSError, ValueError) as e:
+                logger.warning(f"event bus: broker connection failed: {e}")
+            finally:
+                self._writer = None
+                writer.close()
+            EVENT_BUS_CONNECTIONS.inc(outcome="lost")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _consume(self, reader: asyncio.StreamReader) -> None:
+        hello = await reader.readline()
+        if not hello:
+            raise ConnectionError("broker closed the connection")
+        hello = json.loads(hello)
+        self._broker_id = hello["broker"]
+        resync = hello["resync"]
+        async for line in reader:
+            message = json.loads(line)
+            self._seq = message["seq"]
+            event = message["event"]
+            if resync:
+                resync = False
+                await self._resync(event)
+            await self._deliver(event)
+
+    async def _resync(self, first: Dict[str, Any]) -> None:
+        """Start over from the broker's tail, whose first event is `first`."""
+        EVENT_BUS_CONNECTIONS.inc(outcome="resync")
+        if not self.history or first.get("type") == "GRAPH_RESET":
+            return
+        logger.warning("event bus: missed events, resetting subscribers")
+        # Clients rebuild their state from the tail alone.
+        await self._deliver({"type": "GRAPH_RESET", "payload": {}})
+
+
+def create_event_bus(url: Optional[str]) -> EventBus:
+    """The bus for `url`: in-process when unset, else `tcp://host:port`."""
+    if not url:
+        return InProcessEventBus()
+    parsed = urlparse(url)
+    if parsed.scheme != "tcp" or not parsed.hostname or not parsed.port:
+        raise ValueError(f"unsupported event bus URL: {url}")
+    return BrokerEventBus(parsed.hostname, parsed.port)
+
+
+class Broker:
+    """Stand-in pub/sub broker keeping the current session as a replay tail."""
+
+    def __init__(self, tail: int = 100_000):
+        self.id = uuid.uuid4().hex
+        self.seq = 0
+        # (seq, line) of the events since the last GRAPH_RESET.
+        self.tail: Deque[Tuple[int, bytes]] = deque(maxlen=tail)
+        self._connections: Set[asyncio.Queue] = set()
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.seq += 1
+        line = json.dumps({"seq": self.seq, "event": event}).encode() + b"\n"
+        if event.get("type") == "GRAPH_RESET":
+            self.tail.clear()
+        self.tail.append((self.seq, line))
+        for q in self._connections:
+            q.put_nowait(line)
+
+    def _continues(self, broker_id: Optional[str], after: int) -> bool:
+        if broker_id != self.id:
+            return False
+        first = self.tail[0][0] if self.tail else self.seq + 1
+        return first - 1 <= after <= self.seq
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        q: asyncio.Queue = asyncio.Queue()
+        sender: Optional[asyncio.Task] = None
+        try:
+            hello = json.loads(await reader.readline() or b"{}")
+            after = hello.get("after", 0)
+            resync = not self._continues(hello.get("broker"), after)
+            writer.write(json.dumps({"broker": self.id, "resync": resync}).encode())
+            writer.write(b"\n")
+            start = 0 if resync else after
+            writer.writelines(line for seq, line in self.tail if seq > start)
+            self._connections.add(q)
+            sender = asyncio.create_task(self._send(q, writer))
+            async for line in reader:
+                message = json.loads(line)
+                if message.get("op") == "publish":
+                    self.publish(message["event"])
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"broker: dropping connection: {e}")
+        finally:
+            self._connections.discard(q)
+            if sender is not None:
+                sender.cancel()
+            writer.close()
+
+    async def _send(self, q: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        try:
+            await writer.drain()
+            while True:
+                writer.write(await q.get())
+                while not q.empty():
+                    writer.write(q.get_nowait())
+                await writer.drain()
+        except ConnectionError:
+            # The reader side notices the closed connection and cleans up.
+            pass
+
+
+async def run_broker(host: str, port: int, tail: int) -> None:
+    broker = Broker(tail)
+    server = await asyncio.start_server(broker.handle, host, port, limit=LINE_LIMIT)
+    logger.info(f"broker: listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stand-in event broker.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7400)
+    parser.add_argument(
+        "--tail", type=int, default=100_000, help="events kept for replay"
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_broker(args.host, args.port, args.tail))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
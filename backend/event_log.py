@@ -0,0 +1,383 @@
+"""
+Durable per-session log of UI events.
+
+Each session (one research thread) gets a directory under `EVENT_LOG_DIR`:
+
+- `events.log`: one JSON event per line, append-only.
+- `events.idx`: the byte offset of every event in `events.log`, as
+  little-endian uint64s, so event N starts at `idx[8 * N]`.
+- `snapshot.jsonl`: the session folded into the fewest events that rebuild
+  the same UI state (streamed text merged into its message, tool updates
+  into their call, only the last active node and UI mode), covering the
+  first `upto` events (its header line). Rewritten every `snapshot_every`
+  events and on close.
+- `meta.json`: session id, topic and creation time.
+
+`SessionLog.append` only queues the serialized event. A writer task writes
+queued events in batches every `flush_interval` seconds from a worker
+thread, fsyncing the log before the index so every indexed offset points at
+a durable line (group commit: one pair of fsyncs per batch rather than per
+event). If a batch cannot be written, the log stops: it reports the error,
+and later events are counted as dropped instead of piling up in memory. A
+failed snapshot is only logged, since the full log still replays the
+session. Reopening a session after a crash first cuts the log back to its
+last indexed line, dropping a torn tail. `replay_session` streams a session
+back as the snapshot followed by the events after it, read from a memory
+map of the log, so a long session is never loaded into memory whole.
+"""
+
+import asyncio
+import itertools
+import json
+import mmap
+import os
+import re
+import struct
+import time
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from research_workbench.metrics import REGISTRY
+
+_OFFSET = struct.Struct("<Q")
+_SESSION_ID = re.compile(r"[\w-]+")
+
+EVENT_LOG_BYTES = REGISTRY.counter(
+    "research_workbench_event_log_bytes_total",
+    "Bytes written by the durable event log, by file (log, index, snapshot).",
+    ("file",),
+)
+EVENT_LOG_FSYNCS = REGISTRY.counter(
+    "research_workbench_event_log_fsyncs_total",
+    "fsync calls made by the durable event log.",
+)
+EVENT_LOG_DROPPED = REGISTRY.counter(
+    "research_workbench_event_log_dropped_events_total",
+    "Events not logged because the session's log failed to write.",
+)
+EVENT_LOG_BATCH_SIZE = REGISTRY.histogram(
+    "research_workbench_event_log_batch_events",
+    "Events written per event log batch (one batch per group commit).",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+
+
+def fold_events(events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    The shortest event list that leaves the UI reducer (frontend
+    `applyEvent`) in the same state as `events`.
+    """
+    ordered: List[Dict[str, Any]] = []
+    # Message id -> (payload in `ordered`, content pieces).
+    messages: Dict[str, Tuple[Dict[str, Any], List[str]]] = {}
+    edges = set()
+    last: Dict[str, Dict[str, Any]] = {}
+    for event in events:
+        kind = event.get("type")
+        payload = event.get("payload") or {}
+        if kind == "GRAPH_RESET":
+            ordered, messages, last = [event], {}, {}
+            edges = set()
+        elif kind == "MESSAGE_APPENDED":
+            existing = messages.get(payload.get("id"))
+            node_id = payload.get("nodeId")
+            if existing is not None and existing[0].get("nodeId") == node_id:
+                # The reducer replaces the message in place.
+                existing[0].clear()
+                existing[0].update(payload)
+                existing[1][:] = [payload.get("content") or ""]
+                continue
+            message = dict(payload)
+            messages[message.get("id")] = (message, [message.get("content") or ""])
+            ordered.append({**event, "payload": message})
+        elif kind == "MESSAGE_UPDATED":
+            existing = messages.get(payload.get("id"))
+            if existing is None:
+                continue
+            message, pieces = existing
+            content = payload.get("content")
+            if isinstance(content, str):
+                if payload.get("append", True):
+                    pieces.append(content)
+                else:
+                    pieces[:] = [content]
+            if payload.get("streaming") is not None:
+                message["streaming"] = payload["streaming"]
+        elif kind in ("TOOL_UPDATED", "TOOL_STATUS_CHANGED"):
+            existing = messages.get(payload.get("messageId"))
+            if existing is None or not existing[0].get("toolCall"):
+                continue
+            tool_call = dict(existing[0]["toolCall"])
+            for key in ("status", "output", "outputSize", "outputBlobId"):
+                if payload.get(key):
+                    tool_call[key] = payload[key]
+            existing[0]["toolCall"] = tool_call
+        elif kind == "ACTIVE_NODE_SET":
+            last["active"] = event
+        elif kind in ("UI_MODE_SET", "WORKFLOW_STARTED"):
+            last["mode"] = event
+        elif kind == "EDGE_CREATED":
+            edge = payload.get("id") or (payload.get("source"), payload.get("target"))
+            if edge not in edges:
+                edges.add(edge)
+                ordered.append(event)
+        else:
+            ordered.append(event)
+    for message, pieces in messages.values():
+        message["content"] = "".join(pieces)
+    return ordered + list(last.values())
+
+
+def _fsync_write(path: str, data: bytes) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SessionLog:
+    def __init__(
+        self,
+        directory: str,
+        session_id: str,
+        topic: str = "",
+        flush_interval: float = 0.05,
+        snapshot_every: int = 5000,
+    ):
+        self.session_id = session_id
+        self.path = os.path.join(directory, session_id)
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            meta = {"session": session_id, "topic": topic, "created": time.time()}
+            _fsync_write(meta_path, json.dumps(meta).encode())
+        _truncate_torn_tail(self.path)
+        self._log = open(os.path.join(self.path, "events.log"), "ab")
+        self._idx = open(os.path.join(self.path, "events.idx"), "ab")
+        self._offset = self._log.tell()
+        self.count = self._idx.tell() // _OFFSET.size
+        self._snapshot_upto = _snapshot(self.path)[0]
+        if self._snapshot_upto > self.count:
+            # Covers events lost from the log; rebuild it from the log alone.
+            os.remove(os.path.join(self.path, "snapshot.jsonl"))
+            self._snapshot_upto = 0
+        self._queue: List[bytes] = []
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        # The exception that stopped the writer, if any.
+        self.error: Optional[BaseException] = None
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def append(self, event: Dict[str, Any]) -> None:
+        if self.error is not None:
+            EVENT_LOG_DROPPED.inc()
+            return
+        self._queue.append(json.dumps(event).encode() + b"\n")
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+
+    async def _write_loop(self) -> None:
+        while not self._closed or self._queue:
+            await self._wakeup.wait()
+            # Let a batch accumulate; one fsync covers everything queued.
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            batch, self._queue = self._queue, []
+            if not batch:
+                continue
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:
+                # Offsets no longer match the file; stop rather than corrupt it.
+                self.error = e
+                dropped = len(batch) + len(self._queue)
+                self._queue = []
+                EVENT_LOG_DROPPED.inc(dropped)
+                logger.error(
+                    f"event log: {self.session_id} stopped, dropped {dropped} "
+                    f"events: {e!r}"
+                )
+                return
+            if self.count - self._snapshot_upto >= self.snapshot_every:
+                await self._snapshot_safely()
+
+    async def _snapshot_safely(self) -> None:
+        try:
+            await asyncio.to_thread(self._write_snapshot)
+        except Exception as e:
+            # Retry after the next `snapshot_every` events, not every batch.
+            self._snapshot_upto = self.count
+            logger.error(f"event log: {self.session_id} snapshot failed: {e!r}")
+
+    def _write_batch(self, lines: List[bytes]) -> None:
+        offsets = []
+        for line in lines:
+            offsets.append(_OFFSET.pack(self._offset))
+            self._offset += len(line)
+        data = b"".join(lines)
+        index = b"".join(offsets)
+        self._log.write(data)
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        # The index is written after the log is durable, so it never points
+        # past the end of it after a crash.
+        self._idx.write(index)
+        self._idx.flush()
+        os.fsync(self._idx.fileno())
+        self.count += len(lines)
+        EVENT_LOG_BYTES.inc(len(data), file="log")
+        EVENT_LOG_BYTES.inc(len(index), file="index")
+        EVENT_LOG_FSYNCS.inc(2)
+        EVENT_LOG_BATCH_SIZE.observe(len(lines))
+
+    def _write_snapshot(self) -> None:
+        # Folding is incremental: the previous snapshot plus the events since.
+        previous_upto, previous = _snapshot(self.path)
+        upto = self.count
+        events = fold_events(
+            json.loads(line)
+            for line in itertools.chain(previous, _iter_lines(self.path, previous_upto))
+        )
+        path = os.path.join(self.path, "snapshot.jsonl")
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(json.dumps({"upto": upto}).encode() + b"\n")
+            for event in events:
+                f.write(json.dumps(event).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(f"{path}.tmp", path)
+        self._snapshot_upto = upto
+        EVENT_LOG_BYTES.inc(size, file="snapshot")
+        EVENT_LOG_FSYNCS.inc()
+
+    async def close(self) -> None:
+        """Write out everything queued, snapshot the session and close it."""
+        self._closed = True
+        self._wakeup.set()
+        await self._writer
+        if self.error is None and self.count > self._snapshot_upto:
+            await self._snapshot_safely()
+        self._log.close()
+        self._idx.close()
+        logger.info(f"event log: closed {self.session_id} ({self.count} events)")
+
+
+def _truncate_torn_tail(path: str) -> None:
+    """
+    Cut a session left by a crash back to its last indexed event: the index
+    to whole entries, and the log to the end of the line the last entry
+    points at. Appends then start on a line boundary.
+    """
+    log_path = os.path.join(path, "events.log")
+    idx_path = os.path.join(path, "events.idx")
+    end = 0
+    if os.path.exists(idx_path):
+        with open(idx_path, "r+b") as idx:
+            count = os.fstat(idx.fileno()).st_size // _OFFSET.size
+            while count:
+                idx.seek((count - 1) * _OFFSET.size)
+                (offset,) = _OFFSET.unpack(idx.read(_OFFSET.size))
+                line_end = _line_end(log_path, offset)
+                if line_end is not None:
+                    end = line_end
+                    break
+                # The entry points at a line that never became durable.
+                count -= 1
+            idx.truncate(count * _OFFSET.size)
+    if os.path.exists(log_path) and os.path.getsize(log_path) > end:
+        logger.warning(f"event log: truncating torn tail of {path} at byte {end}")
+        with open(log_path, "r+b") as log:
+            log.truncate(end)
+
+
+def _line_end(log_path: str, offset: int) -> Optional[int]:
+    """The byte after the newline ending the line at `offset`, if complete."""
+    try:
+        f = open(log_path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        if os.fstat(f.fileno()).st_size <= offset:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            newline = view.find(b"\n", offset)
+    return None if newline < 0 else newline + 1
+
+
+def _mapped_lines(f: BinaryIO, offset: int) -> Iterator[bytes]:
+    """Complete lines of the open file `f` from byte `offset` on; closes `f`."""
+    with f:
+        if os.fstat(f.fileno()).st_size <= offset:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            while True:
+                end = view.find(b"\n", offset)
+                # A line without its newline was torn by a crash.
+                if end < 0:
+                    return
+                yield view[offset:end]
+                offset = end + 1
+
+
+def _snapshot(path: str) -> Tuple[int, Iterator[bytes]]:
+    """The number of events the snapshot covers, and its event lines."""
+    try:
+        f = open(os.path.join(path, "snapshot.jsonl"), "rb")
+    except FileNotFoundError:
+        return 0, iter(())
+    header = f.readline()
+    return json.loads(header)["upto"], _mapped_lines(f, len(header))
+
+
+def _iter_lines(path: str, start: int = 0) -> Iterator[bytes]:
+    """Complete lines of `events.log` from event number `start` on."""
+    with open(os.path.join(path, "events.idx"), "rb") as f:
+        f.seek(start * _OFFSET.size)
+        entry = f.read(_OFFSET.size)
+    if len(entry) < _OFFSET.size:
+        return iter(())
+    return _mapped_lines(
+        open(os.path.join(path, "events.log"), "rb"), *_OFFSET.unpack(entry)
+    )
+
+
+def session_path(directory: str, session_id: str) -> Optional[str]:
+    if not _SESSION_ID.fullmatch(session_id):
+        return None
+    path = os.path.join(directory, session_id)
+    return path if os.path.exists(os.path.join(path, "events.idx")) else None
+
+
+def replay_session(path: str) -> Iterator[bytes]:
+    """
+    The session's events as JSON lines: the snapshot, then every event
+    logged after it, streamed from the memory-mapped log.
+    """
+    upto, snapshot = _snapshot(path)
+    yield from snapshot
+    yield from _iter_lines(path, upto)
+
+
+def list_sessions(directory: str) -> List[Dict[str, Any]]:
+    sessions = []
+    if not os.path.isdir(directory):
+        return sessions
+    for name in os.listdir(directory):
+        path = session_path(directory, name)
+        if path is None:
+            continue
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {"session": name}
+        index_size = os.path.getsize(os.path.join(path, "events.idx"))
+        meta["events"] = index_size // _OFFSET.size
+        sessions.append(meta)
+    return sorted(sessions, key=lambda s: s.get("created", 0), reverse=True)
@@ -0,0 +1,244 @@
+"""
+Admission control for research runs.
+
+Every `/api/research` and `/api/chat` request becomes a `Job`. At most
+`max_running` jobs run at once, and up to `max_queued` more wait in FIFO
+order. Jobs with the same `key` (the research thread they run on) never run
+at the same time: a queued job whose key is running is passed over until
+that job finishes. Each change of a job's status, and of a waiting job's
+queue position, is reported through `on_update` (a JOB_UPDATED event). When
+the queue is full, `submit` raises `QueueFull` and the request is turned
+away with a 429, so a burst is shed at the door instead of slowing every run
+down together.
+"""
+
+import asyncio
+import math
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from loguru import logger
+
+from research_workbench.metrics import REGISTRY
+
+# Expected run time, in seconds, before any job has finished.
+DEFAULT_RUN_SECONDS = 60.0
+
+JOBS_TOTAL = REGISTRY.counter(
+    "research_workbench_jobs_total",
+    "Finished or rejected jobs, by kind and outcome (completed, failed, "
+    "cancelled, rejected).",
+    ("kind", "outcome"),
+)
+JOB_QUEUE_WAIT = REGISTRY.histogram(
+    "research_workbench_job_queue_wait_seconds",
+    "Time jobs spent queued before they started running.",
+    ("kind",),
+    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+JOBS_RUNNING = REGISTRY.gauge(
+    "research_workbench_jobs_running", "Jobs currently running."
+)
+JOBS_QUEUED = REGISTRY.gauge(
+    "research_workbench_jobs_queued", "Jobs waiting for a free slot."
+)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"job queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    kind: str
+    description: str
+    run: Callable[[], Awaitable[Any]] = field(repr=False)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.QUEUED
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    key: Optional[str] = None
+
+
+class JobManager:
+    def __init__(
+        self,
+        max_running: int,
+        max_queued: int,
+        on_update: Callable[[Dict[str, Any]], Awaitable[None]],
+        keep_finished: int = 100,
+    ):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.on_update = on_update
+        self.keep_finished = keep_finished
+        self._queue: Deque[Job] = deque()
+        self._running: Dict[str, Job] = {}
+        # Every job still queued or running, and the most recent finished ones.
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._durations: Deque[float] = deque(maxlen=20)
+        JOBS_RUNNING.set_function(lambda: len(self._running))
+        JOBS_QUEUED.set_function(lambda: len(self._queue))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def position(self, job: Job) -> Optional[int]:
+        """1-based queue position of a waiting job."""
+        if job.status is not JobStatus.QUEUED:
+            return None
+        return self._queue.index(job) + 1
+
+    def describe(self, job: Job) -> Dict[str, Any]:
+        status = {
+            "id": job.id,
+            "kind": job.kind,
+            "description": job.description,
+            "status": job.status.value,
+            "submitted": job.submitted,
+            "started": job.started,
+            "finished": job.finished,
+        }
+        if job.status is JobStatus.QUEUED:
+            status["position"] = self.position(job)
+        if job.error:
+            status["error"] = job.error
+        return status
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "running": len(self._running),
+            "queued": len(self._queue),
+            "maxRunning": self.max_running,
+            "maxQueued": self.max_queued,
+        }
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up."""
+        durations = self._durations or [DEFAULT_RUN_SECONDS]
+        mean = sum(durations) / len(durations)
+        return max(1, math.ceil(mean * (len(self._queue) + 1) / self.max_running))
+
+    async def submit(
+        self,
+        kind: str,
+        description: str,
+        run: Callable[[], Awaitable[Any]],
+        key: Optional[str] = None,
+    ) -> Job:
+        """
+        Start `run` now if a slot is free and no job with the same `key` is
+        running, else queue it. Raises `QueueFull` when the queue is at
+        `max_queued`.
+        """
+        # With a slot free, every queued job is waiting on its key.
+        if len(self._running) < self.max_running and not self._key_running(key):
+            job = Job(kind, description, run, key=key)
+            self._jobs[job.id] = job
+            await self._start(job)
+            return job
+        if len(self._queue) >= self.max_queued:
+            JOBS_TOTAL.inc(kind=kind, outcome="rejected")
+            raise QueueFull(self.retry_after())
+        job = Job(kind, description, run, key=key)
+        self._jobs[job.id] = job
+        self._queue.append(job)
+        logger.info(f"jobs: queued {kind} {job.id} at position {len(self._queue)}")
+        await self._notify(job)
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status is JobStatus.QUEUED:
+            self._queue.remove(job)
+            job.status = JobStatus.CANCELLED
+            job.finished = time.time()
+            JOBS_TOTAL.inc(kind=job.kind, outcome="cancelled")
+            self._trim()
+            await self._notify(job)
+            await self._notify_positions()
+        elif job.status is JobStatus.RUNNING and job.task is not None:
+            job.task.cancel()
+        return job
+
+    async def _start(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.started = time.time()
+        JOB_QUEUE_WAIT.observe(job.started - job.submitted, kind=job.kind)
+        self._running[job.id] = job
+        job.task = asyncio.create_task(self._execute(job), name=f"job-{job.id}")
+        await self._notify(job)
+
+    async def _execute(self, job: Job) -> None:
+        try:
+            await job.run()
+            job.status = JobStatus.COMPLETED
+        except asyncio.CancelledError:
+            job.status = JobStatus.CANCELLED
+        except Exception as e:
+            logger.exception(f"jobs: {job.kind} {job.id} failed")
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        job.finished = time.time()
+        if job.status is JobStatus.COMPLETED:
+            self._durations.append(job.finished - job.started)
+        del self._running[job.id]
+        JOBS_TOTAL.inc(kind=job.kind, outcome=job.status.value)
+        self._trim()
+        await self._notify(job)
+        started = False
+        for queued in list(self._queue):
+            if len(self._running) >= self.max_running:
+                break
+            if self._key_running(queued.key):
+                continue
+            self._queue.remove(queued)
+            await self._start(queued)
+            started = True
+        if started:
+            await self._notify_positions()
+
+    def _key_running(self, key: Optional[str]) -> bool:
+        return key is not None and any(job.key == key for job in self._running.values())
+
+    def _trim(self) -> None:
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status not in (JobStatus.QUEUED, JobStatus.RUNNING)
+        ]
+        for job_id in finished[: max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job_id]
+
+    async def _notify(self, job: Job) -> None:
+        # A failed update must not stop the queue from moving on.
+        try:
+            await self.on_update({**self.describe(job), **self.summary()})
+        except Exception:
+            logger.exception(f"jobs: update for {job.kind} {job.id} failed")
+
+    async def _notify_positions(self) -> None:
+        for job in list(self._queue):
+            await self._notify(job)
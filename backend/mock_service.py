@@ -2,17 +2,89 @@ import asyncio
 import random
 import string
 import uuid
-from typing import Any, AsyncGenerator, Dict
+from dataclasses import dataclass, fields
+from typing import Any, AsyncGenerator, Dict, Optional
+
+DELAY_DISTRIBUTIONS = {"fixed", "uniform", "exponential"}
+
+
+@dataclass
+class MockScenario:
+    """
+    Shape and pacing of a simulated research run. The defaults reproduce the
+    original Liquid Neural Networks fixture.
+    """
+
+    researchers: int = 6
+    planner_rounds: int = 1
+    # Words per streamed message; None keeps the per-message fixture sizes.
+    tokens_per_message: Optional[int] = None
+    search_result_words: int = 320
+    extract_result_words: int = 300
+    report_words: int = 900
+    # Mean delays; "fixed" uses them as-is, "uniform" samples [0, 2 * mean],
+    # "exponential" samples with the given mean.
+    token_delay: float = 0.002
+    tool_delay: float = 0.5
+    delay_distribution: str = "fixed"
+    # Skip every sleep (still yields to the event loop between events).
+    zero_delay: bool = False
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.delay_distribution not in DELAY_DISTRIBUTIONS:
+            raise ValueError(
+                f"delay_distribution must be one of {sorted(DELAY_DISTRIBUTIONS)}"
+            )
+
+    @classmethod
+    def from_topic(cls, topic: str) -> "MockScenario":
+        """
+        Parse `key=value` overrides following the trigger word, e.g.
+        `test_mock researchers=32 planner_rounds=2 zero_delay=true`.
+        """
+        types = {f.name: f.type for f in fields(cls)}
+        values: Dict[str, Any] = {}
+        for token in topic.split()[1:]:
+            key, sep, raw = token.partition("=")
+            if not sep or key not in types:
+                raise ValueError(f"Unknown mock scenario option: {token}")
+            if key == "tokens_per_message":
+                values[key] = None if raw.lower() == "none" else int(raw)
+            elif types[key] is bool:
+                values[key] = raw.lower() in {"1", "true", "yes", "on"}
+            elif types[key] in (int, float):
+                values[key] = types[key](raw)
+            else:
+                values[key] = raw
+        return cls(**values)
 
 
 class MockGraph:
     """
     Simulates a LangGraph compiled graph for Deep Research using the V2 astream_events API.
-    Provides a complex, multi-step research scenario.
+    Provides a complex, multi-step research scenario, shaped by a `MockScenario`.
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, scenario: Optional[MockScenario] = None):
+        self.scenario = scenario or MockScenario()
+        self._rng = random.Random(self.scenario.seed)
+
+    async def _sleep(self, mean: float):
+        scenario = self.scenario
+        if scenario.zero_delay or mean <= 0:
+            await asyncio.sleep(0)
+            return
+        if scenario.delay_distribution == "uniform":
+            delay = self._rng.uniform(0, 2 * mean)
+        elif scenario.delay_distribution == "exponential":
+            delay = self._rng.expovariate(1 / mean)
+        else:
+            delay = mean
+        await asyncio.sleep(delay)
+
+    def _words(self, default: int) -> int:
+        return self.scenario.tokens_per_message or default
 
     async def astream_events(
         self, inputs: Dict[str, Any], config: Dict[str, Any], version: str = "v2"
@@ -20,6 +92,7 @@ class MockGraph:
         """
         Simulates the streaming of granular graph events (V2 API).
         """
+        scenario = self.scenario
         run_id_map = {}
 
         def get_run_id(key: str) -> str:
@@ -49,8 +122,10 @@ class MockGraph:
             name: str,
             node: str,
             node_id: str | None = None,
-            token_delay: float = 0.02,
+            token_delay: float | None = None,
         ):
+            if token_delay is None:
+                token_delay = scenario.token_delay
             # Split text effectively to simulate token streaming
             tokens = content.split(" ")
 
@@ -76,7 +151,7 @@ class MockGraph:
                     "metadata": metadata,
                     "data": {"chunk": MockChunk(chunk_text)},
                 }
-                await asyncio.sleep(token_delay)  # fast typing
+                await self._sleep(token_delay)  # fast typing
 
             end_metadata = {"langgraph_node": node}
             if node_id:
@@ -102,7 +177,7 @@ class MockGraph:
                 "metadata": metadata,
                 "data": {"input": args},
             }
-            await asyncio.sleep(0.5)
+            await self._sleep(scenario.tool_delay)
 
         async def yield_tool_end(
             name: str, output: Any, run_id: str, node: str, node_id: str | None = None
@@ -117,7 +192,7 @@ class MockGraph:
                 "metadata": metadata,
                 "data": {"output": output},
             }
-            await asyncio.sleep(0.5)
+            await self._sleep(scenario.tool_delay)
 
         async def merge_streams(streams):
             queue: asyncio.Queue = asyncio.Queue()
@@ -156,7 +231,7 @@ class MockGraph:
             we_id: str | None = None,
             we_url: str | None = None,
             we_result: str | None = None,
-            thought_delay: float = 0.01,
+            thought_delay: float | None = None,
         ):
             async for e in yield_tool_start(
                 "start_research",
@@ -224,7 +299,7 @@ class MockGraph:
         # 1. General Assistant (GA)
         # -------------------------
         ga_run_id = get_run_id("ga_turn_1")
-        ga_garbage = make_garbage(101, 650)
+        ga_garbage = make_garbage(101, self._words(650))
         async for e in yield_text(
             (
                 "I'll start a deep research process on Liquid Neural Networks to uncover their "
@@ -234,7 +309,6 @@ class MockGraph:
             ga_run_id,
             "Grok",
             "general_assistant",
-            token_delay=0.002,
         ):
             yield e
 
@@ -248,26 +322,7 @@ class MockGraph:
         ):
             yield e
 
-        # 2. Planner
-        # ----------
-        # Planner receives the ball
-        planner_run_id = get_run_id("planner_msg_1")
-        planner_garbage = make_garbage(202, 500)
-        async for e in yield_text(
-            (
-                "I am generating a research plan. I will investigate core architecture, "
-                "continuous-time dynamics, control theory alignment, and multi-domain applications. "
-                f"{planner_garbage}"
-            ),
-            planner_run_id,
-            "Grok",
-            "planner",
-            token_delay=0.002,
-        ):
-            yield e
-
-        # 3. Researchers in parallel
-        # ---------------------------
+        # Researcher templates, cycled when the scenario asks for more of them.
         researcher_specs = [
             {
                 "key": "res_arch",
@@ -313,53 +368,88 @@ class MockGraph:
             },
         ]
 
-        researcher_streams = []
-        for idx, spec in enumerate(researcher_specs, start=1):
-            res_tool_id = get_run_id(f"{spec['key']}_call")
-            res_run_id = get_run_id(f"{spec['key']}_thought")
-            res_analysis_run_id = get_run_id(f"{spec['key']}_analysis")
-            ws_id = get_run_id(f"{spec['key']}_web_search")
-            we_id = (
-                get_run_id(f"{spec['key']}_web_extract") if spec.get("we_url") else None
-            )
-            res_node_id = f"researcher-{res_tool_id[:8]}"
-
-            thought = f"{spec['proposal']} kickoff. {make_garbage(1000 + idx, 700)}"
-            analysis = f"Interim synthesis. {make_garbage(2000 + idx, 650)}"
-            summary = f"{spec['proposal']} summary. {make_garbage(3000 + idx, 550)}"
-            ws_query = f"{spec['ws_query']} {make_garbage(4000 + idx, 45)}"
-            ws_result = f"{spec['ws_intro']} {make_garbage(5000 + idx, 320)}"
-            we_result = None
-            if we_id and spec.get("we_url"):
-                we_result = f"{spec['we_intro']} {make_garbage(6000 + idx, 300)}"
-
-            researcher_streams.append(
-                researcher_flow(
-                    proposal=spec["proposal"],
-                    thought=thought,
-                    analysis=analysis,
-                    summary=summary,
-                    res_tool_id=res_tool_id,
-                    res_run_id=res_run_id,
-                    res_analysis_run_id=res_analysis_run_id,
-                    ws_id=ws_id,
-                    ws_query=ws_query,
-                    ws_result=ws_result,
-                    res_node_id=res_node_id,
-                    we_id=we_id,
-                    we_url=spec.get("we_url"),
-                    we_result=we_result,
-                    thought_delay=0.002,
+        # 2. Planner rounds
+        # ----------------
+        for round_idx in range(scenario.planner_rounds):
+            # Round 0 keeps the original fixture's run keys and seeds.
+            suffix = f"_r{round_idx}" if round_idx else ""
+            seed_offset = 10000 * round_idx
+
+            # Planner receives the ball
+            planner_run_id = get_run_id(f"planner_msg_1{suffix}")
+            planner_garbage = make_garbage(202 + seed_offset, self._words(500))
+            async for e in yield_text(
+                (
+                    "I am generating a research plan. I will investigate core architecture, "
+                    "continuous-time dynamics, control theory alignment, and multi-domain applications. "
+                    f"{planner_garbage}"
+                ),
+                planner_run_id,
+                "Grok",
+                "planner",
+            ):
+                yield e
+
+            # 3. Researchers in parallel
+            # ---------------------------
+            researcher_streams = []
+            for idx in range(1, scenario.researchers + 1):
+                spec = researcher_specs[(idx - 1) % len(researcher_specs)]
+                key = (
+                    spec["key"]
+                    if idx <= len(researcher_specs)
+                    else f"{spec['key']}_{idx}"
+                )
+                key += suffix
+                seed = idx + seed_offset
+                res_tool_id = get_run_id(f"{key}_call")
+                res_run_id = get_run_id(f"{key}_thought")
+                res_analysis_run_id = get_run_id(f"{key}_analysis")
+                ws_id = get_run_id(f"{key}_web_search")
+                we_id = get_run_id(f"{key}_web_extract") if spec.get("we_url") else None
+                res_node_id = f"researcher-{res_tool_id[:8]}"
+
+                words = self._words
+                thought = make_garbage(1000 + seed, words(700))
+                thought = f"{spec['proposal']} kickoff. {thought}"
+                analysis = make_garbage(2000 + seed, words(650))
+                analysis = f"Interim synthesis. {analysis}"
+                summary = make_garbage(3000 + seed, words(550))
+                summary = f"{spec['proposal']} summary. {summary}"
+                ws_query = f"{spec['ws_query']} {make_garbage(4000 + seed, 45)}"
+                ws_result = make_garbage(5000 + seed, scenario.search_result_words)
+                ws_result = f"{spec['ws_intro']} {ws_result}"
+                we_result = None
+                if we_id and spec.get("we_url"):
+                    we_result = make_garbage(6000 + seed, scenario.extract_result_words)
+                    we_result = f"{spec['we_intro']} {we_result}"
+
+                researcher_streams.append(
+                    researcher_flow(
+                        proposal=spec["proposal"],
+                        thought=thought,
+                        analysis=analysis,
+                        summary=summary,
+                        res_tool_id=res_tool_id,
+                        res_run_id=res_run_id,
+                        res_analysis_run_id=res_analysis_run_id,
+                        ws_id=ws_id,
+                        ws_query=ws_query,
+                        ws_result=ws_result,
+                        res_node_id=res_node_id,
+                        we_id=we_id,
+                        we_url=spec.get("we_url"),
+                        we_result=we_result,
+                    )
                 )
-            )
 
-        async for e in merge_streams(researcher_streams):
-            yield e
+            async for e in merge_streams(researcher_streams):
+                yield e
 
         # 5. Planner Synthesis & Report
         # -----------------------------
         planner_final_run_id = get_run_id("planner_final")
-        planner_final_garbage = make_garbage(303, 500)
+        planner_final_garbage = make_garbage(303, self._words(500))
         async for e in yield_text(
             (
                 "I have gathered sufficient information across architecture, control theory, "
@@ -369,7 +459,6 @@ class MockGraph:
             planner_final_run_id,
             "Grok",
             "planner",
-            token_delay=0.002,
         ):
             yield e
 
@@ -384,7 +473,7 @@ class MockGraph:
         # 6. Final Loop Closure (GA)
         # --------------------------
         # The GA's tool call (start_deep_research) finishes now
-        report_garbage = make_garbage(404, 900)
+        report_garbage = make_garbage(404, scenario.report_words)
         report_content = (
             "# Liquid Neural Networks (LNNs)\n\n"
             "## Executive Summary\n"
@@ -404,12 +493,11 @@ class MockGraph:
 
         # GA Final Comment
         ga_final_run_id = get_run_id("ga_final")
-        ga_final_garbage = make_garbage(505, 500)
+        ga_final_garbage = make_garbage(505, self._words(500))
         async for e in yield_text(
             f"Here is the report on Liquid Neural Networks. {ga_final_garbage}",
             ga_final_run_id,
             "Grok",
             "general_assistant",
-            token_delay=0.002,
         ):
             yield e
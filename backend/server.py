@@ -1,23 +1,76 @@
 import asyncio
+import contextlib
 import json
+import os
 import time
 import uuid
 from collections import defaultdict
+from contextvars import ContextVar
 from typing import Any, AsyncGenerator, Dict, List
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from langchain_core.messages import HumanMessage
 from loguru import logger
 from pydantic import BaseModel
 from sse_starlette.sse import EventSourceResponse
 
-from backend.mock_service import MockGraph
+from backend.blobs import BlobStore, RangeNotSatisfiable, parse_range
+from backend.event_bus import create_event_bus
+from backend.event_log import SessionLog, list_sessions, replay_session, session_path
+from backend.jobs import JobManager, JobStatus, QueueFull
+from backend.session_pool import SessionPool
+from backend.mock_service import MockGraph, MockScenario
 from research_workbench.deep_research import get_graph
+from research_workbench.loop_monitor import LoopMonitor
+from research_workbench.metrics import REGISTRY
+from research_workbench.prefetch import close_prefetcher
+from research_workbench.tracing import TraceRecorder, trace_event_stream
 
 app = FastAPI()
 
 STREAM_EMIT_INTERVAL = 0.05
+# When set, every run appends its span tree to this JSONL file
+# (summarize with `python -m research_workbench.tracing summarize <file>`).
+TRACE_FILE = os.environ.get("TRACE_FILE")
+# Event loop lag sampling and stall detection (see research_workbench.loop_monitor).
+# LOOP_DEBUG=1 logs every stall with its stack and enables asyncio debug mode.
+LOOP_MONITOR = LoopMonitor(
+    stall_threshold=float(os.environ.get("LOOP_STALL_MS", "100")) / 1000,
+    summary_interval=float(os.environ.get("LOOP_SUMMARY_SECONDS", "60")),
+    debug=os.environ.get("LOOP_DEBUG", "").lower() in ("1", "true", "yes"),
+)
+# When set, every session's events are also appended to a durable log under
+# this directory (see backend.event_log) and can be replayed after a restart.
+EVENT_LOG_DIR = os.environ.get("EVENT_LOG_DIR")
+# Tool outputs larger than BLOB_THRESHOLD_BYTES are sent as a preview plus a
+# blob id that the UI fetches from /api/blobs/{id} on demand; 0 disables this.
+# With EVENT_LOG_DIR set, blobs are also kept in its .blobs directory so the
+# ids in logged sessions resolve after a restart.
+BLOBS = BlobStore(
+    threshold=int(os.environ.get("BLOB_THRESHOLD_BYTES", "4096")),
+    preview_chars=int(os.environ.get("BLOB_PREVIEW_CHARS", "500")),
+    max_bytes=int(os.environ.get("BLOB_STORE_MAX_MB", "256")) * 1024 * 1024,
+    directory=os.path.join(EVENT_LOG_DIR, ".blobs") if EVENT_LOG_DIR else None,
+)
+EVENT_LOG_FLUSH_MS = float(os.environ.get("EVENT_LOG_FLUSH_MS", "50"))
+EVENT_LOG_SNAPSHOT_EVERY = int(os.environ.get("EVENT_LOG_SNAPSHOT_EVERY", "5000"))
+# Unset: events reach only this process's SSE clients (single worker). Set to
+# tcp://host:port of an event broker (`python -m backend.event_bus`) to share
+# sessions between workers (see backend.event_bus).
+EVENT_BUS = create_event_bus(os.environ.get("EVENT_BUS_URL"))
+# At most MAX_RUNNING_JOBS research/chat runs at once; up to MAX_QUEUED_JOBS
+# more wait for a slot, and requests beyond that get a 429 (see backend.jobs).
+# The UI state here (bus history, active thread, mock flags) is one session's:
+# with more than one slot, a new run's GRAPH_RESET wipes the graph of the run
+# in progress and both draw into one graph, so raise it only for load tests.
+# Jobs on the same thread never run at once, whatever the limit.
+MAX_RUNNING_JOBS = int(os.environ.get("MAX_RUNNING_JOBS", "1"))
+MAX_QUEUED_JOBS = int(os.environ.get("MAX_QUEUED_JOBS", "16"))
+# When > 0, research sessions run in this many worker processes and this
+# process only routes their events (see backend.session_pool).
+SESSION_WORKERS = int(os.environ.get("SESSION_WORKERS", "0"))
 
 # Configure CORS for local frontend development
 app.add_middleware(
@@ -33,12 +86,25 @@ class ResearchRequest(BaseModel):
     topic: str
 
 
-# Global event subscribers
-# Global event subscribers
-subscribers: List[asyncio.Queue] = []
-history: List[Dict[str, Any]] = []
 active_thread_id: str | None = None
 is_active_session_mock: bool = False
+active_mock_scenario: MockScenario | None = None
+# Thread of the run whose events are being emitted (see _session_scope).
+_run_thread: ContextVar[str | None] = ContextVar("run_thread", default=None)
+# Open event logs of the sessions being run, by thread id.
+session_logs: Dict[str, SessionLog] = {}
+
+SSE_SUBSCRIBERS = REGISTRY.gauge(
+    "research_workbench_sse_subscribers", "Connected SSE subscribers."
+)
+SSE_SUBSCRIBERS.set_function(lambda: EVENT_BUS.subscriber_count)
+HISTORY_SIZE = REGISTRY.gauge(
+    "research_workbench_history_events", "Events held in the replay history."
+)
+HISTORY_SIZE.set_function(lambda: len(EVENT_BUS.history))
+ACTIVE_SESSIONS = REGISTRY.gauge(
+    "research_workbench_active_sessions", "Research tasks currently running."
+)
 
 
 # Helper to emit events to frontend
@@ -47,19 +113,36 @@ async def emit_event(event_type: str, payload: Dict[str, Any]):
         "id": str(uuid.uuid4()),
         "type": event_type,
         "payload": payload,
-        "timestamp": 0,
+        # Emit time (epoch ms), used to measure end-to-end delivery latency.
+        "timestamp": time.time() * 1000,
     }
     # Avoid logging per-event to prevent log storms during streaming.
-    # Store in history
-    history.append(event)
+    await publish_event(event)
 
-    # Broadcast
-    for q in subscribers:
-        await q.put(event)
+
+async def publish_event(event: Dict[str, Any], thread_id: str | None = None):
+    """Publish `event`, logging it to `thread_id`'s session (default: this run's)."""
+    log = session_logs.get(thread_id or _run_thread.get())
+    if log is not None:
+        log.append(event)
+    # The bus keeps the replay history and broadcasts to subscribers.
+    await EVENT_BUS.publish(event)
+
+
+JOB_MANAGER = JobManager(
+    MAX_RUNNING_JOBS,
+    MAX_QUEUED_JOBS,
+    on_update=lambda status: emit_event("JOB_UPDATED", status),
+)
+SESSION_POOL = (
+    SessionPool(SESSION_WORKERS, publish_event, lambda data: BLOBS.put(data))
+    if SESSION_WORKERS > 0
+    else None
+)
 
 
 def get_latest_node_id(kind: str) -> str | None:
-    for event in reversed(history):
+    for event in reversed(EVENT_BUS.history):
         if event.get("type") != "NODE_CREATED":
             continue
         payload = event.get("payload", {})
@@ -69,43 +152,122 @@ def get_latest_node_id(kind: str) -> str | None:
 
 
 async def subscribe() -> AsyncGenerator[Dict[str, Any], None]:
-    q = asyncio.Queue()
-    # Replay history first
-    for event in history:
-        # We need to yield immediately, but this is an async generator.
-        # We can just put them in the queue or yield directly.
-        # Yielding directly in the generator loop is safer.
+    # Replays the session's history first, then streams live events.
+    async for event in EVENT_BUS.subscribe():
         yield {"data": json.dumps(event)}
 
-    subscribers.append(q)
+
+async def run_research_task(topic: str, thread_id: str | None = None):
+    """
+    Runs the LangGraph agent and translates state updates to frontend events.
+    """
+    thread_id = thread_id or str(uuid.uuid4())
+    ACTIVE_SESSIONS.inc()
     try:
-        while True:
-            event = await q.get()
-            yield {"data": json.dumps(event)}
+        # With a session pool, events come back from the worker, tagged with
+        # the thread, and are logged here.
+        async with _session_scope(thread_id, topic), _ended_in_ui():
+            if SESSION_POOL is not None:
+                await SESSION_POOL.run(thread_id, topic)
+            else:
+                await _run_research_task(topic, thread_id)
+    finally:
+        ACTIVE_SESSIONS.dec()
+
+
+@contextlib.asynccontextmanager
+async def _ended_in_ui():
+    """
+    End a run that failed or was cancelled in the UI too (ERROR, then
+    WORKFLOW_COMPLETED), so clients do not wait for it forever.
+    """
+    try:
+        yield
     except asyncio.CancelledError:
-        subscribers.remove(q)
+        await emit_event("ERROR", {"message": "Research session cancelled"})
+        await emit_event("WORKFLOW_COMPLETED", {})
+        raise
+    except Exception as e:
+        # Including a crashed session worker (only its own sessions fail) and
+        # a follow-up for a thread whose worker is gone.
+        await emit_event("ERROR", {"message": f"Research session failed: {e}"})
+        await emit_event("WORKFLOW_COMPLETED", {})
         raise
 
 
-async def run_research_task(topic: str):
+def _graph_events(graph, inputs, config) -> AsyncGenerator[Dict[str, Any], None]:
+    events = graph.astream_events(inputs, config=config, version="v2")
+    if TRACE_FILE:
+        thread_id = config["configurable"]["thread_id"]
+        events = trace_event_stream(
+            events, TraceRecorder(TRACE_FILE, attributes={"thread_id": thread_id})
+        )
+    return events
+
+
+@contextlib.asynccontextmanager
+async def _session_scope(thread_id: str, topic: str = ""):
     """
-    Runs the LangGraph agent and translates state updates to frontend events.
+    Attribute the events emitted inside the block to `thread_id` and, with
+    EVENT_LOG_DIR set, log them to that session. The log is closed when the
+    run that opened it ends, so no run writes into another session's log.
     """
-    global active_thread_id
+    token = _run_thread.set(thread_id)
+    opened = None
+    if EVENT_LOG_DIR and thread_id not in session_logs:
+        opened = session_logs[thread_id] = SessionLog(
+            EVENT_LOG_DIR,
+            thread_id,
+            topic=topic,
+            flush_interval=EVENT_LOG_FLUSH_MS / 1000,
+            snapshot_every=EVENT_LOG_SNAPSHOT_EVERY,
+        )
+    try:
+        yield
+    finally:
+        _run_thread.reset(token)
+        if opened is not None:
+            del session_logs[thread_id]
+            await opened.close()
 
-    is_mock = topic.strip().lower() == "test_mock"
 
-    global is_active_session_mock
+def _mock_scenario(topic: str) -> MockScenario | None:
+    """
+    The mock scenario a "test_mock" topic asks for, or None for a real run.
+    "test_mock" may be followed by MockScenario overrides, e.g.
+    "test_mock researchers=32 zero_delay=true"; invalid ones raise ValueError.
+    """
+    topic_words = topic.strip().lower().split()
+    if not topic_words or topic_words[0] != "test_mock":
+        return None
+    return MockScenario.from_topic(topic.strip())
+
+
+async def _run_research_task(topic: str, thread_id: str | None = None):
+    thread_id = thread_id or str(uuid.uuid4())
+    async with _session_scope(thread_id, topic):
+        try:
+            await _stream_research_task(topic, thread_id)
+        finally:
+            # The graph closes it when the run ends normally; this also covers
+            # runs that failed or were cancelled.
+            await close_prefetcher({"configurable": {"thread_id": thread_id}})
+
+
+async def _stream_research_task(topic: str, thread_id: str):
+    scenario = _mock_scenario(topic)
+    is_mock = scenario is not None
+
+    global is_active_session_mock, active_mock_scenario
     is_active_session_mock = is_mock
 
     if is_mock:
-        graph = MockGraph()
-        logger.info("Using MockGraph for research task")
+        active_mock_scenario = scenario
+        graph = MockGraph(active_mock_scenario)
+        logger.info("Using MockGraph for research task: {}", active_mock_scenario)
     else:
         graph = get_graph()
 
-    thread_id = str(uuid.uuid4())
-    active_thread_id = thread_id
     config = {"configurable": {"thread_id": thread_id}}
 
     # 1. Initialize Graph UI: Create GA Node
@@ -151,9 +313,11 @@ async def run_research_task(topic: str):
     processed_msg_ids = {user_msg_id}
     pending_stream_chunks: Dict[str, str] = defaultdict(str)
     last_stream_emit: Dict[str, float] = {}
+    # Characters of each streamed message already sent to the UI.
+    streamed_chars: Dict[str, int] = {}
     inputs = {"general_assistant_messages": [HumanMessage(content=topic)]}
 
-    async for event in graph.astream_events(inputs, config=config, version="v2"):
+    async for event in _graph_events(graph, inputs, config):
         kind = event["event"]
         name = event["name"]
         run_id = event["run_id"]
@@ -358,6 +522,7 @@ async def run_research_task(topic: str):
                 if run_id not in processed_msg_ids:
                     processed_msg_ids.add(run_id)
                     last_stream_emit[run_id] = time.monotonic()
+                    streamed_chars[run_id] = len(content)
                     await emit_event(
                         "MESSAGE_APPENDED",
                         {
@@ -376,6 +541,7 @@ async def run_research_task(topic: str):
                         pending_content = pending_stream_chunks[run_id]
                         if pending_content:
                             pending_stream_chunks[run_id] = ""
+                            streamed_chars[run_id] += len(pending_content)
                             last_stream_emit[run_id] = now
                             await emit_event(
                                 "MESSAGE_UPDATED",
@@ -399,8 +565,22 @@ async def run_research_task(topic: str):
 
             pending_text = pending_stream_chunks.pop(run_id, "")
             last_stream_emit.pop(run_id, None)
+            sent = streamed_chars.pop(run_id, 0)
 
-            if output_text:
+            if pending_text and sent + len(pending_text) == len(output_text):
+                # The stream already delivered the message; only flush the tail.
+                await emit_event(
+                    "MESSAGE_UPDATED",
+                    {
+                        "id": run_id,
+                        "content": pending_text,
+                        "append": True,
+                        "streaming": False,
+                    },
+                )
+            elif sent and sent == len(output_text):
+                await emit_event("MESSAGE_UPDATED", {"id": run_id, "streaming": False})
+            elif output_text:
                 await emit_event(
                     "MESSAGE_UPDATED",
                     {
@@ -455,16 +635,17 @@ async def run_research_task(topic: str):
             output = event["data"].get("output")
             # Output can be ToolMessage or string or dict.
             # We sanitize it for display.
-            output_str = str(output)
             if hasattr(output, "content"):
                 output_str = str(output.content)
+            else:
+                output_str = str(output)
 
             await emit_event(
                 "TOOL_UPDATED",
                 {
                     "messageId": run_id,
                     "status": "success",  # or error if we detect it
-                    "output": output_str,
+                    **BLOBS.offload(output_str),
                 },
             )
 
@@ -472,21 +653,41 @@ async def run_research_task(topic: str):
     logger.info("Research workflow completed")
 
 
-async def continue_research_task(message: str):
+async def continue_research_task(message: str, thread_id: str | None = None):
     """
-    Continues the conversation on the active thread.
+    Continues the conversation on `thread_id` (default: the active thread).
     """
-    global active_thread_id
-    if not active_thread_id:
+    thread_id = thread_id or active_thread_id
+    ACTIVE_SESSIONS.inc()
+    try:
+        async with _session_scope(thread_id), _ended_in_ui():
+            if SESSION_POOL is not None:
+                await SESSION_POOL.continue_session(thread_id, message)
+            else:
+                await _continue_research_task(message, thread_id)
+    finally:
+        ACTIVE_SESSIONS.dec()
+
+
+async def _continue_research_task(message: str, thread_id: str | None = None):
+    thread_id = thread_id or active_thread_id
+    if not thread_id:
         return
+    async with _session_scope(thread_id):
+        try:
+            await _stream_continuation(message, thread_id)
+        finally:
+            await close_prefetcher({"configurable": {"thread_id": thread_id}})
 
+
+async def _stream_continuation(message: str, thread_id: str):
     global is_active_session_mock
     if is_active_session_mock:
-        graph = MockGraph()
+        graph = MockGraph(active_mock_scenario)
     else:
         graph = get_graph()
 
-    config = {"configurable": {"thread_id": active_thread_id}}
+    config = {"configurable": {"thread_id": thread_id}}
 
     # Emit User Message
     user_msg_id = str(uuid.uuid4())
@@ -512,13 +713,15 @@ async def continue_research_task(message: str):
     processed_msg_ids = {user_msg_id}
     pending_stream_chunks: Dict[str, str] = defaultdict(str)
     last_stream_emit: Dict[str, float] = {}
+    # Characters of each streamed message already sent to the UI.
+    streamed_chars: Dict[str, int] = {}
     current_node_id = ga_id
     pending_researcher_ids: List[str] = []
     run_id_to_node_id: Dict[str, str] = {}
 
     inputs = {"general_assistant_messages": [HumanMessage(content=message)]}
 
-    async for event in graph.astream_events(inputs, config=config, version="v2"):
+    async for event in _graph_events(graph, inputs, config):
         kind = event["event"]
         name = event["name"]
         run_id = event["run_id"]
@@ -691,6 +894,7 @@ async def continue_research_task(message: str):
                 if run_id not in processed_msg_ids:
                     processed_msg_ids.add(run_id)
                     last_stream_emit[run_id] = time.monotonic()
+                    streamed_chars[run_id] = len(content)
                     await emit_event(
                         "MESSAGE_APPENDED",
                         {
@@ -709,6 +913,7 @@ async def continue_research_task(message: str):
                         pending_content = pending_stream_chunks[run_id]
                         if pending_content:
                             pending_stream_chunks[run_id] = ""
+                            streamed_chars[run_id] += len(pending_content)
                             last_stream_emit[run_id] = now
                             await emit_event(
                                 "MESSAGE_UPDATED",
@@ -732,8 +937,22 @@ async def continue_research_task(message: str):
 
             pending_text = pending_stream_chunks.pop(run_id, "")
             last_stream_emit.pop(run_id, None)
+            sent = streamed_chars.pop(run_id, 0)
 
-            if output_text:
+            if pending_text and sent + len(pending_text) == len(output_text):
+                # The stream already delivered the message; only flush the tail.
+                await emit_event(
+                    "MESSAGE_UPDATED",
+                    {
+                        "id": run_id,
+                        "content": pending_text,
+                        "append": True,
+                        "streaming": False,
+                    },
+                )
+            elif sent and sent == len(output_text):
+                await emit_event("MESSAGE_UPDATED", {"id": run_id, "streaming": False})
+            elif output_text:
                 await emit_event(
                     "MESSAGE_UPDATED",
                     {
@@ -782,30 +1001,63 @@ async def continue_research_task(message: str):
         # C. Tool End
         elif kind == "on_tool_end":
             output = event["data"].get("output")
-            output_str = str(output)
             if hasattr(output, "content"):
                 output_str = str(output.content)
+            else:
+                output_str = str(output)
 
             await emit_event(
                 "TOOL_UPDATED",
-                {"messageId": run_id, "status": "success", "output": output_str},
+                {"messageId": run_id, "status": "success", **BLOBS.offload(output_str)},
             )
 
 
+async def _start_research_job(topic: str, thread_id: str):
+    # Notify clients to reset UI; this also clears the bus's replay history
+    await emit_event("GRAPH_RESET", {})
+
+    await run_research_task(topic, thread_id)
+
+
+def _busy(e: QueueFull) -> JSONResponse:
+    return JSONResponse(
+        {"status": "rejected", "message": str(e), "retryAfter": e.retry_after},
+        status_code=429,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
 @app.post("/api/research")
 async def start_research(request: ResearchRequest):
     """
-    Start a new research task.
+    Start a new research task, or queue it until a run slot is free.
     """
-    # Clear history for fresh session
-    history.clear()
-
-    # Notify clients to reset UI
-    await emit_event("GRAPH_RESET", {})
-
-    # Start the task in background
-    asyncio.create_task(run_research_task(request.topic))
-    return {"status": "started", "topic": request.topic}
+    global active_thread_id
+    try:
+        _mock_scenario(request.topic)
+    except ValueError as e:
+        # Rejected here; inside the job the error would never reach the UI.
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=400)
+    # Chosen now, so that jobs on this thread are serialized with this one.
+    thread_id = str(uuid.uuid4())
+    try:
+        job = await JOB_MANAGER.submit(
+            "research",
+            request.topic,
+            lambda: _start_research_job(request.topic, thread_id),
+            key=thread_id,
+        )
+    except QueueFull as e:
+        return _busy(e)
+    # Follow-up messages from now on belong to this run, even while it is
+    # queued; keyed by its thread, they wait for it.
+    active_thread_id = thread_id
+    return {
+        "status": "started" if job.status is JobStatus.RUNNING else "queued",
+        "topic": request.topic,
+        "jobId": job.id,
+        "position": JOB_MANAGER.position(job),
+    }
 
 
 class ChatRequest(BaseModel):
@@ -815,15 +1067,29 @@ class ChatRequest(BaseModel):
 @app.post("/api/chat")
 async def chat(request: ChatRequest):
     """
-    Send a follow-up message to the active research task.
+    Send a follow-up message to the latest research task (queued or not).
     """
-    global active_thread_id
     if not active_thread_id:
         return {"status": "error", "message": "No active research session"}
 
-    # Run the graph with new input on existing thread
-    asyncio.create_task(continue_research_task(request.message))
-    return {"status": "sent", "message": request.message}
+    # Run the graph with new input on existing thread, after any job still
+    # running on it
+    thread_id = active_thread_id
+    try:
+        job = await JOB_MANAGER.submit(
+            "chat",
+            request.message,
+            lambda: continue_research_task(request.message, thread_id),
+            key=thread_id,
+        )
+    except QueueFull as e:
+        return _busy(e)
+    return {
+        "status": "sent" if job.status is JobStatus.RUNNING else "queued",
+        "message": request.message,
+        "jobId": job.id,
+        "position": JOB_MANAGER.position(job),
+    }
 
 
 @app.get("/api/events")
@@ -834,6 +1100,147 @@ async def event_stream(request: Request):
     return EventSourceResponse(subscribe())
 
 
+@app.get("/api/jobs")
+async def jobs():
+    """
+    Run slots in use, the queue, and recent jobs (oldest first).
+    """
+    return {
+        **JOB_MANAGER.summary(),
+        "jobs": [JOB_MANAGER.describe(job) for job in JOB_MANAGER.jobs()],
+    }
+
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = JOB_MANAGER.get(job_id)
+    if job is None:
+        return JSONResponse({"message": "Job not found"}, status_code=404)
+    return JOB_MANAGER.describe(job)
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job.
+    """
+    job = await JOB_MANAGER.cancel(job_id)
+    if job is None:
+        return JSONResponse({"message": "Job not found"}, status_code=404)
+    return JOB_MANAGER.describe(job)
+
+
+@app.get("/api/blobs/{blob_id}")
+async def get_blob(blob_id: str, request: Request):
+    """
+    Full content of an offloaded event payload. Supports single-range
+    `Range: bytes=...` requests.
+    """
+    data = await asyncio.to_thread(BLOBS.get, blob_id)
+    if data is None:
+        return PlainTextResponse("Blob not found", status_code=404)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{blob_id}"',
+        # Blobs are content-addressed, so a given id never changes.
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    media_type = "text/plain; charset=utf-8"
+    try:
+        byte_range = parse_range(request.headers.get("range", ""), len(data))
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=416,
+            headers={**headers, "Content-Range": f"bytes */{len(data)}"},
+        )
+    if byte_range is None:
+        return Response(data, headers=headers, media_type=media_type)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+    return Response(
+        data[start : end + 1], status_code=206, headers=headers, media_type=media_type
+    )
+
+
+@app.get("/api/sessions")
+async def sessions():
+    """
+    Sessions recorded in the durable event log, newest first.
+    """
+    if not EVENT_LOG_DIR:
+        return []
+    return await asyncio.to_thread(list_sessions, EVENT_LOG_DIR)
+
+
+@app.get("/api/sessions/{session_id}/events")
+async def session_events(session_id: str):
+    """
+    Replay a recorded session as newline-delimited JSON events, streamed from
+    its snapshot and log on disk.
+    """
+    path = session_path(EVENT_LOG_DIR, session_id) if EVENT_LOG_DIR else None
+    if path is None:
+        return PlainTextResponse("Session not found", status_code=404)
+
+    def lines():
+        # The client starts from a clean graph, as after /api/research.
+        yield b'{"type": "GRAPH_RESET", "payload": {}}\n'
+        for line in replay_session(path):
+            yield line + b"\n"
+
+    # A sync iterator runs in Starlette's thread pool, off the event loop.
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.on_event("startup")
+async def start_event_bus():
+    await EVENT_BUS.start()
+
+
+@app.on_event("shutdown")
+async def stop_event_bus():
+    await EVENT_BUS.stop()
+
+
+@app.on_event("startup")
+async def start_session_pool():
+    if SESSION_POOL is not None:
+        await SESSION_POOL.start()
+
+
+@app.on_event("shutdown")
+async def stop_session_pool():
+    if SESSION_POOL is not None:
+        await SESSION_POOL.stop()
+
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    LOOP_MONITOR.start()
+
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    await LOOP_MONITOR.stop()
+
+
+@app.on_event("shutdown")
+async def close_session_logs():
+    for log in list(session_logs.values()):
+        await log.close()
+    session_logs.clear()
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus scrape endpoint.
+    """
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
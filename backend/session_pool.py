@@ -0,0 +1,358 @@
+"""
+Research sessions executed in a pool of worker processes.
+
+In-process, every session's graph, prompt building and event translation
+share the API process's event loop and one core. With `SESSION_WORKERS=N`
+the API process instead hands each run to one of N worker processes and
+only routes: it publishes the events the workers stream back (event bus,
+session log), serves blobs and applies admission control.
+
+Each worker is `python -m backend.session_pool --fd <fd>`, connected to the
+API process by a socket pair carrying JSON lines:
+
+- API -> worker: `{"op": "run", "call", "thread", "topic"}`,
+  `{"op": "continue", "call", "thread", "message"}`, `{"op": "cancel", "call"}`
+- worker -> API: `{"event", "thread"}` for every UI event, with the thread
+  it belongs to (for the session log), `{"blob": text}` for
+  an offloaded payload (sent before the event that refers to it), and
+  `{"call", "error", "unknown"}` when a call finishes (`unknown`: the
+  worker no longer holds the thread).
+
+A worker runs the unchanged translation code in `backend.server`, with that
+module's event bus and blob store swapped for ones that forward to the API
+process. That module's state (event history, active thread, mock flags) is
+one session's, so a worker runs one call at a time, and keeps each thread's
+copy of that state between calls for its last `MAX_WORKER_SESSIONS` threads.
+The graph checkpointer is not kept: each call compiles the graph afresh.
+
+New runs go to the least busy worker. Follow-up messages go to the worker
+that ran the thread (sticky routing), since the thread's state lives there.
+A follow-up for a thread no worker holds, because it was forgotten or its
+worker died, raises `UnknownSession` rather than starting over elsewhere. If
+a worker dies, only its own calls fail: they raise `WorkerCrashed`, and the
+worker is replaced.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from backend.blobs import BlobStore
+from backend.event_bus import LINE_LIMIT, EventBus
+from research_workbench.metrics import REGISTRY
+
+# Threads remembered for sticky routing.
+MAX_STICKY_THREADS = 1024
+# Threads whose session state a worker keeps for follow-up messages.
+MAX_WORKER_SESSIONS = 32
+
+SESSION_WORKER_CALLS = REGISTRY.gauge(
+    "research_workbench_session_worker_calls",
+    "Calls in flight on each session worker process.",
+    ("worker",),
+)
+SESSION_WORKER_CRASHES = REGISTRY.counter(
+    "research_workbench_session_worker_crashes_total",
+    "Session worker processes that exited unexpectedly and were replaced.",
+)
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+class UnknownSession(LookupError):
+    pass
+
+
+class _Worker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[subprocess.Popen] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.calls: Dict[str, asyncio.Future] = {}
+        self.reader_task: Optional[asyncio.Task] = None
+
+
+class SessionPool:
+    def __init__(
+        self,
+        workers: int,
+        publish: Callable[[Dict[str, Any], Optional[str]], Awaitable[None]],
+        store_blob: Callable[[bytes], str],
+    ):
+        self.publish = publish
+        self.store_blob = store_blob
+        self._workers = [_Worker(i) for i in range(workers)]
+        self._sticky: "OrderedDict[str, _Worker]" = OrderedDict()
+        self._stopping = False
+
+    async def start(self) -> None:
+        for worker in self._workers:
+            await self._spawn(worker)
+        logger.info(f"session pool: {len(self._workers)} worker processes")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for worker in self._workers:
+            if worker.writer is not None:
+                worker.writer.close()
+            if worker.process is not None:
+                worker.process.terminate()
+        for worker in self._workers:
+            if worker.reader_task is not None:
+                await asyncio.gather(worker.reader_task, return_exceptions=True)
+            if worker.process is not None:
+                await asyncio.to_thread(worker.process.wait)
+
+    async def _spawn(self, worker: _Worker) -> None:
+        parent, child = socket.socketpair()
+        worker.process = subprocess.Popen(
+            [sys.executable, "-m", "backend.session_pool", "--fd", str(child.fileno())],
+            pass_fds=(child.fileno(),),
+        )
+        child.close()
+        reader, worker.writer = await asyncio.open_connection(
+            sock=parent, limit=LINE_LIMIT
+        )
+        worker.reader_task = asyncio.create_task(
+            self._read(worker, reader), name=f"session-worker-{worker.index}"
+        )
+        SESSION_WORKER_CALLS.set(0, worker=str(worker.index))
+
+    async def _read(self, worker: _Worker, reader: asyncio.StreamReader) -> None:
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                if "event" in message:
+                    await self.publish(message["event"], message.get("thread"))
+                elif "blob" in message:
+                    self.store_blob(message["blob"].encode("utf-8"))
+                else:
+                    self._finish(
+                        worker,
+                        message["call"],
+                        message.get("error"),
+                        message.get("unknown", False),
+                    )
+        except (ConnectionError, ValueError) as e:
+            logger.error(f"session pool: worker {worker.index}: {e}")
+        except Exception:
+            # A malformed message or a failed publish: treat it as a crash
+            # rather than leaving the worker's calls waiting forever.
+            logger.exception(f"session pool: worker {worker.index}: bad message")
+        if self._stopping:
+            return
+        # The worker exited or its channel broke: fail only its own calls.
+        process = worker.process
+        code = None
+        if process is not None:
+            process.kill()
+            code = await asyncio.to_thread(process.wait)
+        logger.error(f"session pool: worker {worker.index} died (exit code {code})")
+        SESSION_WORKER_CRASHES.inc()
+        for future in worker.calls.values():
+            if not future.done():
+                future.set_exception(
+                    WorkerCrashed(f"session worker {worker.index} exited ({code})")
+                )
+        worker.calls.clear()
+        for thread_id in [t for t, w in self._sticky.items() if w is worker]:
+            del self._sticky[thread_id]
+        worker.writer.close()
+        await self._spawn(worker)
+
+    def _finish(
+        self, worker: _Worker, call: str, error: Optional[str], unknown: bool
+    ) -> None:
+        future = worker.calls.pop(call, None)
+        SESSION_WORKER_CALLS.set(len(worker.calls), worker=str(worker.index))
+        if future is None or future.done():
+            return
+        if error is None:
+            future.set_result(None)
+        elif unknown:
+            future.set_exception(UnknownSession(error))
+        else:
+            future.set_exception(RuntimeError(error))
+
+    def _pick(self, thread_id: str, new: bool) -> _Worker:
+        worker = self._sticky.get(thread_id)
+        if not new:
+            if worker is None:
+                raise UnknownSession(f"no session worker holds thread {thread_id}")
+            self._sticky.move_to_end(thread_id)
+            return worker
+        worker = min(self._workers, key=lambda w: len(w.calls))
+        self._sticky[thread_id] = worker
+        self._sticky.move_to_end(thread_id)
+        while len(self._sticky) > MAX_STICKY_THREADS:
+            self._sticky.popitem(last=False)
+        return worker
+
+    async def _call(self, op: str, thread_id: str, **fields: Any) -> None:
+        worker = self._pick(thread_id, new=op == "run")
+        call = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        worker.calls[call] = future
+        SESSION_WORKER_CALLS.set(len(worker.calls), worker=str(worker.index))
+        message = {"op": op, "call": call, "thread": thread_id, **fields}
+        worker.writer.write(json.dumps(message).encode() + b"\n")
+        try:
+            await worker.writer.drain()
+            await future
+        except asyncio.CancelledError:
+            # A cancelled job cancels the session in the worker too.
+            if not worker.writer.is_closing():
+                cancel = {"op": "cancel", "call": call}
+                worker.writer.write(json.dumps(cancel).encode() + b"\n")
+            raise
+        except ConnectionError as e:
+            worker.calls.pop(call, None)
+            raise WorkerCrashed(f"session worker {worker.index}: {e}") from e
+
+    async def run(self, thread_id: str, topic: str) -> None:
+        """Run a new research session on `thread_id` in a worker."""
+        await self._call("run", thread_id, topic=topic)
+
+    async def continue_session(self, thread_id: str, message: str) -> None:
+        """
+        Send a follow-up message to the worker that ran `thread_id`. Raises
+        `UnknownSession` if no worker holds the thread any more.
+        """
+        await self._call("continue", thread_id, message=message)
+
+
+class _WorkerEventBus(EventBus):
+    """Forwards events to the API process, keeping the local history."""
+
+    def __init__(
+        self,
+        send: Callable[[Dict[str, Any]], Awaitable[None]],
+        thread: Callable[[], Optional[str]],
+    ):
+        super().__init__()
+        self._send = send
+        self._thread = thread
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        # The history is what `get_latest_node_id` reads in this process.
+        await self._deliver(event)
+        await self._send({"event": event, "thread": self._thread()})
+
+
+class _WorkerBlobStore(BlobStore):
+    """Sends offloaded payloads to the API process, which serves them."""
+
+    def __init__(self, store: BlobStore, send: Callable[[Dict[str, Any]], None]):
+        super().__init__(store.threshold, store.preview_chars, max_bytes=0)
+        self._send = send
+
+    def put(self, data: bytes) -> str:
+        # The API process stores it under the same content address.
+        self._send({"blob": data.decode("utf-8")})
+        return hashlib.sha256(data).hexdigest()
+
+
+async def _serve(fd: int) -> None:
+    from backend import server
+
+    reader, writer = await asyncio.open_connection(
+        sock=socket.socket(fileno=fd), limit=LINE_LIMIT
+    )
+
+    def send_nowait(message: Dict[str, Any]) -> None:
+        writer.write(json.dumps(message).encode() + b"\n")
+
+    async def send(message: Dict[str, Any]) -> None:
+        send_nowait(message)
+        await writer.drain()
+
+    server.EVENT_BUS = _WorkerEventBus(send, server._run_thread.get)
+    server.BLOBS = _WorkerBlobStore(server.BLOBS, send_nowait)
+    # Sessions are logged by the API process.
+    server.EVENT_LOG_DIR = None
+
+    async def session(message: Dict[str, Any]) -> None:
+        thread_id = message["thread"]
+        if message["op"] == "run":
+            # Same as the GRAPH_RESET the API process sends before a run.
+            state = {"history": [], "mock": False, "scenario": None}
+        else:
+            state = sessions.get(thread_id)
+            if state is None:
+                raise UnknownSession(f"session worker no longer holds {thread_id}")
+        server.EVENT_BUS.history = state["history"]
+        server.is_active_session_mock = state["mock"]
+        server.active_mock_scenario = state["scenario"]
+        server.active_thread_id = thread_id
+        try:
+            if message["op"] == "run":
+                await server._run_research_task(message["topic"], thread_id)
+            else:
+                await server._continue_research_task(message["message"], thread_id)
+        finally:
+            sessions[thread_id] = {
+                "history": server.EVENT_BUS.history,
+                "mock": server.is_active_session_mock,
+                "scenario": server.active_mock_scenario,
+            }
+            sessions.move_to_end(thread_id)
+            while len(sessions) > MAX_WORKER_SESSIONS:
+                sessions.popitem(last=False)
+
+    async def run(message: Dict[str, Any]) -> None:
+        error = None
+        unknown = False
+        try:
+            # The server module holds one session's state at a time.
+            async with turn:
+                await session(message)
+        except asyncio.CancelledError:
+            error = "cancelled"
+        except UnknownSession as e:
+            error, unknown = str(e), True
+        except Exception as e:
+            logger.exception(f"session worker: {message['op']} failed")
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            calls.pop(message["call"], None)
+        await send({"call": message["call"], "error": error, "unknown": unknown})
+
+    turn = asyncio.Lock()
+    sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    calls: Dict[str, asyncio.Task] = {}
+    async for line in reader:
+        message = json.loads(line)
+        if message["op"] == "cancel":
+            task = calls.get(message["call"])
+            if task is not None:
+                task.cancel()
+        else:
+            calls[message["call"]] = asyncio.create_task(run(message))
+    # The API process closed the channel.
+    for task in calls.values():
+        task.cancel()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Research session worker.")
+    parser.add_argument("--fd", type=int, required=True)
+    args = parser.parse_args(argv)
+    # Workers never start a pool of their own.
+    os.environ["SESSION_WORKERS"] = "0"
+    asyncio.run(_serve(args.fd))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Write amplification and reload time of the durable event log.
+
+Runs the backend's event translation (`_run_research_task`) in-process on a
+`MockGraph` stress scenario, once without and once with `EVENT_LOG_DIR`, and
+reports:
+
+- the run's wall time with and without the log,
+- bytes written per file (log, index, every snapshot rewrite) relative to
+  the serialized events, fsyncs and events per group commit,
+- reload: time and peak memory to replay the session with
+  `replay_session` (snapshot plus memory-mapped tail) versus reading and
+  parsing the whole log.
+
+    python -m benchmarks.event_log --scenario "researchers=64 zero_delay=true"
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from loguru import logger
+
+from backend import event_log, server
+from research_workbench.metrics import REGISTRY
+
+
+def _counter_values(prefix: str) -> Dict[str, float]:
+    values = {}
+    for line in REGISTRY.render().splitlines():
+        if line.startswith(prefix):
+            name, value = line.rsplit(" ", 1)
+            values[name] = float(value)
+    return values
+
+
+def _ui_state(events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """The state the frontend reducer (`applyEvent`) builds from `events`."""
+    state: Dict[str, Any] = {}
+    for event in events:
+        kind, payload = event["type"], event.get("payload") or {}
+        if kind == "GRAPH_RESET":
+            state = {"nodes": {}, "edges": set(), "messages": {}, "ids": {}}
+            state.update(active=None, mode="focus")
+        elif kind == "NODE_CREATED":
+            state["nodes"][payload["id"]] = payload.get("kind")
+            state["ids"][payload["id"]] = []
+            state["active"] = state["active"] or payload["id"]
+        elif kind == "EDGE_CREATED":
+            state["edges"].add(
+                payload.get("id") or f"{payload['source']}->{payload['target']}"
+            )
+        elif kind == "MESSAGE_APPENDED":
+            ids = state["ids"].setdefault(payload["nodeId"], [])
+            if payload["id"] not in ids:
+                ids.append(payload["id"])
+            state["messages"][payload["id"]] = dict(payload)
+        elif kind == "MESSAGE_UPDATED":
+            message = state["messages"].get(payload["id"])
+            if message is None:
+                continue
+            content = payload.get("content")
+            if isinstance(content, str):
+                append = payload.get("append", True)
+                message["content"] = message["content"] + content if append else content
+            if payload.get("streaming") is not None:
+                message["streaming"] = payload["streaming"]
+        elif kind in ("TOOL_UPDATED", "TOOL_STATUS_CHANGED"):
+            message = state["messages"].get(payload["messageId"])
+            if message is None or not message.get("toolCall"):
+                continue
+            tool_call = dict(message["toolCall"])
+            for key in ("status", "output", "outputSize", "outputBlobId"):
+                if payload.get(key):
+                    tool_call[key] = payload[key]
+            message["toolCall"] = tool_call
+        elif kind == "ACTIVE_NODE_SET":
+            state["active"] = payload["id"]
+        elif kind == "UI_MODE_SET":
+            state["mode"] = payload["mode"]
+        elif kind == "WORKFLOW_STARTED":
+            state["mode"] = payload.get("mode") or "research"
+    return state
+
+
+async def _run(topic: str) -> float:
+    server.EVENT_BUS.history.clear()
+    start = time.perf_counter()
+    # Also closes the session's log.
+    await server._run_research_task(topic)
+    return time.perf_counter() - start
+
+
+def _measure(replay: Callable[[], Iterable[Any]]) -> Tuple[int, float, float, int]:
+    """Events, seconds, seconds to the first event and peak bytes of a replay."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in replay():
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, first or 0.0, peak
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    topic = f"test_mock {args.scenario}".strip()
+    server.EVENT_LOG_DIR = None
+    await _run(topic)  # warm up imports and caches
+    baseline = await _run(topic)
+
+    directory = args.directory or tempfile.mkdtemp(prefix="event-log-")
+    server.EVENT_LOG_DIR = directory
+    server.EVENT_LOG_FLUSH_MS = args.flush_ms
+    server.EVENT_LOG_SNAPSHOT_EVERY = args.snapshot_every
+    before = _counter_values("research_workbench_event_log_")
+    logged = await _run(topic)
+    after = _counter_values("research_workbench_event_log_")
+    delta = {k: v - before.get(k, 0.0) for k, v in after.items()}
+
+    session = event_log.list_sessions(directory)[0]
+    path = event_log.session_path(directory, session["session"])
+    written = {
+        file: delta.get(f'research_workbench_event_log_bytes_total{{file="{file}"}}', 0)
+        for file in ("log", "index", "snapshot")
+    }
+    payload = written["log"]
+    batches = delta.get("research_workbench_event_log_batch_events_count", 0)
+
+    def full_parse():
+        with open(os.path.join(path, "events.log"), "rb") as f:
+            return [json.loads(line) for line in f.read().splitlines()]
+
+    reset = [{"type": "GRAPH_RESET", "payload": {}}]
+    matches = _ui_state(reset + full_parse()) == _ui_state(
+        reset + [json.loads(line) for line in event_log.replay_session(path)]
+    )
+    replayed = _measure(lambda: event_log.replay_session(path))
+    parsed = _measure(full_parse)
+    return {
+        "scenario": args.scenario,
+        "events": session["events"],
+        "run_s": {"no_log": round(baseline, 3), "event_log": round(logged, 3)},
+        "bytes_written": written,
+        "write_amplification": round(sum(written.values()) / payload, 3),
+        "fsyncs": int(delta.get("research_workbench_event_log_fsyncs_total", 0)),
+        "events_per_batch": round(session["events"] / batches, 1) if batches else 0,
+        "replay_matches_full_log": matches,
+        "reload": {
+            name: {
+                "events": count,
+                "seconds": round(seconds, 4),
+                "first_event_ms": round(first * 1000, 2),
+                "peak_memory_bytes": peak,
+            }
+            for name, (count, seconds, first, peak) in (
+                ("snapshot_replay", replayed),
+                ("full_parse", parsed),
+            )
+        },
+        "directory": directory,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scenario",
+        default="researchers=64 zero_delay=true",
+        help="MockScenario overrides appended to 'test_mock'",
+    )
+    parser.add_argument("--flush-ms", type=float, default=50.0)
+    parser.add_argument("--snapshot-every", type=int, default=5000)
+    parser.add_argument("--directory", help="log directory (default: a temp dir)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+    logger.remove()
+    report = asyncio.run(main_async(args))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Throughput of the local extraction engine on a synthetic page corpus.
+
+Generates `--pages` article-like HTML pages (navigation, sidebars, comments
+and a main article of varying length), serves them from a local aiohttp
+server in `--chunk-bytes` pieces of chunked transfer encoding and extracts
+all of them through `read_url` with `extract_engine=local`, `--concurrency`
+requests in flight. Reports pages per second, per-page latency and how late
+the event loop ran while parsing, for each `--workers` process count (0
+parses in the event loop's default thread pool instead, for comparison):
+
+    python -m benchmarks.extract_throughput --pages 500 --workers 0 2 4
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from research_workbench import readability
+from research_workbench.config import Configuration, ExtractEngine
+from research_workbench.tools import web_extract
+
+_WORDS = (
+    "research model data latency report source system network result value "
+    "analysis market growth energy policy signal method sample study"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 24))]
+    return " ".join(words).capitalize() + ", " + " ".join(words[:4]) + "."
+
+
+def make_page(index: int, rng: random.Random) -> str:
+    paragraphs = "".join(
+        f"<p>{' '.join(_sentence(rng) for _ in range(rng.randint(2, 6)))}</p>"
+        for _ in range(rng.randint(5, 60))
+    )
+    links = "".join(f'<li><a href="/p/{i}">Link {i}</a></li>' for i in range(30))
+    comments = "".join(
+        f'<div class="comment"><p>{_sentence(rng)}</p></div>' for _ in range(10)
+    )
+    return (
+        f"<html><head><title>Page {index}</title><style>body{{}}</style>"
+        f"<script>var x = {index};</script></head><body>"
+        f"<nav><ul>{links}</ul></nav>"
+        f'<div class="sidebar"><ul>{links}</ul></div>'
+        f'<article class="post-content"><h1>Article {index}</h1>{paragraphs}'
+        f"<table><tr><th>Metric</th><th>Value</th></tr>"
+        f"<tr><td>{index}</td><td>{rng.random():.3f}</td></tr></table></article>"
+        f'<section class="comments">{comments}</section>'
+        f"<footer>Copyright</footer></body></html>"
+    )
+
+
+async def _serve(pages: List[str], chunk_bytes: int) -> web.AppRunner:
+    async def page(request: web.Request) -> web.StreamResponse:
+        # Chunked transfer, so pages reach the reader in several reads.
+        body = pages[int(request.match_info["index"])].encode("utf-8")
+        response = web.StreamResponse(headers={"Content-Type": "text/html"})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for start in range(0, len(body), chunk_bytes):
+            await response.write(body[start : start + chunk_bytes])
+            await asyncio.sleep(0)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/page/{index}", page)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+async def _loop_lag(stop: asyncio.Event, samples: List[float], interval=0.01):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+async def run(
+    pages: List[str], workers: int, concurrency: int, chunk_bytes: int
+) -> Dict[str, Any]:
+    runner = await _serve(pages, chunk_bytes)
+    port = runner.addresses[0][1]
+    configuration = Configuration(
+        extract_engine=ExtractEngine.LOCAL, extract_workers=max(workers, 1)
+    )
+    original_pool = web_extract.get_extract_pool
+    if workers == 0:
+        # run_in_executor(None, ...) uses the loop's default thread pool.
+        web_extract.get_extract_pool = lambda _: None
+    else:
+        web_extract._POOL = None
+        pool = web_extract.get_extract_pool(workers)
+        # Start the workers before timing.
+        list(pool.map(readability.extract, ["<p>warm up</p>"] * workers))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    chars = incomplete = 0
+
+    async def one(index: int):
+        nonlocal chars, incomplete
+        async with semaphore:
+            start = time.perf_counter()
+            result = await web_extract.read_url(
+                f"http://127.0.0.1:{port}/page/{index}", None, configuration
+            )
+            latencies.append(time.perf_counter() - start)
+            chars += len(result)
+            # The metrics table closes every article.
+            incomplete += "Metric" not in result
+
+    stop, lag = asyncio.Event(), []
+    lag_task = asyncio.create_task(_loop_lag(stop, lag))
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(len(pages))])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await lag_task
+
+    web_extract.get_extract_pool = original_pool
+    if web_extract._POOL is not None:
+        web_extract._POOL.shutdown()
+        web_extract._POOL = None
+    await runner.cleanup()
+    return {
+        "workers": workers,
+        "pages": len(pages),
+        "pages_per_s": round(len(pages) / elapsed, 1),
+        "latency_ms": {
+            f"p{p}": round(_percentile(latencies, p) * 1000, 1) for p in (50, 99)
+        },
+        "loop_lag_ms": {
+            f"p{p}": round(_percentile(lag, p) * 1000, 1) for p in (50, 99)
+        },
+        "output_chars": chars,
+        # Pages whose extraction stops before the end of the article.
+        "incomplete_pages": incomplete,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    rng = random.Random(args.seed)
+    pages = [make_page(i, rng) for i in range(args.pages)]
+    total = sum(len(p) for p in pages)
+    print(f"corpus: {len(pages)} pages, {total / 1e6:.1f} MB of HTML")
+    rows = []
+    for workers in args.workers:
+        row = await run(pages, workers, args.concurrency, args.chunk_bytes)
+        print(
+            f"workers={workers:<3} {row['pages_per_s']:>8} pages/s  "
+            f"latency p50={row['latency_ms']['p50']}ms "
+            f"p99={row['latency_ms']['p99']}ms  "
+            f"loop lag p99={row['loop_lag_ms']['p99']}ms"
+        )
+        rows.append(row)
+    await web_extract.get_aiohttp_session("page", web_extract.PAGE_TIMEOUT).close()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--chunk-bytes", type=int, default=8192, help="size of each response chunk"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+    rows = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Scripted stand-ins for the chat model and web tools.
+
+`ScriptedChatModel` recognizes which agent is calling it from the system prompt
+and plays a fixed research scenario: the general assistant starts one deep
+research, the planner fans out `fanout` researchers for `rounds` rounds and then
+calls `write_report`, and every researcher runs one search + extract step before
+answering. Provider latency is excluded unless `latency` is set.
+"""
+
+import asyncio
+import uuid
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import BaseTool, tool
+
+import research_workbench.deep_research as deep_research
+import research_workbench.prompts as prompts
+
+
+def _prompt_prefix(template: str) -> str:
+    return template.split("{date}")[0]
+
+
+_ROLE_PREFIXES = {
+    "general_assistant": _prompt_prefix(prompts.GENERAL_ASSISTANT_SYSTEM_PROMPT),
+    "planner": _prompt_prefix(prompts.PLANNER_SYSTEM_PROMPT),
+    "researcher": _prompt_prefix(prompts.RESEARCHER_SYSTEM_PROMPT),
+    "writer": _prompt_prefix(prompts.REPORT_WRITER_SYSTEM_PROMPT),
+}
+
+
+def filler(words: int, seed: str = "") -> str:
+    """Deterministic text payload of roughly `words` words."""
+    base = f"{seed} lorem ipsum dolor sit amet consectetur adipiscing elit".split()
+    return " ".join(base[i % len(base)] for i in range(words))
+
+
+def _tool_call(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "args": args,
+        "id": f"call_{uuid.uuid4().hex[:24]}",
+        "type": "tool_call",
+    }
+
+
+class ScriptedChatModel(BaseChatModel):
+    fanout: int = 4
+    rounds: int = 1
+    words_per_message: int = 200
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _role(self, messages: List[BaseMessage]) -> str:
+        system = messages[0].content if messages else ""
+        for role, prefix in _ROLE_PREFIXES.items():
+            if isinstance(system, str) and system.startswith(prefix):
+                return role
+        return "writer"
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        role = self._role(messages)
+        text = filler(self.words_per_message, role)
+        last = messages[-1]
+        if role == "general_assistant":
+            if last.type == "human":
+                return AIMessage(
+                    content=text,
+                    tool_calls=[_tool_call("start_deep_research", {"query": "q"})],
+                )
+            return AIMessage(content=text)
+        if role == "planner":
+            completed = sum(1 for m in messages if m.type == "ai")
+            if completed < self.rounds:
+                return AIMessage(
+                    content=text,
+                    tool_calls=[
+                        _tool_call(
+                            "start_research",
+                            {"research_proposal": f"round {completed} task {i}"},
+                        )
+                        for i in range(self.fanout)
+                    ],
+                )
+            return AIMessage(content=text, tool_calls=[_tool_call("write_report", {})])
+        if role == "researcher":
+            if last.type == "human":
+                return AIMessage(
+                    content=text,
+                    tool_calls=[
+                        _tool_call("web_search", {"query": last.content}),
+                        _tool_call("web_extract", {"url": "https://example.com/a"}),
+                    ],
+                )
+            return AIMessage(content=f"Findings: {text}")
+        return AIMessage(content=f"# Report\n\n{text}")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+
+def make_fake_tools(words: int = 300) -> Dict[str, BaseTool]:
+    search_result = "".join(
+        f"Title: Result {i}\nURL: https://example.com/{i}\nContent: {filler(40)}\n----\n"
+        for i in range(10)
+    )
+    extract_result = f"Title: Example\nContent: {filler(words)}"
+
+    @tool("web_search")
+    async def fake_web_search(query: str) -> str:
+        """Instant fake search."""
+        return search_result
+
+    @tool("web_search_batch")
+    async def fake_web_search_batch(queries: List[str]) -> str:
+        """Instant fake batched search."""
+        return search_result
+
+    @tool("web_extract")
+    async def fake_web_extract(url: str) -> str:
+        """Instant fake extraction."""
+        return extract_result
+
+    @tool("web_extract_batch")
+    async def fake_web_extract_batch(urls: List[str]) -> str:
+        """Instant fake batched extraction."""
+        return "\n----\n".join(extract_result for _ in urls)
+
+    return {
+        "web_search": fake_web_search,
+        "web_search_batch": fake_web_search_batch,
+        "web_extract": fake_web_extract,
+        "web_extract_batch": fake_web_extract_batch,
+    }
+
+
+def install_fakes(
+    model: ScriptedChatModel, tools: Optional[Dict[str, BaseTool]] = None
+) -> None:
+    """Route the real graph's model and web tools to the fakes."""
+    tools = tools if tools is not None else make_fake_tools()
+    real_get_tool = getattr(
+        deep_research.get_tool, "__wrapped__", deep_research.get_tool
+    )
+
+    def get_tool(name, config):
+        return tools.get(name) or real_get_tool(name, config)
+
+    get_tool.__wrapped__ = real_get_tool
+    deep_research.get_model = lambda *args, **kwargs: model
+    deep_research.get_tool = get_tool
@@ -0,0 +1,273 @@
+"""
+Fault-injecting stand-in for the SearxNG, Tavily and Jina reader backends.
+
+Serves SearxNG's JSON API at `/search`, Tavily's search API at
+`POST /tavily/search` and a Jina-reader-style endpoint at `/reader/<url>`,
+failing a configurable share of requests with an error
+status, adding latency, and optionally failing everything during an outage
+window. By default it then drives `--calls` searches and extractions through
+the real retry/circuit-breaker layer (`research_workbench.resilience`) and
+reports how many succeeded, failed or were rejected by an open breaker:
+
+    python -m benchmarks.faults --error-rate 0.3 --outage 2:6 --calls 400
+
+With `--serve` it only runs the server, for pointing a real backend at it:
+
+    SEARCH_ENGINE=searx SEARX_HOST=http://127.0.0.1:8090/search \\
+    TAVILY_API_URL=http://127.0.0.1:8090/tavily \\
+    JINA_READER_URL=http://127.0.0.1:8090/reader/ ...
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from research_workbench.config import Configuration, SearchEngine
+from research_workbench.metrics import REGISTRY
+from research_workbench.resilience import (
+    _BREAKERS,
+    ProviderUnavailable,
+    call_provider,
+)
+
+
+@dataclass
+class FaultPlan:
+    error_rate: float = 0.0
+    error_status: int = 503
+    latency: float = 0.0
+    # Seconds after server start during which every request fails.
+    outage: Optional[Tuple[float, float]] = None
+
+
+class FaultServer:
+    def __init__(self, plan: FaultPlan, port: int = 0):
+        self.plan = plan
+        self.port = port
+        self.started = 0.0
+        self.requests = 0
+        self.injected = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _fault(self) -> Optional[web.Response]:
+        self.requests += 1
+        if self.plan.latency:
+            await asyncio.sleep(self.plan.latency)
+        elapsed = time.monotonic() - self.started
+        outage = self.plan.outage
+        if (outage and outage[0] <= elapsed < outage[1]) or (
+            random.random() < self.plan.error_rate
+        ):
+            self.injected += 1
+            return web.Response(status=self.plan.error_status, text="injected fault")
+        return None
+
+    @staticmethod
+    def _results(query: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                "title": f"{query} result {i}",
+                "url": f"https://example.com/{i}",
+                "content": f"Snippet {i} about {query}.",
+                "score": 1.0 - i / 10,
+            }
+            for i in range(10)
+        ]
+
+    async def search(self, request: web.Request) -> web.Response:
+        fault = await self._fault()
+        if fault is not None:
+            return fault
+        query = request.query.get("q", "")
+        return web.json_response({"query": query, "results": self._results(query)})
+
+    async def tavily(self, request: web.Request) -> web.Response:
+        fault = await self._fault()
+        if fault is not None:
+            return fault
+        query = (await request.json()).get("query", "")
+        return web.json_response({"query": query, "results": self._results(query)})
+
+    async def reader(self, request: web.Request) -> web.Response:
+        fault = await self._fault()
+        if fault is not None:
+            return fault
+        url = request.match_info["url"]
+        return web.json_response(
+            {"data": {"title": f"Page {url}", "content": f"Content of {url}. " * 50}}
+        )
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/search", self.search)
+        app.router.add_post("/tavily/search", self.tavily)
+        app.router.add_get("/reader/{url:.*}", self.reader)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        self.started = time.monotonic()
+        return f"http://127.0.0.1:{self.port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # Imported late so the server alone needs no tool dependencies.
+    from research_workbench.tools.web_extract import get_jina_session, jina_reader
+    from research_workbench.tools.web_search import (
+        SearchQuery,
+        _engine_results,
+        get_searx_session,
+    )
+
+    server = FaultServer(_plan(args))
+    base_url = await server.start()
+    configuration = Configuration(
+        search_engine=SearchEngine.SEARX,
+        searx_host=f"{base_url}/search",
+        jina_reader_url=f"{base_url}/reader/",
+        retry_attempts=args.retry_attempts,
+        retry_base_delay=args.retry_base_delay,
+        breaker_failure_threshold=args.breaker_threshold,
+        breaker_reset_timeout=args.breaker_reset,
+    )
+    session = get_jina_session()
+
+    async def search(i: int):
+        return await _engine_results(
+            SearchEngine.SEARX, configuration, SearchQuery(query=f"query {i}")
+        )
+
+    async def extract(i: int):
+        return await call_provider(
+            "jina",
+            lambda: asyncio.to_thread(
+                jina_reader, f"https://example.com/{i}", session, base_url + "/reader/"
+            ),
+            configuration,
+        )
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    outcomes: Dict[str, Dict[str, int]] = {}
+    latencies: Dict[str, List[float]] = {}
+
+    async def one(kind: str, call, i: int):
+        async with semaphore:
+            # Spread the calls over --duration seconds.
+            await asyncio.sleep(random.uniform(0, args.duration))
+            start = time.perf_counter()
+            try:
+                await call(i)
+                outcome = "ok"
+            except ProviderUnavailable:
+                outcome = "rejected"
+            except Exception:
+                outcome = "failed"
+            counts = outcomes.setdefault(kind, {"ok": 0, "failed": 0, "rejected": 0})
+            counts[outcome] += 1
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+
+    await asyncio.gather(
+        *[one("search", search, i) for i in range(args.calls)],
+        *[one("extract", extract, i) for i in range(args.calls)],
+    )
+    await get_searx_session().close()
+    await server.stop()
+
+    metrics = [
+        line
+        for line in REGISTRY.render().splitlines()
+        if line.startswith(
+            (
+                "research_workbench_provider_calls_total",
+                "research_workbench_circuit_breaker_state",
+            )
+        )
+    ]
+    return {
+        "server": {"requests": server.requests, "injected_faults": server.injected},
+        "outcomes": outcomes,
+        "latency_ms": {
+            kind: {
+                f"p{p}": round(_percentile(values, p) * 1000, 1) for p in (50, 90, 99)
+            }
+            for kind, values in latencies.items()
+        },
+        "breakers": {b.provider: b.state for b in _BREAKERS.values()},
+        "metrics": metrics,
+    }
+
+
+def _plan(args: argparse.Namespace) -> FaultPlan:
+    outage = None
+    if args.outage:
+        start, end = args.outage.split(":")
+        outage = (float(start), float(end))
+    return FaultPlan(
+        error_rate=args.error_rate,
+        error_status=args.status,
+        latency=args.latency_ms / 1000,
+        outage=outage,
+    )
+
+
+async def serve(args: argparse.Namespace) -> None:
+    server = FaultServer(_plan(args), port=args.port)
+    base_url = await server.start()
+    print(
+        f"SEARX_HOST={base_url}/search TAVILY_API_URL={base_url}/tavily "
+        f"JINA_READER_URL={base_url}/reader/"
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--serve", action="store_true", help="only run the server")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--status", type=int, default=503)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--outage", help="START:END seconds of total failure")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--retry-attempts", type=int, default=3)
+    parser.add_argument("--retry-base-delay", type=float, default=0.1)
+    parser.add_argument("--breaker-threshold", type=int, default=5)
+    parser.add_argument("--breaker-reset", type=float, default=2.0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve(args))
+        return
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Graph-overhead microbenchmarks.
+
+Drives the real `get_graph()` with `ScriptedChatModel` and instant fake
+search/extract tools, so every measured second is framework overhead:
+LangGraph supersteps, nested ReAct researcher agents, the checkpointer and
+`astream_events` translation. Two sweeps are run:
+
+- fan-out: parallel `start_research` calls per planner round (1 -> 64)
+- rounds: planner rounds with a fixed fan-out
+
+Each point is measured with `ainvoke` (with and without checkpointer) and with
+`astream_events`, plus a tracemalloc pass for peak and retained memory.
+
+    python -m benchmarks.graph_overhead --output results.json
+    python -m benchmarks.graph_overhead --compare before.json after.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from importlib.metadata import version
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage
+from loguru import logger
+
+from benchmarks.fakes import ScriptedChatModel, install_fakes
+from research_workbench.deep_research import get_graph
+
+FANOUTS = [1, 2, 4, 8, 16, 32, 64]
+ROUNDS = [1, 2, 4, 8]
+ROUNDS_FANOUT = 4
+
+# Metrics compared by --compare; all are "lower is better".
+COMPARED_METRICS = [
+    "invoke_s",
+    "invoke_no_checkpointer_s",
+    "astream_events_s",
+    "per_step_us",
+    "peak_memory_bytes",
+]
+
+
+def _expected_steps(fanout: int, rounds: int) -> Dict[str, int]:
+    researchers = fanout * rounds
+    return {
+        # GA twice, planner once per round plus the write_report turn,
+        # two turns per researcher, one writer call.
+        "model_calls": 2 + (rounds + 1) + 2 * researchers + 1,
+        # start_deep_research, start_research + search + extract per
+        # researcher, write_report.
+        "tool_calls": 1 + 3 * researchers + 1,
+    }
+
+
+async def _run(graph, events: bool) -> int:
+    config = {
+        "configurable": {"thread_id": str(uuid.uuid4())},
+        "recursion_limit": 10_000,
+    }
+    inputs = {"general_assistant_messages": [HumanMessage(content="benchmark")]}
+    if not events:
+        await graph.ainvoke(inputs, config=config)
+        return 0
+    count = 0
+    async for _ in graph.astream_events(inputs, config=config, version="v2"):
+        count += 1
+    return count
+
+
+async def _timed(make_graph, events: bool, repeats: int) -> Dict[str, float]:
+    durations, event_count = [], 0
+    for _ in range(repeats):
+        graph = make_graph()
+        gc.collect()
+        start = time.perf_counter()
+        event_count = await _run(graph, events)
+        durations.append(time.perf_counter() - start)
+    return {"seconds": statistics.median(durations), "events": event_count}
+
+
+async def _memory(make_graph) -> Dict[str, int]:
+    graph = make_graph()
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    await _run(graph, events=False)
+    gc.collect()
+    # Retained memory is what the checkpointer still holds for the thread.
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"peak": peak - baseline, "retained": current - baseline}
+
+
+async def measure(
+    scenario: str, fanout: int, rounds: int, repeats: int, words: int
+) -> Dict[str, Any]:
+    install_fakes(
+        ScriptedChatModel(fanout=fanout, rounds=rounds, words_per_message=words)
+    )
+    steps = _expected_steps(fanout, rounds)
+
+    invoke = await _timed(get_graph, events=False, repeats=repeats)
+    no_checkpointer = await _timed(
+        lambda: get_graph(checkpointer=False), events=False, repeats=repeats
+    )
+    streamed = await _timed(get_graph, events=True, repeats=repeats)
+    memory = await _memory(get_graph)
+
+    total_steps = steps["model_calls"] + steps["tool_calls"]
+    result = {
+        "scenario": scenario,
+        "fanout": fanout,
+        "rounds": rounds,
+        **steps,
+        "invoke_s": invoke["seconds"],
+        "invoke_no_checkpointer_s": no_checkpointer["seconds"],
+        "astream_events_s": streamed["seconds"],
+        "events": streamed["events"],
+        "per_step_us": 1e6 * invoke["seconds"] / total_steps,
+        "checkpointer_overhead_pct": 100
+        * (invoke["seconds"] - no_checkpointer["seconds"])
+        / no_checkpointer["seconds"],
+        "astream_events_overhead_pct": 100
+        * (streamed["seconds"] - invoke["seconds"])
+        / invoke["seconds"],
+        "peak_memory_bytes": memory["peak"],
+        "retained_memory_bytes": memory["retained"],
+    }
+    print(
+        f"{scenario:8s} fanout={fanout:<3d} rounds={rounds:<2d} "
+        f"invoke={result['invoke_s'] * 1000:8.1f}ms "
+        f"per_step={result['per_step_us']:7.0f}us "
+        f"ckpt={result['checkpointer_overhead_pct']:+6.1f}% "
+        f"events={result['astream_events_overhead_pct']:+6.1f}% "
+        f"peak={result['peak_memory_bytes'] / 1e6:6.1f}MB",
+        file=sys.stderr,
+    )
+    return result
+
+
+def _metadata(repeats: int, words: int) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "langgraph": version("langgraph"),
+        "langchain_core": version("langchain-core"),
+        "repeats": repeats,
+        "words_per_message": words,
+    }
+
+
+async def run_suite(
+    fanouts: List[int], rounds: List[int], repeats: int, words: int
+) -> Dict[str, Any]:
+    results = []
+    for fanout in fanouts:
+        results.append(await measure("fanout", fanout, 1, repeats, words))
+    for n in rounds:
+        results.append(await measure("rounds", ROUNDS_FANOUT, n, repeats, words))
+    return {"meta": _metadata(repeats, words), "results": results}
+
+
+def compare(before_path: str, after_path: str, threshold_pct: float) -> int:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    def key(row):
+        return (row["scenario"], row["fanout"], row["rounds"])
+
+    baseline = {key(row): row for row in before["results"]}
+    regressions = 0
+    print(
+        f"{before['meta'].get('commit')} -> {after['meta'].get('commit')} "
+        f"(regression threshold {threshold_pct:.0f}%)"
+    )
+    for row in after["results"]:
+        old = baseline.get(key(row))
+        if old is None:
+            continue
+        cells = []
+        for metric in COMPARED_METRICS:
+            if not old.get(metric):
+                continue
+            delta = 100 * (row[metric] - old[metric]) / old[metric]
+            flag = " !" if delta > threshold_pct else ""
+            regressions += bool(flag)
+            cells.append(f"{metric}={delta:+6.1f}%{flag}")
+        print(
+            f"{row['scenario']:8s} fanout={row['fanout']:<3d} rounds={row['rounds']:<2d} "
+            + " ".join(cells)
+        )
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.graph_overhead")
+    parser.add_argument("--output", help="write JSON results here (default stdout)")
+    parser.add_argument("--fanouts", type=int, nargs="+", default=FANOUTS)
+    parser.add_argument("--rounds", type=int, nargs="+", default=ROUNDS)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--words", type=int, default=200, help="words per scripted model message"
+    )
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BEFORE", "AFTER"),
+        help="compare two result files instead of running",
+    )
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        sys.exit(compare(*args.compare, threshold_pct=args.threshold))
+
+    # Keep debug logging out of the measurement.
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    report = asyncio.run(run_suite(args.fanouts, args.rounds, args.repeats, args.words))
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+SSE fan-out stress harness for the FastAPI backend.
+
+Starts the real app under uvicorn in a subprocess, connects `--subscribers`
+SSE clients to `/api/events`, then launches `--sessions` concurrent mock
+research runs (`test_mock` plus `MockScenario` overrides) through
+`/api/research`. While the runs stream it samples the server's CPU time and
+resident memory from /proc (Linux), and every client records the delay
+between each event's emit timestamp and its arrival.
+
+With `--workers N` (N > 1) it also starts the stand-in event broker
+(`backend.event_bus`) and N servers sharing it through `EVENT_BUS_URL`.
+Subscribers and runs are spread round-robin over the servers, so most
+clients see runs from servers other than their own.
+
+    python -m benchmarks.sse_load --subscribers 200 --sessions 4 \\
+        --scenario "researchers=16 zero_delay=true" --output sse.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ProcessSampler:
+    """
+    Samples CPU time and RSS of a process and its children (session worker
+    processes) from /proc.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.rss_samples: List[int] = []
+        self.cpu_start: Optional[float] = None
+        self.cpu_end: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _pids(self) -> List[int]:
+        try:
+            with open(f"/proc/{self.pid}/task/{self.pid}/children") as f:
+                return [self.pid] + [int(pid) for pid in f.read().split()]
+        except OSError:
+            return [self.pid]
+
+    def _cpu_seconds(self) -> float:
+        total = 0
+        for pid in self._pids():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    # Fields after the parenthesized command name; utime/stime
+                    # are 14/15.
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            total += int(fields[11]) + int(fields[12])
+        return total / self.ticks
+
+    def _rss_bytes(self) -> int:
+        total = 0
+        for pid in self._pids():
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            total += int(line.split()[1]) * 1024
+            except OSError:
+                continue
+        return total
+
+    async def _run(self):
+        while True:
+            self.rss_samples.append(self._rss_bytes())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.cpu_start = self._cpu_seconds()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.cpu_end = self._cpu_seconds()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    @property
+    def cpu_seconds(self) -> float:
+        return (self.cpu_end or 0.0) - (self.cpu_start or 0.0)
+
+
+def _start_server(port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "backend.server:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+
+
+class Subscriber:
+    def __init__(self, index: int):
+        self.index = index
+        self.latencies_ms: List[float] = []
+        self.events = 0
+        self.bytes = 0
+        self.completed = 0
+        self.connected = asyncio.Event()
+
+    async def run(self, client: httpx.AsyncClient, url: str, not_before_ms: float):
+        async with client.stream("GET", url) as response:
+            self.connected.set()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                received_ms = time.time() * 1000
+                event = json.loads(line[5:])
+                emitted_ms = event.get("timestamp") or 0
+                # Skip history replayed on connect from before the run started.
+                if emitted_ms < not_before_ms:
+                    continue
+                self.events += 1
+                self.bytes += len(line)
+                self.latencies_ms.append(received_ms - emitted_ms)
+                if event.get("type") == "WORKFLOW_COMPLETED":
+                    self.completed += 1
+
+
+async def _wait_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"server at {base_url} did not become ready")
+
+
+async def run_load(
+    subscribers: int,
+    sessions: int,
+    scenario: str,
+    session_stagger: float,
+    timeout: float,
+    workers: int = 1,
+) -> Dict[str, Any]:
+    env = {**os.environ, "LOGURU_LEVEL": os.environ.get("LOGURU_LEVEL", "WARNING")}
+    processes = []
+    if workers > 1:
+        broker_port = _free_port()
+        processes.append(
+            subprocess.Popen(
+                [sys.executable, "-m", "backend.event_bus", "--port", str(broker_port)],
+                env=env,
+            )
+        )
+        env["EVENT_BUS_URL"] = f"tcp://127.0.0.1:{broker_port}"
+    base_urls = []
+    servers = []
+    for _ in range(workers):
+        port = _free_port()
+        servers.append(_start_server(port, env))
+        base_urls.append(f"http://127.0.0.1:{port}")
+    processes.extend(servers)
+    try:
+        for base_url in base_urls:
+            await _wait_ready(base_url)
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        timeouts = httpx.Timeout(timeout, read=None)
+        async with httpx.AsyncClient(limits=limits, timeout=timeouts) as client:
+            not_before_ms = time.time() * 1000
+            clients = [Subscriber(i) for i in range(subscribers)]
+            tasks = [
+                asyncio.create_task(
+                    s.run(
+                        client,
+                        f"{base_urls[s.index % workers]}/api/events",
+                        not_before_ms,
+                    )
+                )
+                for s in clients
+            ]
+            await asyncio.gather(*(s.connected.wait() for s in clients))
+
+            samplers = [ProcessSampler(server.pid) for server in servers]
+            for sampler in samplers:
+                sampler.start()
+            start = time.perf_counter()
+            for session in range(sessions):
+                response = await client.post(
+                    f"{base_urls[session % workers]}/api/research",
+                    json={"topic": f"test_mock {scenario}".strip()},
+                )
+                response.raise_for_status()
+                if session_stagger:
+                    await asyncio.sleep(session_stagger)
+
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                if all(s.completed >= sessions for s in clients):
+                    break
+                await asyncio.sleep(0.05)
+            elapsed = time.perf_counter() - start
+            for sampler in samplers:
+                await sampler.stop()
+
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            metrics_text = (await client.get(f"{base_urls[0]}/metrics")).text
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    latencies = [v for s in clients for v in s.latencies_ms]
+    delivered = sum(s.events for s in clients)
+    per_subscriber = [s.events for s in clients]
+    cpu_seconds = sum(sampler.cpu_seconds for sampler in samplers)
+    # RSS summed over the servers, sample by sample.
+    rss_samples = [sum(rss) for rss in zip(*(s.rss_samples for s in samplers))]
+    return {
+        "workers": workers,
+        "subscribers": subscribers,
+        "sessions": sessions,
+        "scenario": scenario,
+        "completed_subscribers": sum(s.completed >= sessions for s in clients),
+        "elapsed_s": elapsed,
+        "events_per_subscriber": statistics.median(per_subscriber),
+        "events_emitted_per_s": statistics.median(per_subscriber) / elapsed,
+        "events_delivered_per_s": delivered / elapsed,
+        "bytes_delivered": sum(s.bytes for s in clients),
+        "latency_ms": {
+            "p50": _percentile(latencies, 50),
+            "p90": _percentile(latencies, 90),
+            "p99": _percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+        },
+        "server_cpu_s": cpu_seconds,
+        "server_cpu_pct": 100 * cpu_seconds / elapsed,
+        "server_rss_peak_bytes": max(rss_samples, default=0),
+        "server_rss_final_bytes": (rss_samples or [0])[-1],
+        "server_metrics": [
+            line
+            for line in metrics_text.splitlines()
+            if line.startswith(
+                (
+                    "research_workbench_sse_queue_depth_",
+                    "research_workbench_event_loop_",
+                )
+            )
+            and "_bucket" not in line
+        ],
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.sse_load")
+    parser.add_argument("--subscribers", type=int, default=100)
+    parser.add_argument("--sessions", type=int, default=1)
+    parser.add_argument(
+        "--scenario",
+        default="zero_delay=true",
+        help="MockScenario overrides appended to 'test_mock'",
+    )
+    parser.add_argument(
+        "--session-stagger", type=float, default=0.0, help="seconds between starts"
+    )
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="servers sharing an event broker"
+    )
+    parser.add_argument("--output", help="write JSON results here (default stdout)")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(
+        run_load(
+            args.subscribers,
+            args.sessions,
+            args.scenario,
+            args.session_stagger,
+            args.timeout,
+            args.workers,
+        )
+    )
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
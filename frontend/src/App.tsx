@@ -1,4 +1,4 @@
-// import { useEffect, useState } from 'react';
+import { useEffect } from 'react';
 import { AnimatePresence } from 'framer-motion';
 import { useStore } from '@/state/store';
 import { FocusView } from '@/components/views/FocusView';
@@ -7,6 +7,17 @@ import { ResearchView } from '@/components/views/ResearchView';
 function App() {
   const uiMode = useStore((state) => state.uiMode);
   const startResearch = useStore((state) => state.startResearch);
+  const loadSession = useStore((state) => state.loadSession);
+  const queuePosition = useStore((state) =>
+    state.submittedJobId ? state.queuedJobs[state.submittedJobId] : undefined
+  );
+  const busyRetryAfter = useStore((state) => state.busyRetryAfter);
+
+  // ?session=<id> replays a recorded session from the server's event log.
+  useEffect(() => {
+    const sessionId = new URLSearchParams(window.location.search).get('session');
+    if (sessionId) loadSession(sessionId);
+  }, [loadSession]);
 
   return (
     <div className="h-screen w-screen bg-background text-foreground overflow-hidden relative font-sans">
@@ -18,6 +29,14 @@ function App() {
         )}
       </AnimatePresence>
 
+      {(queuePosition || busyRetryAfter) && (
+        <div className="absolute top-4 left-1/2 -translate-x-1/2 z-50 bg-muted text-foreground text-xs px-3 py-1.5 rounded shadow">
+          {queuePosition
+            ? `Waiting for a free research slot (position ${queuePosition})`
+            : `The server is busy, try again in ${busyRetryAfter}s`}
+        </div>
+      )}
+
       {/* Debug / Dev Controls */}
       <div className="absolute bottom-4 right-4 z-50 flex gap-2">
         <button
@@ -1,4 +1,6 @@
+import { useEffect, useState } from 'react';
 import { Modal } from '@/components/ui/Modal';
+import { fetchBlob } from '@/services/blobs';
 import type { ToolCallPayload } from '@/types/graph';
 
 interface ToolCallDetailsPanelProps {
@@ -8,6 +10,32 @@ interface ToolCallDetailsPanelProps {
 }
 
 export function ToolCallDetailsPanel({ isOpen, onClose, toolCall }: ToolCallDetailsPanelProps) {
+    const { outputBlobId, outputSize } = toolCall;
+    const [fullOutput, setFullOutput] = useState<string | null>(null);
+    const [blobError, setBlobError] = useState<string | null>(null);
+
+    // A different tool call (or output) must not show the previous full output.
+    useEffect(() => {
+        setFullOutput(null);
+        setBlobError(null);
+    }, [outputBlobId]);
+
+    // Large outputs only carry a preview; load the rest when the panel opens.
+    useEffect(() => {
+        if (!isOpen || !outputBlobId) return;
+        let cancelled = false;
+        setBlobError(null);
+        fetchBlob(outputBlobId)
+            .then((text) => !cancelled && setFullOutput(text))
+            .catch((err) => !cancelled && setBlobError(String(err)));
+        return () => {
+            cancelled = true;
+        };
+    }, [isOpen, outputBlobId]);
+
+    const output = outputBlobId && fullOutput !== null ? fullOutput : toolCall.output;
+    const isPreview = Boolean(outputBlobId) && fullOutput === null;
+
     const formatJson = (data: any) => {
         try {
             return typeof data === 'string' ? data : JSON.stringify(data, null, 2);
@@ -35,11 +63,18 @@ export function ToolCallDetailsPanel({ isOpen, onClose, toolCall }: ToolCallDeta
 
                 <div>
                     <h4 className="text-sm font-medium mb-1">Output</h4>
-                    {toolCall.output ? (
+                    {output ? (
                         <div className="text-xs rounded border bg-muted/30 p-2 overflow-x-auto">
                             <pre className="font-mono whitespace-pre-wrap break-all">
-                                {formatJson(toolCall.output)}
+                                {formatJson(output)}
                             </pre>
+                            {isPreview && (
+                                <p className="mt-2 text-muted-foreground italic">
+                                    {blobError
+                                        ? `Could not load the full output: ${blobError}`
+                                        : `Loading full output (${Math.ceil((outputSize ?? 0) / 1024)} KB)...`}
+                                </p>
+                            )}
                         </div>
                     ) : (
                         <p className="text-xs text-muted-foreground italic">No output yet...</p>
@@ -0,0 +1,18 @@
+import { BACKEND_API } from '@/state/store';
+
+// Blobs are content-addressed and never change, so one fetch per id is enough.
+const cache = new Map<string, Promise<string>>();
+
+export function fetchBlob(blobId: string): Promise<string> {
+    let pending = cache.get(blobId);
+    if (!pending) {
+        pending = fetch(`${BACKEND_API}/api/blobs/${blobId}`).then((res) => {
+            if (!res.ok) throw new Error(`Failed to load blob ${blobId}: ${res.status}`);
+            return res.text();
+        });
+        // Let a failed fetch be retried the next time the tool call is opened.
+        pending.catch(() => cache.delete(blobId));
+        cache.set(blobId, pending);
+    }
+    return pending;
+}
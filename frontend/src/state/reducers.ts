@@ -9,6 +9,11 @@ export type AppState = {
     activeNodeId: string | null;
     selectedNodeId: string | null;
     uiMode: 'focus' | 'research';
+    // Queue position of each waiting job
+    queuedJobs: Record<string, number>;
+    // Last job this client submitted, and the server's Retry-After if it was turned away
+    submittedJobId: string | null;
+    busyRetryAfter: number | null;
 };
 
 export const initialState: AppState = {
@@ -19,12 +24,21 @@ export const initialState: AppState = {
     activeNodeId: null,
     selectedNodeId: null,
     uiMode: 'focus',
+    queuedJobs: {},
+    submittedJobId: null,
+    busyRetryAfter: null,
 };
 
 export function applyEvent(state: AppState, event: ServerEvent): Partial<AppState> {
     switch (event.type) {
         case 'GRAPH_RESET':
-            return initialState;
+            // A run starting resets the graph, not the job queue.
+            return {
+                ...initialState,
+                queuedJobs: state.queuedJobs,
+                submittedJobId: state.submittedJobId,
+                busyRetryAfter: state.busyRetryAfter,
+            };
 
         case 'NODE_CREATED': {
             const { id, kind, title } = event.payload;
@@ -116,7 +130,7 @@ export function applyEvent(state: AppState, event: ServerEvent): Partial<AppStat
         }
 
         case 'TOOL_UPDATED': {
-            const { messageId, status, output } = event.payload;
+            const { messageId, status, output, outputSize, outputBlobId } = event.payload;
             const existingMsg = state.messages[messageId];
             if (!existingMsg || existingMsg.kind !== 'tool' || !existingMsg.toolCall) return {};
 
@@ -129,6 +143,7 @@ export function applyEvent(state: AppState, event: ServerEvent): Partial<AppStat
                             ...existingMsg.toolCall,
                             ...(status ? { status } : {}),
                             ...(output ? { output } : {}),
+                            ...(outputBlobId ? { outputSize, outputBlobId } : {}),
                         },
                     },
                 },
@@ -171,6 +186,16 @@ export function applyEvent(state: AppState, event: ServerEvent): Partial<AppStat
             return {};
         }
 
+        case 'JOB_UPDATED': {
+            const { id, status, position } = event.payload;
+            const queuedJobs = { ...state.queuedJobs };
+            delete queuedJobs[id];
+            if (status === 'queued' && position) {
+                queuedJobs[id] = position;
+            }
+            return { queuedJobs };
+        }
+
         default:
             return {};
     }
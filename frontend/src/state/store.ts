@@ -4,7 +4,7 @@ import { type AppState, initialState, applyEvent } from './reducers';
 import type { ServerEvent } from '@/types/events';
 import { SseClient } from '@/services/events/SseClient';
 
-const BACKEND_API = 'http://localhost:8000';
+export const BACKEND_API = 'http://localhost:8000';
 
 type StoreActions = {
     processEvent: (event: ServerEvent) => void;
@@ -16,11 +16,13 @@ type StoreActions = {
     connect: (url: string) => void;
     startResearch: (topic: string) => Promise<void>;
     sendMessage: (content: string) => Promise<void>;
+    loadSession: (sessionId: string) => Promise<void>;
 };
 
 // Singleton client - simple approach for now
 let sseClient: SseClient | null = null;
 let sseUrl: string | null = null;
+let sessionLoad: AbortController | null = null;
 
 export const useStore = create<AppState & StoreActions>()(
     devtools((set, get) => ({
@@ -72,9 +74,16 @@ export const useStore = create<AppState & StoreActions>()(
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({ topic }),
                 });
+                if (res.status === 429) {
+                    const { retryAfter } = await res.json();
+                    set({ busyRetryAfter: retryAfter ?? null });
+                    return;
+                }
                 if (!res.ok) {
                     throw new Error('Failed to start research');
                 }
+                const { jobId } = await res.json();
+                set({ submittedJobId: jobId ?? null, busyRetryAfter: null });
             } catch (error) {
                 console.error('Failed to start research:', error);
             }
@@ -91,18 +100,56 @@ export const useStore = create<AppState & StoreActions>()(
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({ message }),
                 });
-                let payload: { status?: string } | null = null;
+                let payload: { status?: string; jobId?: string; retryAfter?: number } | null = null;
                 try {
                     payload = await res.json();
                 } catch {
                     payload = null;
                 }
+                if (res.status === 429) {
+                    set({ busyRetryAfter: payload?.retryAfter ?? null });
+                    return;
+                }
                 if (!res.ok || payload?.status === 'error') {
                     await get().startResearch(message);
+                    return;
                 }
+                set({ submittedJobId: payload?.jobId ?? null, busyRetryAfter: null });
             } catch (error) {
                 console.error('Failed to send message:', error);
             }
         },
+
+        loadSession: async (sessionId: string) => {
+            // A recorded session replaces the live stream.
+            sseClient?.disconnect();
+            sessionLoad?.abort();
+            const controller = new AbortController();
+            sessionLoad = controller;
+            try {
+                const res = await fetch(`${BACKEND_API}/api/sessions/${sessionId}/events`, {
+                    signal: controller.signal,
+                });
+                if (!res.ok || !res.body) {
+                    throw new Error(`Failed to load session ${sessionId}: ${res.status}`);
+                }
+                // Newline-delimited JSON, applied as it streams in.
+                const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+                let buffered = '';
+                for (;;) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    const lines = (buffered + value).split('\n');
+                    buffered = lines.pop() ?? '';
+                    for (const line of lines) {
+                        if (line) get().processEvent(JSON.parse(line) as ServerEvent);
+                    }
+                }
+            } catch (error) {
+                if (!controller.signal.aborted) {
+                    console.error('Failed to load session:', error);
+                }
+            }
+        },
     }))
 );
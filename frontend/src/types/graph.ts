@@ -21,6 +21,10 @@ export type ToolCallPayload = {
     toolName: string;
     input: any;
     output?: any; // streaming updates go here
+    // Large outputs arrive as a preview in `output`; the full text is fetched
+    // from /api/blobs/{outputBlobId} when the tool call is opened.
+    outputSize?: number;
+    outputBlobId?: string;
     status: ToolStatus;
     timestamp: number;
 };
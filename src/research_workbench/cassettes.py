@@ -0,0 +1,286 @@
+"""
+Record/replay cassettes for chat model and web tool I/O.
+
+With `CASSETTE_MODE=record` every chat model request/response and every
+`web_search`/`web_extract` call is appended to the JSONL file at
+`CASSETTE_PATH`. With `CASSETTE_MODE=replay` the same calls are served from
+that file, so the full `get_graph()` pipeline runs offline and
+deterministically. Replay is as fast as possible unless `CASSETTE_REALTIME=1`,
+which sleeps for the recorded latency of each call.
+
+Requests are matched on a canonical form of their content (message types,
+text, tool calls and bound tool schemas), ignoring the random message ids
+assigned at runtime. Identical requests are served in recorded order. The
+prompt date is pinned to the recording date in replay mode.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    AsyncCallbackManagerForToolRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from loguru import logger
+
+from research_workbench.config import CassetteMode, Configuration
+from research_workbench.wrappers import (
+    WrappedChatModel,
+    WrappedTool,
+    cached_wrapper,
+    to_chunk,
+)
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _canonical_message(message: BaseMessage) -> Dict[str, Any]:
+    canonical: Dict[str, Any] = {"type": message.type, "content": message.content}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        canonical["tool_calls"] = [
+            {"name": tc["name"], "args": tc["args"], "id": tc.get("id")}
+            for tc in tool_calls
+        ]
+    if message.type == "tool":
+        canonical["tool_call_id"] = message.tool_call_id
+        canonical["name"] = message.name
+    return canonical
+
+
+def _request_key(kind: str, name: str, request: Any) -> str:
+    payload = json.dumps([kind, name, request], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """An append-only JSONL file of recorded calls."""
+
+    def __init__(self, path: str, mode: CassetteMode, realtime: bool = False):
+        self.path = path
+        self.mode = mode
+        self.realtime = realtime
+        self.recorded_date: Optional[str] = None
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._cursors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+        if mode == CassetteMode.RECORD:
+            # Recording always starts a fresh cassette so its date stays consistent.
+            self.recorded_date = datetime.now().strftime("%Y-%m-%d")
+            with open(path, "w", encoding="utf-8") as f:
+                header = {"kind": "header", "date": self.recorded_date}
+                f.write(json.dumps(header) + "\n")
+        elif mode == CassetteMode.REPLAY:
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry["kind"] == "header":
+                    self.recorded_date = entry.get("date")
+                else:
+                    self._entries[entry["key"]].append(entry)
+        logger.info(
+            "cassette: loaded {} recorded calls from {}",
+            sum(len(v) for v in self._entries.values()),
+            self.path,
+        )
+
+    def record(
+        self, kind: str, name: str, request: Any, response: Any, latency: float
+    ) -> None:
+        entry = {
+            "kind": kind,
+            "name": name,
+            "key": _request_key(kind, name, request),
+            "request": request,
+            "response": response,
+            "latency": latency,
+        }
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def lookup(self, kind: str, name: str, request: Any) -> Tuple[Any, float]:
+        key = _request_key(kind, name, request)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(
+                    f"No recorded {kind} call '{name}' matches this request "
+                    f"(key {key[:12]}) in {self.path}"
+                )
+            # Repeated identical requests replay in recorded order; the last
+            # recording is reused once they are exhausted.
+            index = min(self._cursors[key], len(entries) - 1)
+            self._cursors[key] += 1
+        entry = entries[index]
+        return entry["response"], entry["latency"]
+
+    async def wait(self, latency: float) -> None:
+        if self.realtime and latency > 0:
+            await asyncio.sleep(latency)
+
+
+_CASSETTES: Dict[Tuple[str, CassetteMode, bool], Cassette] = {}
+_CASSETTES_LOCK = threading.Lock()
+
+
+def get_cassette(configuration: Configuration) -> Optional[Cassette]:
+    """Return the process-wide cassette for this configuration, if enabled."""
+    if configuration.cassette_mode == CassetteMode.OFF:
+        return None
+    if not configuration.cassette_path:
+        raise ValueError("cassette_path is required when cassette_mode is enabled")
+    key = (
+        configuration.cassette_path,
+        configuration.cassette_mode,
+        configuration.cassette_realtime,
+    )
+    with _CASSETTES_LOCK:
+        if key not in _CASSETTES:
+            _CASSETTES[key] = Cassette(*key)
+        return _CASSETTES[key]
+
+
+class CassetteChatModel(WrappedChatModel):
+    """Records the wrapped chat model's responses, or replays them without it."""
+
+    cassette: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def _request(self, messages: List[BaseMessage], kwargs: Dict[str, Any]):
+        return {"messages": [_canonical_message(m) for m in messages], **kwargs}
+
+    def _bound_inner(self, kwargs: Dict[str, Any]):
+        if self.inner is None:
+            raise ValueError("CassetteChatModel needs an inner model to record")
+        return super()._bound_inner(kwargs)
+
+    async def _replay(self, messages, kwargs) -> AIMessage:
+        response, latency = self.cassette.lookup(
+            "model", "chat", self._request(messages, kwargs)
+        )
+        await self.cassette.wait(latency)
+        return message_chunk_to_message(messages_from_dict([response])[0])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.cassette.mode == CassetteMode.REPLAY:
+            message = await self._replay(messages, kwargs)
+        else:
+            start = time.perf_counter()
+            # The wrapper already owns this run; keep the inner call out of callbacks.
+            message = await self._bound_inner(kwargs).ainvoke(
+                messages, stop=stop, config={"callbacks": []}
+            )
+            self.cassette.record(
+                "model",
+                "chat",
+                self._request(messages, kwargs),
+                message_to_dict(message),
+                time.perf_counter() - start,
+            )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.cassette.mode == CassetteMode.REPLAY:
+            message = await self._replay(messages, kwargs)
+            yield ChatGenerationChunk(message=to_chunk(message))
+            return
+
+        start = time.perf_counter()
+        full: Optional[AIMessageChunk] = None
+        async for chunk in self._bound_inner(kwargs).astream(
+            messages, stop=stop, config={"callbacks": []}
+        ):
+            if not isinstance(chunk, AIMessageChunk):
+                # Models without native streaming yield one complete message.
+                chunk = to_chunk(chunk)
+            full = chunk if full is None else full + chunk
+            yield ChatGenerationChunk(message=chunk)
+        if full is not None:
+            self.cassette.record(
+                "model",
+                "chat",
+                self._request(messages, kwargs),
+                message_to_dict(message_chunk_to_message(full)),
+                time.perf_counter() - start,
+            )
+
+
+class CassetteTool(WrappedTool):
+    """Records the wrapped tool's outputs, or replays them without calling it."""
+
+    cassette: Any
+
+    def __init__(self, inner: BaseTool, cassette: Cassette):
+        super().__init__(inner, cassette=cassette)
+
+    async def _arun(
+        self,
+        config: RunnableConfig,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+        **kwargs: Any,
+    ) -> Any:
+        if self.cassette.mode == CassetteMode.REPLAY:
+            response, latency = self.cassette.lookup("tool", self.name, kwargs)
+            await self.cassette.wait(latency)
+            return response
+
+        start = time.perf_counter()
+        response = await self._call_inner(kwargs, config)
+        self.cassette.record(
+            "tool", self.name, kwargs, response, time.perf_counter() - start
+        )
+        return response
+
+
+def wrap_model(model: Optional[BaseChatModel], cassette: Cassette) -> BaseChatModel:
+    """Wrap `model` for recording; `model` may be None when replaying."""
+    return CassetteChatModel(cassette=cassette, inner=model)
+
+
+def wrap_tool(tool: BaseTool, cassette: Cassette) -> BaseTool:
+    return cached_wrapper(
+        (CassetteTool, id(tool), id(cassette)), lambda: CassetteTool(tool, cassette)
+    )
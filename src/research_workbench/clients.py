@@ -0,0 +1,152 @@
+"""
+Registry of search/extract backend clients keyed by their effective config.
+
+Each backend client (a Searx wrapper, a Tavily tool, a Jina HTTP session) is
+built once per distinct configuration - e.g. per `searx_host` - and owns its
+own pooled HTTP session, so sessions with different settings no longer share
+a single process-wide client. The registry is bounded: the least recently
+used client is closed when it is full, and clients idle for longer than
+`idle_timeout` seconds are closed on the next lookup.
+"""
+
+import asyncio
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+import aiohttp
+from loguru import logger
+
+from research_workbench.metrics import REGISTRY
+
+CLIENT_REGISTRY_SIZE = 32
+CLIENT_IDLE_TIMEOUT = 300.0
+
+CLIENTS_CREATED = REGISTRY.counter(
+    "research_workbench_backend_clients_created_total",
+    "Backend clients created by the client registry.",
+    ("kind",),
+)
+CLIENTS_EVICTED = REGISTRY.counter(
+    "research_workbench_backend_clients_evicted_total",
+    "Backend clients closed by the client registry.",
+    ("kind", "reason"),
+)
+
+
+@dataclass
+class _Entry:
+    client: Any
+    close: Optional[Callable[[Any], Any]]
+    last_used: float
+
+
+def _run_close(kind: str, entry: _Entry) -> None:
+    if entry.close is None:
+        return
+    try:
+        result = entry.close(entry.client)
+        if inspect.isawaitable(result):
+            try:
+                asyncio.get_running_loop().create_task(result)
+            except RuntimeError:
+                # No running loop (or the client's loop is gone): nothing can
+                # await the close, and the session is released with its loop.
+                result.close()
+    except Exception as e:
+        logger.warning(f"clients: failed to close {kind} client: {e}")
+
+
+class ClientRegistry:
+    """A bounded, idle-evicting map from configuration keys to clients."""
+
+    def __init__(
+        self,
+        max_size: int = CLIENT_REGISTRY_SIZE,
+        idle_timeout: float = CLIENT_IDLE_TIMEOUT,
+    ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        kind: str,
+        key: Hashable,
+        factory: Callable[[], Any],
+        close: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """
+        Return the `kind` client for `key`, creating it with `factory` on a
+        miss. `close(client)` releases its resources on eviction and may
+        return an awaitable.
+        """
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for full_key, entry in list(self._entries.items()):
+                if now - entry.last_used > self.idle_timeout:
+                    evicted.append((full_key[0], "idle", self._entries.pop(full_key)))
+
+            full_key = (kind, key)
+            entry = self._entries.get(full_key)
+            if entry is None:
+                entry = _Entry(client=factory(), close=close, last_used=now)
+                self._entries[full_key] = entry
+                CLIENTS_CREATED.inc(kind=kind)
+                logger.debug(
+                    f"clients: created {kind} client ({len(self._entries)} cached)"
+                )
+                while len(self._entries) > self.max_size:
+                    old_key, old = self._entries.popitem(last=False)
+                    evicted.append((old_key[0], "capacity", old))
+            else:
+                entry.last_used = now
+                self._entries.move_to_end(full_key)
+
+        for evicted_kind, reason, old in evicted:
+            CLIENTS_EVICTED.inc(kind=evicted_kind, reason=reason)
+            _run_close(evicted_kind, old)
+        return entry.client
+
+    def clear(self) -> None:
+        """Close and forget every client."""
+        with self._lock:
+            entries = list(self._entries.items())
+            self._entries.clear()
+        for (kind, _), entry in entries:
+            CLIENTS_EVICTED.inc(kind=kind, reason="clear")
+            _run_close(kind, entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+CLIENTS = ClientRegistry()
+
+
+def _close_on_loop(loop: asyncio.AbstractEventLoop):
+    def close(session: aiohttp.ClientSession):
+        # The session belongs to `loop`, which may not be the evicting one.
+        if not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+
+    return close
+
+
+def get_aiohttp_session(kind: str, timeout: float) -> aiohttp.ClientSession:
+    """
+    Pooled aiohttp session for `kind` requests. Must be called from a running
+    event loop, which the session is bound to.
+    """
+    loop = asyncio.get_running_loop()
+    return CLIENTS.get(
+        kind,
+        loop,
+        lambda: aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)),
+        close=_close_on_loop(loop),
+    )
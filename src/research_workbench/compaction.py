@@ -0,0 +1,141 @@
+"""
+Rolling compaction of the planner's view of its trajectory.
+
+`planner_messages` grows by a full researcher report per `start_research`
+call, and the planner re-reads all of it every round. Once the view exceeds
+`planner_compaction_tokens`, the oldest rounds (all but the last
+`planner_compaction_keep_rounds`) are folded into a structured summary by the
+condenser model. The summary and the index of the first uncompacted message
+are kept in `AgentState.planner_summary`; `planner_messages` itself is never
+rewritten, so the report writer still sees every finding verbatim.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+from langchain.chat_models import BaseChatModel
+from langchain_core.messages import AnyMessage, HumanMessage
+from loguru import logger
+
+import research_workbench.prompts as prompts
+from research_workbench.metrics import REGISTRY
+
+# Rough chars-per-token ratio; only used to compare against the threshold.
+CHARS_PER_TOKEN = 4
+
+COMPACTION_TOKENS = REGISTRY.counter(
+    "research_workbench_planner_compaction_tokens_total",
+    "Estimated planner prompt tokens: 'summarized' when rounds are compacted, "
+    "'saved' on every planner call that uses the summary.",
+    ("kind",),
+)
+
+
+def estimate_tokens(messages: List[AnyMessage]) -> int:
+    chars = 0
+    for message in messages:
+        chars += len(str(message.content))
+        if message.type == "ai" and message.tool_calls:
+            chars += len(json.dumps([tc["args"] for tc in message.tool_calls]))
+    return chars // CHARS_PER_TOKEN
+
+
+def _round_starts(history: List[AnyMessage], start: int) -> List[int]:
+    return [i for i in range(start, len(history)) if history[i].type == "ai"]
+
+
+def planner_view(
+    history: List[AnyMessage], summary: Optional[Dict[str, Any]]
+) -> List[AnyMessage]:
+    """
+    What the planner is shown of `history`: the user query, the summary of
+    compacted rounds, then every message after them verbatim.
+    """
+    if not summary:
+        return list(history)
+    upto = summary["upto"]
+    return [
+        *history[:1],
+        HumanMessage(
+            content=prompts.PLANNER_COMPACTED_HISTORY.format(
+                rounds=summary["rounds"], summary=summary["summary"]
+            )
+        ),
+        *history[upto:],
+    ]
+
+
+def _render_rounds(messages: List[AnyMessage]) -> str:
+    rendered = ""
+    for message in messages:
+        if message.type == "ai":
+            rendered += f"<reasoning>\n{message.content}\n</reasoning>\n"
+            for tc in message.tool_calls:
+                rendered += (
+                    f"<call_{tc['name']}>\n{json.dumps(tc['args'])}\n"
+                    f"</call_{tc['name']}>\n"
+                )
+        elif message.type == "tool":
+            rendered += (
+                f"<result_{message.name}>\n{message.content}\n"
+                f"</result_{message.name}>\n"
+            )
+        else:
+            rendered += f"<user>\n{message.content}\n</user>\n"
+    return rendered
+
+
+async def compact_planner_history(
+    history: List[AnyMessage],
+    summary: Optional[Dict[str, Any]],
+    model: BaseChatModel,
+    keep_rounds: int,
+) -> Optional[Dict[str, Any]]:
+    """
+    Fold every round before the last `keep_rounds` into `summary`. Returns
+    the new summary, or None if there is nothing to compact or the condenser
+    failed (the planner then sees the uncompacted view).
+    """
+    # The first message is the user query; it always stays verbatim.
+    upto = summary["upto"] if summary else 1
+    starts = _round_starts(history, upto)
+    if len(starts) <= keep_rounds:
+        return None
+    cut = starts[-keep_rounds] if keep_rounds > 0 else len(history)
+    segment = history[upto:cut]
+    rounds = (summary["rounds"] if summary else 0) + len(_round_starts(segment, 0))
+
+    prompt = prompts.PLANNER_COMPACTION_PROMPT.format(
+        previous_summary=summary["summary"] if summary else "(none)",
+        rounds=_render_rounds(segment),
+    )
+    try:
+        # Keep the condenser's tokens out of the planner's event stream.
+        response = await model.ainvoke(
+            [HumanMessage(content=prompt)], config={"callbacks": []}
+        )
+    except Exception as e:
+        logger.warning(f"compaction: condenser failed, keeping full history: {e}")
+        return None
+
+    new_summary = {"upto": cut, "rounds": rounds, "summary": str(response.content)}
+    before = estimate_tokens(planner_view(history, summary))
+    after = estimate_tokens(planner_view(history, new_summary))
+    COMPACTION_TOKENS.inc(estimate_tokens(segment), kind="summarized")
+    logger.info(
+        f"compaction: folded {len(segment)} planner messages into a summary of "
+        f"{rounds} rounds; view ~{before} -> ~{after} tokens"
+    )
+    return new_summary
+
+
+def record_savings(
+    history: List[AnyMessage], summary: Optional[Dict[str, Any]]
+) -> None:
+    """Count the tokens one planner call saved by using `summary`."""
+    if summary:
+        saved = estimate_tokens(history) - estimate_tokens(
+            planner_view(history, summary)
+        )
+        if saved > 0:
+            COMPACTION_TOKENS.inc(saved, kind="saved")
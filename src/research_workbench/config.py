@@ -1,7 +1,9 @@
 from dataclasses import dataclass, fields
 from enum import Enum
+from functools import lru_cache
+import json
 import os
-from typing import Any, Optional
+from typing import Any, Optional, Union, get_args, get_origin
 
 from langgraph.graph.state import RunnableConfig
 
@@ -11,12 +13,178 @@ class SearchEngine(Enum):
     SEARX = "searx"
 
 
+class ExtractEngine(Enum):
+    JINA = "jina"
+    # Fetch the page directly and extract it locally (research_workbench.readability).
+    LOCAL = "local"
+
+
+class NoveltyStop(Enum):
+    OFF = "off"
+    # Tell the planner that the last round added little and it should report.
+    HINT = "hint"
+    # Call write_report without asking the planner.
+    FORCE = "force"
+
+
+class CassetteMode(Enum):
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+MODEL_ROLES = ("general_assistant", "planner", "researcher", "writer", "condenser")
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """
+    A chat model to initialize with `init_chat_model`. `model` may carry the
+    provider prefix (`xai:grok-4-1-fast-non-reasoning`); `api_key_env` names the
+    environment variable holding the key for OpenAI-compatible endpoints.
+    """
+
+    model: str
+    provider: Optional[str] = None
+    base_url: Optional[str] = None
+    api_key_env: Optional[str] = None
+    # Extra `init_chat_model` kwargs as sorted (name, value) pairs, so specs
+    # stay hashable and can key the model cache.
+    params: tuple = ()
+
+    def __post_init__(self):
+        if isinstance(self.params, dict):
+            object.__setattr__(self, "params", tuple(sorted(self.params.items())))
+
+    @classmethod
+    def parse(cls, value: Any) -> "ModelSpec":
+        """
+        Accept a ModelSpec, a dict, a JSON object string or a plain model
+        string such as `xai:grok-4-1-fast-non-reasoning`.
+        """
+        if isinstance(value, ModelSpec):
+            return value
+        if isinstance(value, str):
+            value = value.strip()
+            if not value.startswith("{"):
+                return cls(model=value)
+            value = json.loads(value)
+        if isinstance(value, dict):
+            return cls(**value)
+        raise ValueError(f"Invalid model spec: {value!r}")
+
+
+def _coerce(value: Any, field_type: Any) -> Any:
+    """Convert string values (environment variables) to the field's type."""
+    if get_origin(field_type) is Union:  # Optional[X]
+        field_type = next(t for t in get_args(field_type) if t is not type(None))
+    if field_type is ModelSpec and value is not None:
+        return ModelSpec.parse(value)
+    if not isinstance(value, str) or not isinstance(field_type, type):
+        return value
+    if issubclass(field_type, Enum):
+        return field_type(value.lower())
+    if field_type is bool:
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+    if field_type in (int, float):
+        return field_type(value)
+    return value
+
+
 @dataclass
 class Configuration:
 
     search_engine: SearchEngine = SearchEngine.TAVILY
     search_engine_max_results: int = 10
     searx_host: Optional[str] = "http://localhost:8001"
+    # Tavily API base URL; unset uses the public API.
+    tavily_api_url: Optional[str] = None
+    jina_reader_url: str = "https://r.jina.ai/"
+    extract_engine: ExtractEngine = ExtractEngine.JINA
+    # Worker processes for local HTML extraction.
+    extract_workers: int = 4
+    # Abort page downloads beyond this many bytes with `PageTooLarge` (see
+    # tools.web_extract). The prefetcher sets it to its remaining budget.
+    extract_max_bytes: Optional[int] = None
+    # Search the other engine while the configured one is failing.
+    search_fallback: bool = True
+
+    # Backend retries and circuit breakers (see research_workbench.resilience).
+    retry_attempts: int = 3
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 8.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+
+    # Record/replay of model and web tool I/O (see research_workbench.cassettes).
+    cassette_mode: CassetteMode = CassetteMode.OFF
+    cassette_path: Optional[str] = None
+    # Replay at the recorded latency instead of as fast as possible.
+    cassette_realtime: bool = False
+
+    # Early stop of the planner loop once a research round adds little new
+    # material (see research_workbench.novelty).
+    novelty_stop: NoveltyStop = NoveltyStop.OFF
+    novelty_threshold: float = 0.2
+    novelty_min_rounds: int = 2
+
+    # Rolling compaction of the planner's view (see research_workbench.compaction).
+    # 0 disables it; otherwise older rounds are summarized by the condenser
+    # model once the view exceeds this many (estimated) tokens.
+    planner_compaction_tokens: int = 0
+    planner_compaction_keep_rounds: int = 2
+
+    # Token budget of the general assistant's view of the conversation (see
+    # research_workbench.conversation). 0 sends the whole conversation.
+    general_assistant_context_tokens: int = 0
+    general_assistant_keep_turns: int = 2
+
+    # Character budget of one web_extract_batch call.
+    extract_max_chars_per_document: int = 20_000
+    extract_max_total_chars: int = 60_000
+
+    # Persistent document corpus (see research_workbench.corpus). Extracted
+    # pages are stored when a path is set; lookup serves fresh copies first.
+    corpus_path: Optional[str] = None
+    corpus_lookup: bool = False
+    corpus_max_age_hours: float = 72.0
+    # web_search is skipped when this many of the (up to 3) fresh corpus
+    # matches contain every query term; above 3 always searches.
+    corpus_skip_search_hits: int = 3
+    corpus_retention_days: float = 30.0
+
+    # Speculative extraction of top search results (see research_workbench.prefetch).
+    prefetch_enabled: bool = False
+    prefetch_top_k: int = 3
+    prefetch_concurrency: int = 4
+    prefetch_byte_budget: int = 4_000_000
+    prefetch_ttl: float = 300.0
+
+    # Hedged chat model requests (see research_workbench.hedging).
+    hedge_enabled: bool = False
+    hedge_percentile: float = 95.0
+    hedge_budget: float = 0.1
+    hedge_min_samples: int = 20
+
+    # Chat model per role (env: DEFAULT_MODEL, PLANNER_MODEL, ...). Roles
+    # without a spec use `default_model`; see `ModelSpec.parse` for formats.
+    default_model: ModelSpec = ModelSpec("xai:grok-4-1-fast-non-reasoning")
+    general_assistant_model: Optional[ModelSpec] = None
+    planner_model: Optional[ModelSpec] = None
+    researcher_model: Optional[ModelSpec] = None
+    writer_model: Optional[ModelSpec] = None
+    # Summarization/compaction steps.
+    condenser_model: Optional[ModelSpec] = None
+
+    def __post_init__(self):
+        for f in fields(self):
+            setattr(self, f.name, _coerce(getattr(self, f.name), f.type))
+
+    def model_for(self, role: str) -> ModelSpec:
+        """The model spec for `role`, falling back to `default_model`."""
+        if role not in MODEL_ROLES:
+            return self.default_model
+        return getattr(self, f"{role}_model") or self.default_model
 
     @classmethod
     def from_runnable_config(
@@ -31,4 +199,19 @@ class Configuration:
             for f in fields(cls)
             if f.init
         }
-        return cls(**{k: v for k, v in values.items() if v})
+        # Unset values keep the default; False and 0 are real settings.
+        items = tuple((k, v) for k, v in values.items() if v is not None and v != "")
+        try:
+            return _cached_configuration(cls, items)
+        except TypeError:  # unhashable configurable value
+            return cls(**dict(items))
+
+
+@lru_cache(maxsize=64)
+def _cached_configuration(cls, items: tuple) -> Configuration:
+    """
+    Parse each distinct set of raw values once. Tools call
+    `from_runnable_config` on every invocation, but the values only change
+    between runs, so the (shared, treat-as-read-only) instance is reused.
+    """
+    return cls(**dict(items))
@@ -0,0 +1,150 @@
+"""
+Token-budgeted window over the general assistant's conversation.
+
+Every deep research report comes back to the general assistant as a
+`start_deep_research` ToolMessage, and the whole conversation is re-sent on
+each turn. With `general_assistant_context_tokens` set, the assistant is
+shown a window instead: the last `general_assistant_keep_turns` user turns
+verbatim; older reports replaced by a summary and their handle, which the
+`recall_report` tool resolves to the full text; other long tool outputs
+truncated; and, if that is still over budget, the oldest turns dropped.
+Report summaries are made once by the condenser model and kept in
+`AgentState.report_summaries`; the conversation in state is never rewritten.
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from langchain.chat_models import BaseChatModel
+from langchain_core.messages import AnyMessage, HumanMessage, ToolMessage
+from loguru import logger
+
+import research_workbench.prompts as prompts
+from research_workbench.compaction import estimate_tokens
+from research_workbench.metrics import REGISTRY
+
+# Older tool outputs other than reports are cut to this many characters.
+OLD_TOOL_OUTPUT_CHARS = 2_000
+# Fallback summary (report head) when the condenser fails.
+FALLBACK_SUMMARY_CHARS = 1_500
+
+WINDOW_TOKENS = REGISTRY.counter(
+    "research_workbench_assistant_window_tokens_total",
+    "Estimated general assistant prompt tokens: 'full' conversation and "
+    "'sent' window, per windowed turn.",
+    ("kind",),
+)
+
+
+def find_report(messages: List[AnyMessage], report_id: str) -> Optional[str]:
+    """The full text of the report returned for tool call `report_id`."""
+    for message in messages:
+        if (
+            message.type == "tool"
+            and message.name == "start_deep_research"
+            and message.tool_call_id == report_id
+        ):
+            return str(message.content)
+    return None
+
+
+def _turns(messages: List[AnyMessage]) -> List[List[AnyMessage]]:
+    """Split the conversation at user messages."""
+    turns: List[List[AnyMessage]] = []
+    for message in messages:
+        if message.type == "human" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+async def _summarize(model: BaseChatModel, report: str) -> Optional[str]:
+    try:
+        # Keep the condenser's tokens out of the assistant's event stream.
+        response = await model.ainvoke(
+            [HumanMessage(content=prompts.REPORT_SUMMARY_PROMPT.format(report=report))],
+            config={"callbacks": []},
+        )
+        return str(response.content)
+    except Exception as e:
+        logger.warning(f"conversation: failed to summarize report: {e}")
+        return None
+
+
+def _condensed(message: AnyMessage, summaries: Dict[str, str]) -> AnyMessage:
+    if message.type != "tool":
+        return message
+    if message.name == "start_deep_research":
+        summary = summaries.get(message.tool_call_id) or (
+            str(message.content)[:FALLBACK_SUMMARY_CHARS] + " [...]"
+        )
+        content = prompts.REPORT_SUMMARY_STUB.format(
+            report_id=message.tool_call_id, summary=summary
+        )
+    elif message.name == "recall_report":
+        content = "[Recalled report omitted; call `recall_report` again if needed.]"
+    elif len(str(message.content)) > OLD_TOOL_OUTPUT_CHARS:
+        content = str(message.content)[:OLD_TOOL_OUTPUT_CHARS] + "\n[... truncated]"
+    else:
+        return message
+    return ToolMessage(
+        content=content, tool_call_id=message.tool_call_id, name=message.name
+    )
+
+
+async def window_messages(
+    messages: List[AnyMessage],
+    summaries: Dict[str, str],
+    model: BaseChatModel,
+    budget: int,
+    keep_turns: int,
+) -> Tuple[List[AnyMessage], Dict[str, str]]:
+    """
+    The messages to send for a conversation of `messages`, and the report
+    summaries made for it that are not yet in `summaries`.
+    """
+    full = estimate_tokens(messages)
+    if full <= budget:
+        return messages, {}
+
+    turns = _turns(messages)
+    split = max(len(turns) - keep_turns, 0)
+    old, recent = turns[:split], turns[split:]
+
+    pending = [
+        m
+        for turn in old
+        for m in turn
+        if m.type == "tool"
+        and m.name == "start_deep_research"
+        and m.tool_call_id not in summaries
+    ]
+    made = await asyncio.gather(*[_summarize(model, str(m.content)) for m in pending])
+    new_summaries = {
+        m.tool_call_id: summary for m, summary in zip(pending, made) if summary
+    }
+    all_summaries = {**summaries, **new_summaries}
+
+    old = [[_condensed(m, all_summaries) for m in turn] for turn in old]
+    recent_messages = [m for turn in recent for m in turn]
+    recent_tokens = estimate_tokens(recent_messages)
+    dropped = 0
+    while old and estimate_tokens([m for t in old for m in t]) + recent_tokens > budget:
+        old.pop(0)
+        dropped += 1
+
+    window = [m for turn in old for m in turn]
+    if dropped:
+        window.insert(
+            0, HumanMessage(content=prompts.OMITTED_TURNS_NOTE.format(turns=dropped))
+        )
+    window += recent_messages
+
+    sent = estimate_tokens(window)
+    WINDOW_TOKENS.inc(full, kind="full")
+    WINDOW_TOKENS.inc(sent, kind="sent")
+    logger.info(
+        f"conversation: window ~{full} -> ~{sent} tokens "
+        f"({len(new_summaries)} reports summarized, {dropped} turns dropped)"
+    )
+    return window, new_summaries
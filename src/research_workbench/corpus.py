@@ -0,0 +1,567 @@
+"""
+Persistent cross-run corpus of extracted documents.
+
+With `CORPUS_PATH` set, every page returned by `web_extract`/`web_extract_batch`
+is appended to `<CORPUS_PATH>/docs.jsonl` together with its URL, title and
+fetch time. `CORPUS_LOOKUP=1` additionally consults the corpus first:
+`web_extract` serves a stored copy younger than `corpus_max_age_hours` without
+a network call, and `web_search` results are preceded by the best fresh
+matches from the corpus. When `corpus_skip_search_hits` of those matches
+contain every query term, the web search is skipped altogether.
+
+Documents are searched through an inverted index in `index.bin`, which
+readers open memory-mapped: startup only reads the header and the documents
+appended since the index was built, and postings are paged in on demand.
+Compaction (automatic once `CORPUS_TAIL_LIMIT` documents are unindexed, or
+`python -m research_workbench.corpus compact PATH`) drops documents superseded
+by a newer fetch of the same URL and those older than the retention period,
+then rewrites both files.
+
+index.bin layout (little endian):
+
+    header      magic, n_docs, n_terms, total_tokens, covered docs.jsonl bytes
+    doc table   n_docs x (offset, length, tokens, fetched_at) into docs.jsonl
+    term table  n_terms x (term offset, term length, postings offset, df),
+                sorted by term
+    term blob   utf-8 terms
+    postings    df x (doc index, tf) per term
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from loguru import logger
+
+from research_workbench.config import Configuration
+from research_workbench.metrics import REGISTRY
+from research_workbench.notes import documents_from_tool_output, tokenize
+from research_workbench.wrappers import WrappedTool, cached_wrapper
+
+CORPUS_TAIL_LIMIT = 256
+
+CORPUS_EVENTS = REGISTRY.counter(
+    "research_workbench_corpus_total",
+    "Persistent corpus lookups and writes (hit, miss, stale, stored, compacted, "
+    "search_skipped).",
+    ("outcome",),
+)
+
+_MAGIC = b"RWCORP01"
+_HEADER = struct.Struct("<8sIIQQ")
+_DOC = struct.Struct("<QIId")
+_TERM = struct.Struct("<QIQI")
+_POSTING = struct.Struct("<II")
+
+# URLs are indexed as a term the tokenizer can never produce.
+_URL_PREFIX = "\x00url:"
+
+K1, B = 1.5, 0.75
+
+
+@dataclass
+class CorpusDocument:
+    url: str
+    title: str
+    text: str
+    fetched_at: float
+
+    def as_extract(self) -> str:
+        """The document in `web_extract`'s output format."""
+        return f"Title: {self.title}\nContent: {self.text}"
+
+
+def _encode(document: CorpusDocument) -> bytes:
+    return json.dumps(document.__dict__, ensure_ascii=False).encode("utf-8")
+
+
+def _terms(document: CorpusDocument) -> Counter:
+    terms = Counter(tokenize(f"{document.title} {document.text}"))
+    terms[_URL_PREFIX + document.url] += 1
+    return terms
+
+
+class Corpus:
+    """An append-only document store with a memory-mapped inverted index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.docs_path = os.path.join(path, "docs.jsonl")
+        self.index_path = os.path.join(path, "index.bin")
+        os.makedirs(path, exist_ok=True)
+        if not os.path.exists(self.docs_path):
+            open(self.docs_path, "a").close()
+        self._lock = threading.RLock()
+        self._compacting = False
+        self._index: Optional[mmap.mmap] = None
+        self._docs: Optional[mmap.mmap] = None
+        self._open()
+
+    # -- opening ---------------------------------------------------------
+
+    def _close_maps(self) -> None:
+        for mapped in (self._index, self._docs):
+            if mapped is not None:
+                mapped.close()
+        self._index = self._docs = None
+
+    def _open(self) -> None:
+        self._close_maps()
+        self._n_docs = self._n_terms = self._total_tokens = self._covered = 0
+        if os.path.exists(self.index_path) and os.path.getsize(self.index_path):
+            with open(self.index_path, "rb") as f:
+                self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, n_docs, n_terms, total_tokens, covered = _HEADER.unpack_from(
+                self._index, 0
+            )
+            if magic != _MAGIC:
+                raise ValueError(f"{self.index_path} is not a corpus index")
+            self._n_docs, self._n_terms = n_docs, n_terms
+            self._total_tokens, self._covered = total_tokens, covered
+        if self._covered > os.path.getsize(self.docs_path):
+            self._n_docs = 0
+        elif self._covered:
+            with open(self.docs_path, "rb") as f:
+                self._docs = mmap.mmap(
+                    f.fileno(), self._covered, access=mmap.ACCESS_READ
+                )
+        self._doc_table = _HEADER.size
+        self._term_table = self._doc_table + self._n_docs * _DOC.size
+        if self._covered and not self._index_matches_docs():
+            # Interrupted compaction: fall back to indexing everything in memory.
+            logger.warning(f"corpus: {self.index_path} is stale, ignoring it")
+            self._close_maps()
+            self._n_docs = self._n_terms = self._total_tokens = self._covered = 0
+
+        # Documents appended after the index was built are indexed in memory.
+        self._tail: List[CorpusDocument] = []
+        self._tail_lengths: List[int] = []
+        self._tail_postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        with open(self.docs_path, "rb") as f:
+            f.seek(self._covered)
+            for line in f:
+                if line.strip():
+                    self._add_tail(CorpusDocument(**json.loads(line)))
+
+    def _index_matches_docs(self) -> bool:
+        if not self._n_docs:
+            return False
+        try:
+            for doc_index in (0, self._n_docs - 1):
+                self._document(doc_index)
+        except (ValueError, TypeError):
+            return False
+        return True
+
+    def _add_tail(self, document: CorpusDocument) -> None:
+        doc_index = self._n_docs + len(self._tail)
+        terms = _terms(document)
+        self._tail.append(document)
+        self._tail_lengths.append(sum(terms.values()))
+        for term, tf in terms.items():
+            self._tail_postings[term][doc_index] = tf
+
+    # -- reading ---------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._n_docs + len(self._tail)
+
+    def _term_at(self, i: int) -> Tuple[bytes, int, int]:
+        term_offset, term_length, postings_offset, df = _TERM.unpack_from(
+            self._index, self._term_table + i * _TERM.size
+        )
+        return self._index[term_offset : term_offset + term_length], postings_offset, df
+
+    def _index_postings(self, term: str) -> Iterable[Tuple[int, int]]:
+        encoded = term.encode("utf-8")
+        lo, hi = 0, self._n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found, postings_offset, df = self._term_at(mid)
+            if found == encoded:
+                end = postings_offset + df * _POSTING.size
+                return _POSTING.iter_unpack(self._index[postings_offset:end])
+            if found < encoded:
+                lo = mid + 1
+            else:
+                hi = mid
+        return ()
+
+    def _postings(self, term: str) -> List[Tuple[int, int]]:
+        postings = list(self._index_postings(term)) if self._n_terms else []
+        postings.extend(self._tail_postings.get(term, {}).items())
+        return postings
+
+    def _doc_meta(self, doc_index: int) -> Tuple[int, float]:
+        """(token count, fetched_at) without reading the document text."""
+        if doc_index < self._n_docs:
+            _, _, tokens, fetched_at = _DOC.unpack_from(
+                self._index, self._doc_table + doc_index * _DOC.size
+            )
+            return tokens, fetched_at
+        tail_index = doc_index - self._n_docs
+        return self._tail_lengths[tail_index], self._tail[tail_index].fetched_at
+
+    def _document(self, doc_index: int) -> CorpusDocument:
+        if doc_index >= self._n_docs:
+            return self._tail[doc_index - self._n_docs]
+        offset, length, _, _ = _DOC.unpack_from(
+            self._index, self._doc_table + doc_index * _DOC.size
+        )
+        return CorpusDocument(**json.loads(self._docs[offset : offset + length]))
+
+    def _newest(self, url: str) -> Optional[Tuple[float, int]]:
+        """(fetched_at, doc index) of the newest stored copy of `url`."""
+        postings = self._postings(_URL_PREFIX + url)
+        if not postings:
+            return None
+        return max((self._doc_meta(i)[1], i) for i, _ in postings)
+
+    def lookup(
+        self, url: str, max_age: Optional[float] = None
+    ) -> Optional[CorpusDocument]:
+        """The newest stored copy of `url`, if it is younger than `max_age` seconds."""
+        with self._lock:
+            newest = self._newest(url)
+            if newest is None:
+                CORPUS_EVENTS.inc(outcome="miss")
+                return None
+            fetched_at, doc_index = newest
+            if max_age is not None and time.time() - fetched_at > max_age:
+                CORPUS_EVENTS.inc(outcome="stale")
+                return None
+            CORPUS_EVENTS.inc(outcome="hit")
+            return self._document(doc_index)
+
+    def search(
+        self, query: str, k: int = 5, max_age: Optional[float] = None
+    ) -> List[Tuple[float, CorpusDocument]]:
+        """BM25 over documents younger than `max_age`; one result per URL."""
+        with self._lock:
+            n = len(self)
+            if not n:
+                return []
+            avg_length = (self._total_tokens + sum(self._tail_lengths)) / n
+            oldest = time.time() - max_age if max_age is not None else -math.inf
+            scores: Dict[int, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_index, tf in postings:
+                    tokens, fetched_at = self._doc_meta(doc_index)
+                    if fetched_at < oldest:
+                        continue
+                    norm = 1 - B + B * tokens / avg_length
+                    scores[doc_index] += idf * tf * (K1 + 1) / (tf + K1 * norm)
+
+            results, seen_urls = [], set()
+            for doc_index, score in sorted(
+                scores.items(), key=lambda item: item[1], reverse=True
+            ):
+                document = self._document(doc_index)
+                if document.url in seen_urls:
+                    continue
+                seen_urls.add(document.url)
+                # Superseded copies may match; always answer with the newest.
+                _, newest_index = self._newest(document.url)
+                if newest_index != doc_index:
+                    document = self._document(newest_index)
+                results.append((score, document))
+                if len(results) == k:
+                    break
+            return results
+
+    # -- writing ---------------------------------------------------------
+
+    def add(
+        self, url: str, title: str, text: str, fetched_at: Optional[float] = None
+    ) -> bool:
+        """Store a document; returns True when the unindexed tail is due for compaction."""
+        document = CorpusDocument(url, title, text, fetched_at or time.time())
+        line = _encode(document) + b"\n"
+        with self._lock:
+            with open(self.docs_path, "ab") as f:
+                f.write(line)
+            self._add_tail(document)
+            CORPUS_EVENTS.inc(outcome="stored")
+            return len(self._tail) >= CORPUS_TAIL_LIMIT and not self._compacting
+
+    def compact(self, retention: Optional[float] = None) -> Dict[str, int]:
+        """
+        Rewrite the corpus without superseded documents (older fetches of a
+        URL) or documents older than `retention` seconds, and rebuild the
+        index. Runs off the lock except for the snapshot and the final swap,
+        so lookups continue while the new files are written.
+        """
+        with self._lock:
+            if self._compacting:
+                return {}
+            self._compacting = True
+            snapshot = len(self)
+            documents = [self._document(i) for i in range(snapshot)]
+        try:
+            oldest = time.time() - retention if retention else -math.inf
+            newest: Dict[str, CorpusDocument] = {}
+            for document in documents:
+                current = newest.get(document.url)
+                if current is None or document.fetched_at >= current.fetched_at:
+                    newest[document.url] = document
+            kept = sorted(
+                (d for d in newest.values() if d.fetched_at >= oldest),
+                key=lambda d: d.fetched_at,
+            )
+            docs_tmp, index_tmp = self._write(kept)
+
+            with self._lock:
+                # Documents stored while writing stay unindexed in the new tail.
+                with open(docs_tmp, "ab") as f:
+                    for doc_index in range(snapshot, len(self)):
+                        f.write(_encode(self._document(doc_index)) + b"\n")
+                self._close_maps()
+                # A stale index left by a crash between these renames is
+                # detected and ignored on the next open.
+                os.replace(docs_tmp, self.docs_path)
+                os.replace(index_tmp, self.index_path)
+                self._open()
+            CORPUS_EVENTS.inc(outcome="compacted")
+            stats = {"before": snapshot, "after": len(kept)}
+            logger.info(f"corpus: compacted {self.path}: {stats}")
+            return stats
+        finally:
+            self._compacting = False
+
+    def _write(self, documents: List[CorpusDocument]) -> Tuple[str, str]:
+        """Write the documents and their index to temporary files."""
+        docs_tmp, index_tmp = self.docs_path + ".tmp", self.index_path + ".tmp"
+        doc_entries: List[Tuple[int, int, int, float]] = []
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        total_tokens = 0
+        with open(docs_tmp, "wb") as f:
+            for doc_index, document in enumerate(documents):
+                line = _encode(document)
+                terms = _terms(document)
+                tokens = sum(terms.values())
+                doc_entries.append((f.tell(), len(line), tokens, document.fetched_at))
+                f.write(line + b"\n")
+                total_tokens += tokens
+                for term, tf in terms.items():
+                    postings[term].append((doc_index, tf))
+            covered = f.tell()
+
+        encoded_terms = sorted((t.encode("utf-8"), t) for t in postings)
+        term_table_start = _HEADER.size + len(documents) * _DOC.size
+        blob_start = term_table_start + len(encoded_terms) * _TERM.size
+        postings_start = blob_start + sum(len(e) for e, _ in encoded_terms)
+
+        with open(index_tmp, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    _MAGIC, len(documents), len(encoded_terms), total_tokens, covered
+                )
+            )
+            for entry in doc_entries:
+                f.write(_DOC.pack(*entry))
+            term_offset, postings_offset = blob_start, postings_start
+            for encoded, term in encoded_terms:
+                df = len(postings[term])
+                f.write(_TERM.pack(term_offset, len(encoded), postings_offset, df))
+                term_offset += len(encoded)
+                postings_offset += df * _POSTING.size
+            for encoded, _ in encoded_terms:
+                f.write(encoded)
+            for _, term in encoded_terms:
+                for doc_index, tf in postings[term]:
+                    f.write(_POSTING.pack(doc_index, tf))
+        return docs_tmp, index_tmp
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_maps()
+
+
+_CORPORA: Dict[str, Corpus] = {}
+_CORPORA_LOCK = threading.Lock()
+
+
+def get_corpus(configuration: Configuration) -> Optional[Corpus]:
+    """The process-wide corpus at `configuration.corpus_path`, if enabled."""
+    if not configuration.corpus_path:
+        return None
+    with _CORPORA_LOCK:
+        if configuration.corpus_path not in _CORPORA:
+            _CORPORA[configuration.corpus_path] = Corpus(configuration.corpus_path)
+        return _CORPORA[configuration.corpus_path]
+
+
+def _compact_in_background(corpus: Corpus, configuration: Configuration) -> None:
+    retention = configuration.corpus_retention_days * 86400
+    task = asyncio.get_running_loop().create_task(
+        asyncio.to_thread(corpus.compact, retention)
+    )
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+class CorpusExtractTool(WrappedTool):
+    """Serves extractions from the corpus when fresh, and stores new ones."""
+
+    async def _arun(
+        self,
+        config: RunnableConfig,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+        **kwargs: Any,
+    ) -> Any:
+        configuration = Configuration.from_runnable_config(config)
+        corpus = get_corpus(configuration)
+        url = kwargs.get("url")
+        if corpus is not None and configuration.corpus_lookup and url:
+            document = corpus.lookup(url, configuration.corpus_max_age_hours * 3600)
+            if document is not None:
+                return document.as_extract()
+
+        result = await self._call_inner(kwargs, config)
+        if corpus is not None:
+            # Appending to docs.jsonl is file I/O; keep it off the event loop.
+            due = await asyncio.to_thread(_store, corpus, result, url)
+            if due:
+                _compact_in_background(corpus, configuration)
+        return result
+
+
+def _store(corpus: Corpus, result: Any, url: Optional[str]) -> bool:
+    due = False
+    for doc_url, title, content in documents_from_tool_output(result, url):
+        due = corpus.add(doc_url, title, content) or due
+    return due
+
+
+def _search_text(kwargs: Dict[str, Any]) -> str:
+    if "query" in kwargs:
+        return str(kwargs["query"])
+    queries = kwargs.get("queries") or []
+    return " ".join(q["query"] if isinstance(q, dict) else q.query for q in queries)
+
+
+def _covers(query: str, document: CorpusDocument) -> bool:
+    """Whether `document` contains every term of `query`."""
+    terms = set(tokenize(query))
+    return bool(terms) and terms <= set(tokenize(f"{document.title} {document.text}"))
+
+
+class CorpusSearchTool(WrappedTool):
+    """
+    Looks the query up in the corpus first. Fresh matches are prepended to
+    the wrapped search tool's results; when at least
+    `corpus_skip_search_hits` of them contain every query term, they are
+    returned alone and the web search is skipped.
+    """
+
+    k: int = 3
+    preview_chars: int = 400
+
+    async def _arun(
+        self,
+        config: RunnableConfig,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+        **kwargs: Any,
+    ) -> Any:
+        configuration = Configuration.from_runnable_config(config)
+        corpus = get_corpus(configuration)
+        if corpus is None or not configuration.corpus_lookup:
+            return await self._call_inner(kwargs, config)
+        query = _search_text(kwargs)
+        hits = corpus.search(query, self.k, configuration.corpus_max_age_hours * 3600)
+        stored = ""
+        for _, document in hits:
+            fetched = time.strftime("%Y-%m-%d", time.localtime(document.fetched_at))
+            stored += (
+                f"Title: {document.title}\nURL: {document.url}\n"
+                f"Content: (stored copy from {fetched}, web_extract returns it "
+                f"without a web request) {document.text[: self.preview_chars]}"
+            )
+            stored += "\n----\n"
+        strong = sum(_covers(query, document) for _, document in hits)
+        if strong and strong >= configuration.corpus_skip_search_hits:
+            CORPUS_EVENTS.inc(outcome="search_skipped")
+            return stored + (
+                "Web search skipped: the stored copies above cover this query. "
+                "Search again with a more specific query for newer sources."
+            )
+
+        result = await self._call_inner(kwargs, config)
+        if not hits:
+            return result
+        if isinstance(result, dict):
+            result = json.dumps(result, ensure_ascii=False)
+        return stored + str(result)
+
+
+def wrap_corpus_tool(tool: BaseTool) -> BaseTool:
+    """Corpus-aware wrapper for a web search or extract tool."""
+    wrapper = CorpusExtractTool if "extract" in tool.name else CorpusSearchTool
+    return cached_wrapper((wrapper, id(tool)), lambda: wrapper(tool))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m research_workbench.corpus")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="document and index counts").add_argument(
+        "path"
+    )
+    compact = subparsers.add_parser("compact", help="drop superseded documents")
+    compact.add_argument("path")
+    compact.add_argument(
+        "--retention-days", type=float, help="also drop documents older than this"
+    )
+    search = subparsers.add_parser("search", help="query the corpus")
+    search.add_argument("path")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    corpus = Corpus(args.path)
+    if args.command == "stats":
+        print(
+            json.dumps(
+                {
+                    "documents": len(corpus),
+                    "indexed": corpus._n_docs,
+                    "unindexed": len(corpus._tail),
+                    "terms": corpus._n_terms,
+                    "docs_bytes": os.path.getsize(corpus.docs_path),
+                    "index_bytes": (
+                        os.path.getsize(corpus.index_path)
+                        if os.path.exists(corpus.index_path)
+                        else 0
+                    ),
+                },
+                indent=2,
+            )
+        )
+    elif args.command == "compact":
+        retention = args.retention_days * 86400 if args.retention_days else None
+        print(json.dumps(corpus.compact(retention)))
+    elif args.command == "search":
+        for score, document in corpus.search(args.query, args.k):
+            fetched = time.strftime(
+                "%Y-%m-%d %H:%M", time.localtime(document.fetched_at)
+            )
+            print(f"{score:7.3f}  {fetched}  {document.url}  {document.title}")
+    corpus.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,108 @@
 import asyncio
 import json
-from collections import Counter
+from collections import Counter, OrderedDict
+from dataclasses import astuple
 from datetime import datetime
 import os
-from typing import Annotated, List, Optional, TypedDict
+import uuid
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
 
 from langchain.agents import create_agent
 from langchain.chat_models import BaseChatModel, init_chat_model
 from langchain.tools import BaseTool, tool
-from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
 from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import END, START, StateGraph, add_messages
+from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
 from loguru import logger
 
 import research_workbench.prompts as prompts
-from research_workbench.config import Configuration
-from research_workbench.tools.web_extract import web_extract
-from research_workbench.tools.web_search import get_search_tool
-
-_MODEL: Optional[BaseChatModel] = None
-
-
-def get_model() -> BaseChatModel:
-    """Lazily initialize the chat model to avoid import-time failures."""
-    global _MODEL
-    if _MODEL is None:
-        _MODEL = init_chat_model(model="xai:grok-4-1-fast-non-reasoning")
-        # _MODEL = init_chat_model(
-        #     model="openai-gpt-oss-120b",
-        #     model_provider="openai",
-        #     base_url="https://inference.do-ai.run/v1/",
-        #     api_key=os.environ.get("DIGITALOCEAN_INFERENCE_KEY"),
-        # )
-    return _MODEL
+from research_workbench.cassettes import Cassette, get_cassette, wrap_model, wrap_tool
+from research_workbench.compaction import (
+    compact_planner_history,
+    estimate_tokens,
+    planner_view,
+    record_savings,
+)
+from research_workbench.conversation import find_report, window_messages
+from research_workbench.corpus import wrap_corpus_tool
+from research_workbench.config import (
+    CassetteMode,
+    Configuration,
+    ModelSpec,
+    NoveltyStop,
+)
+from research_workbench.hedging import wrap_hedged
+from research_workbench.metrics import MetricsCallbackHandler
+from research_workbench.notes import wrap_indexing_tool
+from research_workbench.novelty import latest_round_novelty
+from research_workbench.prefetch import (
+    close_prefetcher,
+    wrap_extract_tool,
+    wrap_search_tool,
+)
+from research_workbench.tools.web_extract import web_extract, web_extract_batch
+from research_workbench.tools.search_notes import search_notes
+from research_workbench.tools.web_search import get_search_tool, web_search_batch
+
+_MODELS: Dict[
+    Tuple[Optional[ModelSpec], Optional[Cassette], Optional[str]], BaseChatModel
+] = {}
+
+
+def _init_model(spec: ModelSpec) -> BaseChatModel:
+    kwargs: Dict[str, Any] = dict(spec.params)
+    if spec.provider:
+        kwargs["model_provider"] = spec.provider
+    if spec.base_url:
+        kwargs["base_url"] = spec.base_url
+    if spec.api_key_env:
+        kwargs["api_key"] = os.environ.get(spec.api_key_env)
+    return init_chat_model(model=spec.model, **kwargs)
+
+
+def get_model(
+    role: str = "default", config: Optional[RunnableConfig] = None
+) -> BaseChatModel:
+    """
+    The chat model configured for `role` (see `Configuration.model_for`).
+    Models are initialized lazily, once per spec, to avoid import-time failures.
+    """
+    configuration = Configuration.from_runnable_config(config)
+    cassette = get_cassette(configuration)
+    if cassette is not None and cassette.mode == CassetteMode.REPLAY:
+        # Replay never reaches the provider, so no credentials are needed.
+        key = (None, cassette, None)
+    else:
+        # Hedging tracks latency per role, so hedged models are not shared.
+        hedge_role = role if configuration.hedge_enabled else None
+        key = (configuration.model_for(role), cassette, hedge_role)
+    if key not in _MODELS:
+        spec, cassette, hedge_role = key
+        model = _init_model(spec) if spec is not None else None
+        if hedge_role is not None:
+            model = wrap_hedged(model, hedge_role, configuration)
+        _MODELS[key] = wrap_model(model, cassette) if cassette is not None else model
+    return _MODELS[key]
 
 
 class AgentState(TypedDict, total=False):
@@ -50,8 +118,20 @@ class AgentState(TypedDict, total=False):
     final_report: str
     report_writer_node_id: Optional[str]
 
+    # Summary of the planner rounds compacted out of its view (see
+    # research_workbench.compaction); planner_messages keeps them verbatim.
+    planner_summary: Optional[Dict[str, Any]]
 
-def get_formatted_date():
+    # Condensed deep research reports by start_deep_research tool call id (see
+    # research_workbench.conversation).
+    report_summaries: Dict[str, str]
+
+
+def get_formatted_date(config: RunnableConfig):
+    # Prompts embed the date, so cassettes pin it to keep requests replayable.
+    cassette = get_cassette(Configuration.from_runnable_config(config))
+    if cassette is not None and cassette.recorded_date:
+        return cassette.recorded_date
     return datetime.now().strftime("%Y-%m-%d")
 
 
@@ -83,6 +163,92 @@ def dummy_call_deep_research(msg: str):
     return msg
 
 
+@tool
+def recall_report(report_id: str, state: Annotated[dict, InjectedState]) -> str:
+    """
+    Retrieve the full text of an earlier deep research report whose summary is shown in the conversation.
+    Args:
+        report_id: The id of the report summary.
+    Returns:
+        The full report.
+    """
+    logger.debug(f"recall_report: {report_id = }")
+    report = find_report(state.get("general_assistant_messages", []), report_id)
+    return report or f"No report with id {report_id} in this conversation."
+
+
+# Built artifacts (tool-bound models, compiled researcher agents) are reused
+# across steps. Entries are keyed on the identity of the model and tools, the
+# effective Configuration values and the prompt date, so a configuration or
+# date change builds a new entry; the least recently used ones are dropped.
+_BUILD_CACHE_SIZE = 64
+_BUILD_CACHE: "OrderedDict[Hashable, tuple[Any, Any]]" = OrderedDict()
+
+
+def _cached_build(key: Hashable, refs: Any, build: Callable[[], Any]) -> Any:
+    """
+    Return the artifact cached under `key`, building it on a miss. `refs` holds
+    the objects whose ids are part of the key, keeping those ids valid.
+    """
+    if key in _BUILD_CACHE:
+        _BUILD_CACHE.move_to_end(key)
+        return _BUILD_CACHE[key][1]
+    artifact = build()
+    _BUILD_CACHE[key] = (refs, artifact)
+    if len(_BUILD_CACHE) > _BUILD_CACHE_SIZE:
+        _BUILD_CACHE.popitem(last=False)
+    return artifact
+
+
+def _build_key(
+    kind: str, model: BaseChatModel, tools: List[BaseTool], config: RunnableConfig
+) -> tuple:
+    configuration = Configuration.from_runnable_config(config)
+    return (
+        kind,
+        id(model),
+        tuple(id(t) for t in tools),
+        astuple(configuration),
+        get_formatted_date(config),
+    )
+
+
+def get_bound_model(role: str, tool_names: List[str], config: RunnableConfig):
+    """The `role` chat model with the named tools bound, reused across steps."""
+    model = get_model(role, config)
+    tools = [get_tool(name, config) for name in tool_names]
+    return _cached_build(
+        _build_key("bound_model", model, tools, config),
+        (model, tools),
+        lambda: model.bind_tools(tools),
+    )
+
+
+def get_researcher_agent(config: RunnableConfig):
+    """The compiled researcher ReAct agent, reused across `start_research` calls."""
+    model = get_model("researcher", config)
+    tools = [
+        get_tool(name, config)
+        for name in (
+            "web_search",
+            "web_search_batch",
+            "web_extract",
+            "web_extract_batch",
+            "search_notes",
+        )
+    ]
+    key = _build_key("researcher", model, tools, config)
+    return _cached_build(
+        key,
+        (model, tools),
+        lambda: create_agent(
+            model=model,
+            tools=tools,
+            system_prompt=prompts.RESEARCHER_SYSTEM_PROMPT.format(date=key[-1]),
+        ),
+    )
+
+
 @tool
 async def start_research(research_proposal: str, config: RunnableConfig) -> str:
     """
@@ -92,13 +258,7 @@ async def start_research(research_proposal: str, config: RunnableConfig) -> str:
     Returns:
         Synthesized research findings.
     """
-    react_agent = create_agent(
-        model=get_model(),
-        tools=[get_tool("web_search", config), get_tool("web_extract", config)],
-        system_prompt=prompts.RESEARCHER_SYSTEM_PROMPT.format(
-            date=get_formatted_date()
-        ),
-    )
+    react_agent = get_researcher_agent(config)
     output_state = await react_agent.ainvoke(
         {"messages": [HumanMessage(content=research_proposal)]},
         config=config,
@@ -123,19 +283,43 @@ async def write_report(additional_instructions: Optional[str] = None):
     )
 
 
+def _web_tools(config: RunnableConfig) -> Dict[str, BaseTool]:
+    configuration = Configuration.from_runnable_config(config)
+    tools = {
+        "web_search": get_search_tool(configuration),
+        "web_search_batch": web_search_batch,
+        "web_extract": web_extract,
+        "web_extract_batch": web_extract_batch,
+    }
+    cassette = get_cassette(configuration)
+    if cassette is not None:
+        tools = {name: wrap_tool(tool, cassette) for name, tool in tools.items()}
+    if configuration.corpus_path:
+        tools = {name: wrap_corpus_tool(tool) for name, tool in tools.items()}
+    if configuration.prefetch_enabled:
+        extract_tool = tools["web_extract"]
+        for name in ("web_search", "web_search_batch"):
+            tools[name] = wrap_search_tool(tools[name], extract_tool)
+        tools["web_extract"] = wrap_extract_tool(extract_tool)
+    # Everything the agents see is also added to the session's notes index.
+    return {name: wrap_indexing_tool(tool) for name, tool in tools.items()}
+
+
 def get_tool(name: str, config: RunnableConfig) -> BaseTool:
-    if name == "web_search":
-        return get_search_tool(Configuration.from_runnable_config(config))
+    if name in {"web_search", "web_search_batch", "web_extract", "web_extract_batch"}:
+        return _web_tools(config)[name]
+    elif name == "search_notes":
+        return search_notes
     elif name == "start_deep_research":
         return start_deep_research
+    elif name == "recall_report":
+        return recall_report
     elif name == "dummy_call_deep_research":
         return dummy_call_deep_research
     elif name == "start_research":
         return start_research
     elif name == "write_report":
         return write_report
-    elif name == "web_extract":
-        return web_extract
     else:
         raise ValueError(f"Invalid tool name: {name}")
 
@@ -150,20 +334,33 @@ def _with_node_id(config: RunnableConfig, node_id: Optional[str]) -> RunnableCon
 
 async def node_general_assistant(state: AgentState, config: RunnableConfig):
     system_prompt = prompts.GENERAL_ASSISTANT_SYSTEM_PROMPT.format(
-        date=get_formatted_date()
+        date=get_formatted_date(config)
     )
-    messages = [
-        SystemMessage(content=system_prompt),
-        *state.get("general_assistant_messages", []),
+    configuration = Configuration.from_runnable_config(config)
+    history = state.get("general_assistant_messages", [])
+    tool_names = [
+        "web_search",
+        "web_search_batch",
+        "web_extract",
+        "web_extract_batch",
+        "start_deep_research",
     ]
+    summaries_update = {}
+    if configuration.general_assistant_context_tokens:
+        summaries = state.get("report_summaries") or {}
+        history, new_summaries = await window_messages(
+            history,
+            summaries,
+            get_model("condenser", config),
+            configuration.general_assistant_context_tokens,
+            configuration.general_assistant_keep_turns,
+        )
+        if new_summaries:
+            summaries_update = {"report_summaries": {**summaries, **new_summaries}}
+        tool_names.append("recall_report")
+    messages = [SystemMessage(content=system_prompt), *history]
 
-    general_assistant_model = get_model().bind_tools(
-        [
-            get_tool("web_search", config),
-            get_tool("web_extract", config),
-            get_tool("start_deep_research", config),
-        ]
-    )
+    general_assistant_model = get_bound_model("general_assistant", tool_names, config)
 
     response = await general_assistant_model.ainvoke(messages)
 
@@ -203,16 +400,22 @@ async def node_general_assistant(state: AgentState, config: RunnableConfig):
                     update={
                         "general_assistant_messages": [response],
                         "deep_research_tool_call_id": tool_call["id"],
+                        **summaries_update,
                         **command.update,
                     },
                     goto=command.goto,
                 )
 
+        def _tool_input(tool_call):
+            if tool_call["name"] == "recall_report":
+                return {**tool_call["args"], "state": state}
+            return tool_call["args"]
+
         # general tool calls like web_search
         results = await asyncio.gather(
             *[
                 get_tool(tool_call["name"], config).ainvoke(
-                    tool_call["args"], config=config
+                    _tool_input(tool_call), config=config
                 )
                 for tool_call in tool_calls
             ]
@@ -225,20 +428,26 @@ async def node_general_assistant(state: AgentState, config: RunnableConfig):
         ]
 
         return Command(
-            update={"general_assistant_messages": [response, *result_msgs]},
+            update={
+                "general_assistant_messages": [response, *result_msgs],
+                **summaries_update,
+            },
             goto="general_assistant",
         )
 
     else:  # no tool calls, clarification/direct answer
         # plain response, end this invocation with the response
+        await close_prefetcher(config)
         return Command(
-            update={"general_assistant_messages": [response]},
+            update={"general_assistant_messages": [response], **summaries_update},
             goto=END,
         )
 
 
 async def node_planner(state: AgentState, config: RunnableConfig):
-    system_prompt = prompts.PLANNER_SYSTEM_PROMPT.format(date=get_formatted_date())
+    system_prompt = prompts.PLANNER_SYSTEM_PROMPT.format(
+        date=get_formatted_date(config)
+    )
     existing_history = state.get("planner_messages", [])
     seed_messages: List[AnyMessage] = []
     if not existing_history:
@@ -247,21 +456,84 @@ async def node_planner(state: AgentState, config: RunnableConfig):
                 content=f"<user_query>\n{state.get('deep_research_query','')}\n</user_query>\n"
             )
         ]
-    planner_history = [*existing_history, *seed_messages]
+
+    configuration = Configuration.from_runnable_config(config)
+    summary = state.get("planner_summary")
+    summary_update = {}
+    threshold = configuration.planner_compaction_tokens
+    if (
+        threshold
+        and estimate_tokens(planner_view(existing_history, summary)) > threshold
+    ):
+        new_summary = await compact_planner_history(
+            existing_history,
+            summary,
+            get_model("condenser", config),
+            configuration.planner_compaction_keep_rounds,
+        )
+        if new_summary is not None:
+            summary = new_summary
+            summary_update = {"planner_summary": new_summary}
+    record_savings(existing_history, summary)
+
+    planner_history = [*planner_view(existing_history, summary), *seed_messages]
     messages = [
         SystemMessage(content=system_prompt),
         *planner_history,
     ]
 
-    planner_model = get_model().bind_tools(
-        [
-            get_tool("web_search", config),
-            get_tool("web_extract", config),
-            get_tool("start_research", config),
-            get_tool("write_report", config),
-        ]
-    )
-    response = await planner_model.ainvoke(messages)
+    novelty = latest_round_novelty(existing_history)
+    low_novelty = False
+    if novelty is not None:
+        logger.info(f"planner: {novelty.describe()}")
+        low_novelty = (
+            configuration.novelty_stop != NoveltyStop.OFF
+            and novelty.round >= configuration.novelty_min_rounds
+            and novelty.score < configuration.novelty_threshold
+        )
+
+    if low_novelty and configuration.novelty_stop == NoveltyStop.FORCE:
+        logger.info("planner: novelty below threshold, forcing write_report")
+        response = AIMessage(
+            content=f"Stopping research: {novelty.describe()} is below the "
+            f"threshold of {configuration.novelty_threshold:.2f}.",
+            tool_calls=[
+                {
+                    "name": "write_report",
+                    "args": {},
+                    "id": f"call_{uuid.uuid4().hex[:24]}",
+                    "type": "tool_call",
+                }
+            ],
+        )
+    else:
+        if low_novelty:
+            # Shown to the planner for this call only; not kept in state.
+            messages.append(
+                HumanMessage(
+                    content=prompts.PLANNER_LOW_NOVELTY_HINT.format(
+                        new_sources=novelty.new_sources,
+                        sources=novelty.sources,
+                        content=novelty.content,
+                        score=novelty.score,
+                        threshold=configuration.novelty_threshold,
+                    )
+                )
+            )
+        planner_model = get_bound_model(
+            "planner",
+            [
+                "web_search",
+                "web_search_batch",
+                "web_extract",
+                "web_extract_batch",
+                "search_notes",
+                "start_research",
+                "write_report",
+            ],
+            config,
+        )
+        response = await planner_model.ainvoke(messages)
 
     tool_calls = response.tool_calls
     if tool_calls:
@@ -283,6 +555,7 @@ async def node_planner(state: AgentState, config: RunnableConfig):
                 update={
                     "planner_messages": [*seed_messages, response],
                     "report_writer_node_id": writer_node_id,
+                    **summary_update,
                     **command.update,
                 },
                 goto=command.goto,
@@ -307,21 +580,75 @@ async def node_planner(state: AgentState, config: RunnableConfig):
             for result, tool_call in zip(results, tool_calls)
         ]
         return Command(
-            update={"planner_messages": [*seed_messages, response, *result_msgs]},
+            update={
+                "planner_messages": [*seed_messages, response, *result_msgs],
+                **summary_update,
+            },
             goto="planner",
         )
     else:
         logger.warning(
             f"planner: No tool calls! Ending planner with response: {response.content}"
         )
+        await close_prefetcher(config)
         return Command(
-            update={"planner_messages": [*seed_messages, response]}, goto=END
+            update={"planner_messages": [*seed_messages, response], **summary_update},
+            goto=END,
         )
 
 
-async def node_write_report(state: AgentState, config: RunnableConfig):
-    report_writer_model = get_model()
+# Rounds of `search_notes` lookups the writer may make before it must answer.
+WRITER_MAX_NOTE_LOOKUPS = 3
+
+
+async def _writer_lookup(
+    tool_call: Dict[str, Any], config: RunnableConfig, writer_config: RunnableConfig
+) -> ToolMessage:
+    """Run one of the report writer's tool calls; only `search_notes` is allowed."""
+    if tool_call["name"] != "search_notes":
+        logger.warning(f"write_report: refused tool call {tool_call['name']}")
+        return ToolMessage(
+            content=f"Error: {tool_call['name']} is not available, only search_notes.",
+            tool_call_id=tool_call["id"],
+            name=tool_call["name"],
+            status="error",
+        )
+    result = await get_tool("search_notes", config).ainvoke(
+        tool_call["args"], config=writer_config
+    )
+    return ToolMessage(
+        content=result, tool_call_id=tool_call["id"], name=tool_call["name"]
+    )
+
 
+def _lookups_as_text(lookups: List[AnyMessage]) -> List[AnyMessage]:
+    """
+    The writer's lookup rounds as one plain message, in the trajectory's
+    `<call_*>`/`<result_*>` format, for the final call that has no tools bound.
+    """
+    if not lookups:
+        return []
+    text = ""
+    for msg in lookups:
+        if msg.type == "ai":
+            if msg.content:
+                text += f"<reasoning>\n{msg.content}\n</reasoning>\n"
+            for tool_call in msg.tool_calls:
+                text += (
+                    f"<call_{tool_call['name']}>\n{json.dumps(tool_call['args'])}\n"
+                    f"</call_{tool_call['name']}>\n"
+                )
+        else:
+            text += f"<result_{msg.name}>\n{msg.content}\n</result_{msg.name}>\n"
+    return [
+        HumanMessage(
+            content=f"<notes_lookups>\n{text}</notes_lookups>\n"
+            "No more lookups are possible. Write the report now."
+        )
+    ]
+
+
+async def node_write_report(state: AgentState, config: RunnableConfig):
     # synthesize the research trajectory
     research_trajectory = ""
     tool_call_to_results = []
@@ -367,16 +694,37 @@ async def node_write_report(state: AgentState, config: RunnableConfig):
     messages = [
         SystemMessage(
             content=prompts.REPORT_WRITER_SYSTEM_PROMPT.format(
-                date=get_formatted_date()
+                date=get_formatted_date(config)
             )
         ),
         HumanMessage(content=research_trajectory),
     ]
 
     writer_node_id = state.get("report_writer_node_id")
-    response = await report_writer_model.ainvoke(
-        messages, config=_with_node_id(config, writer_node_id)
-    )
+    writer_config = _with_node_id(config, writer_node_id)
+    lookups: List[AnyMessage] = []
+    for lookup in range(WRITER_MAX_NOTE_LOOKUPS + 1):
+        if lookup < WRITER_MAX_NOTE_LOOKUPS:
+            report_writer_model = get_bound_model("writer", ["search_notes"], config)
+            request = messages + lookups
+        else:
+            # The last round is unbound so the writer has to produce the
+            # report; it gets the lookups as text, not as tool messages.
+            report_writer_model = get_model("writer", config)
+            request = messages + _lookups_as_text(lookups)
+        response = await report_writer_model.ainvoke(request, config=writer_config)
+        if not response.tool_calls:
+            break
+        results = await asyncio.gather(
+            *[
+                _writer_lookup(tool_call, config, writer_config)
+                for tool_call in response.tool_calls
+            ]
+        )
+        lookups += [response, *results]
+
+    # Research is over; drop prefetches nobody will read.
+    await close_prefetcher(config)
 
     prev_tool_call_id = state["deep_research_tool_call_id"]
     assistant_tool_result = ToolMessage(
@@ -390,12 +738,17 @@ async def node_write_report(state: AgentState, config: RunnableConfig):
             "final_report": response.content,
             "general_assistant_messages": [assistant_tool_result],
             "planner_messages": [],
+            "planner_summary": None,
         },
         goto="general_assistant",
     )
 
 
-def get_graph():
+def get_graph(checkpointer: Optional[BaseCheckpointSaver] | bool = None):
+    """
+    Compile the research graph. An in-memory checkpointer is used unless one is
+    given; `checkpointer=False` compiles without persistence (benchmarks only).
+    """
     graph_builder = StateGraph(AgentState)
     graph_builder.add_node("general_assistant", node_general_assistant)
     graph_builder.add_node("planner", node_planner)
@@ -403,7 +756,12 @@ def get_graph():
 
     graph_builder.add_edge(START, "general_assistant")
 
-    return graph_builder.compile(checkpointer=InMemorySaver())
+    if checkpointer is None:
+        checkpointer = InMemorySaver()
+    graph = graph_builder.compile(checkpointer=checkpointer or None)
+    # Model and tool latency is measured by a single callback handler that
+    # sees every chat model and tool run, including nested researcher agents.
+    return graph.with_config(callbacks=[MetricsCallbackHandler()])
 
 
 async def main(initial_user_query: Optional[str] = None):
@@ -0,0 +1,208 @@
+"""
+Hedged chat model requests.
+
+With `HEDGE_ENABLED=1`, each role's model is wrapped in `HedgedChatModel`.
+If a call has not completed (or, when streaming, produced its first chunk)
+within the `hedge_percentile` latency recently observed for that role, a
+second identical request is sent; the first to succeed is used and the other
+is cancelled. Hedges draw from a budget that earns `hedge_budget` of a
+request per call, so under load at most that share of extra requests is sent
+and a slow provider cannot be asked for twice the work. No hedge is sent
+until `hedge_min_samples` latencies have been seen for the role.
+"""
+
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from loguru import logger
+
+from research_workbench.config import Configuration
+from research_workbench.metrics import REGISTRY
+from research_workbench.wrappers import WrappedChatModel, to_chunk
+
+# Latencies kept per role and call kind for the deadline percentile.
+LATENCY_WINDOW = 200
+# Unused hedge credit is capped so an idle period cannot fund a burst.
+MAX_HEDGE_CREDIT = 5.0
+
+MODEL_HEDGES = REGISTRY.counter(
+    "research_workbench_model_hedges_total",
+    "Hedged chat model requests by role and outcome (sent, won, lost, "
+    "skipped_budget).",
+    ("role", "outcome"),
+)
+
+
+class Hedger:
+    """Latency percentiles and the hedge budget of one model role."""
+
+    def __init__(self, role: str, configuration: Configuration):
+        self.role = role
+        self.percentile = configuration.hedge_percentile
+        self.budget = configuration.hedge_budget
+        self.min_samples = configuration.hedge_min_samples
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._credit = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            window = self._latencies.setdefault(kind, deque(maxlen=LATENCY_WINDOW))
+            window.append(seconds)
+
+    def deadline(self, kind: str) -> Optional[float]:
+        """Seconds to wait before hedging a `kind` call, or None to never hedge."""
+        with self._lock:
+            self._credit = min(self._credit + self.budget, MAX_HEDGE_CREDIT)
+            window = self._latencies.get(kind)
+            if window is None or len(window) < self.min_samples:
+                return None
+            ordered = sorted(window)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[index]
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            if self._credit < 1.0:
+                MODEL_HEDGES.inc(role=self.role, outcome="skipped_budget")
+                return False
+            self._credit -= 1.0
+        MODEL_HEDGES.inc(role=self.role, outcome="sent")
+        return True
+
+
+_HEDGERS: Dict[str, Hedger] = {}
+
+
+def get_hedger(role: str, configuration: Configuration) -> Hedger:
+    if role not in _HEDGERS:
+        _HEDGERS[role] = Hedger(role, configuration)
+    return _HEDGERS[role]
+
+
+async def _cancel(task: "asyncio.Task") -> None:
+    task.cancel()
+    with contextlib.suppress(BaseException):
+        await task
+
+
+async def _race(hedger: Hedger, kind: str, start: Any) -> Tuple[Any, Any]:
+    """
+    Await the attempt made by `start()`, which returns a (handle, awaitable)
+    pair, and start a second one if the first misses the deadline. Returns
+    the first successful result and the handle of the attempt that made it.
+    """
+    began = time.perf_counter()
+    attempts: Dict["asyncio.Future", Any] = {}
+    try:
+        # Both attempts start inside the try, so a caller cancelled while
+        # waiting for the deadline cancels them too.
+        handle, awaitable = start()
+        primary = asyncio.ensure_future(awaitable)
+        attempts[primary] = handle
+        deadline = hedger.deadline(kind)
+        if deadline is not None:
+            done, _ = await asyncio.wait({primary}, timeout=deadline)
+            if not done and hedger.try_hedge():
+                logger.debug(f"hedging: {hedger.role} {kind} exceeded {deadline:.2f}s")
+                handle, awaitable = start()
+                attempts[asyncio.ensure_future(awaitable)] = handle
+
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if len(attempts) > 1:
+                        outcome = "won" if task is not primary else "lost"
+                        MODEL_HEDGES.inc(role=hedger.role, outcome=outcome)
+                    hedger.observe(kind, time.perf_counter() - began)
+                    return task.result(), attempts[task]
+                error = task.exception()
+        raise error
+    finally:
+        for task in attempts:
+            if not task.done():
+                await _cancel(task)
+
+
+class HedgedChatModel(WrappedChatModel):
+    """Sends a duplicate request when the wrapped model is slower than usual."""
+
+    inner: BaseChatModel
+    hedger: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        model = self._bound_inner(kwargs)
+
+        def start():
+            # The wrapper already owns this run; keep inner calls out of callbacks.
+            return None, model.ainvoke(messages, stop=stop, config={"callbacks": []})
+
+        message, _ = await _race(self.hedger, "total", start)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        model = self._bound_inner(kwargs)
+        streams = []
+
+        def start():
+            stream = model.astream(
+                messages, stop=stop, config={"callbacks": []}
+            ).__aiter__()
+            streams.append(stream)
+            return stream, stream.__anext__()
+
+        # Race to the first chunk, then stream the winner only.
+        try:
+            first, stream = await _race(self.hedger, "first_chunk", start)
+        except StopAsyncIteration:
+            return
+        for other in streams:
+            if other is not stream:
+                with contextlib.suppress(BaseException):
+                    await other.aclose()
+        async for chunk in _chain(first, stream):
+            if not isinstance(chunk, AIMessageChunk):
+                # Models without native streaming yield one complete message.
+                chunk = to_chunk(chunk)
+            yield ChatGenerationChunk(message=chunk)
+
+
+async def _chain(first: Any, rest: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    yield first
+    async for item in rest:
+        yield item
+
+
+def wrap_hedged(
+    model: BaseChatModel, role: str, configuration: Configuration
+) -> BaseChatModel:
+    return HedgedChatModel(inner=model, hedger=get_hedger(role, configuration))
@@ -0,0 +1,240 @@
+"""
+Event loop lag sampling and stall detection.
+
+`LoopMonitor` runs two probes against the event loop it is started on:
+
+- a sampler task that sleeps `interval` seconds and records how late it
+  wakes up (the loop's scheduling lag), and
+- a watchdog thread that notices when the sampler is overdue by more than
+  `stall_threshold` and captures the loop thread's stack at that moment, so
+  the code holding the loop is named while it still holds it.
+
+Each stall is attributed to the innermost coroutine on the captured stack
+(the async function that made the blocking call). Lag, stall counts and
+stall time per coroutine are exported on /metrics, and a summary of the
+worst offenders is logged every `summary_interval` seconds.
+
+Debug mode (for load tests) samples more often, logs every stall with its
+stack, and turns on asyncio's own debug mode, whose slow-callback warnings
+(`slow_callback_duration`) are forwarded to the log.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from inspect import CO_ASYNC_GENERATOR, CO_COROUTINE
+from types import FrameType
+from typing import Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from research_workbench.metrics import REGISTRY
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Frames kept from the captured stack, innermost last.
+STACK_DEPTH = 12
+# Lag samples kept for the percentiles in the log summary.
+SUMMARY_WINDOW = 2000
+
+LOOP_LAG = REGISTRY.histogram(
+    "research_workbench_event_loop_lag_seconds",
+    "How late the event loop ran a timer, sampled periodically.",
+    buckets=LAG_BUCKETS,
+)
+LOOP_LAG_MAX = REGISTRY.gauge(
+    "research_workbench_event_loop_lag_max_seconds",
+    "Largest event loop lag since the last log summary.",
+)
+LOOP_STALLS = REGISTRY.counter(
+    "research_workbench_event_loop_stalls_total",
+    "Times the event loop was blocked longer than the stall threshold, by the "
+    "coroutine running when it was caught.",
+    ("coroutine",),
+)
+LOOP_STALL_SECONDS = REGISTRY.counter(
+    "research_workbench_event_loop_stall_seconds_total",
+    "Time the event loop spent blocked in stalls, by coroutine.",
+    ("coroutine",),
+)
+
+
+@dataclass
+class Stall:
+    coroutine: str
+    stack: List[str]
+    # The sampler wake-up this stall delayed, used to match its duration.
+    due: float
+    seconds: float = 0.0
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def blocking_coroutine(frame: Optional[FrameType]) -> str:
+    """
+    The innermost coroutine or async generator on the stack of `frame`,
+    skipping asyncio's own (a stall "in" `Queue.get` belongs to its caller).
+    """
+    innermost = frame
+    while frame is not None:
+        is_async = frame.f_code.co_flags & (CO_COROUTINE | CO_ASYNC_GENERATOR)
+        module = frame.f_globals.get("__name__", "")
+        if is_async and not module.startswith("asyncio."):
+            return _frame_name(frame)
+        frame = frame.f_back
+    # A plain callback (call_soon, a transport, a done callback).
+    return _frame_name(innermost) if innermost is not None else "unknown"
+
+
+class _AsyncioLogHandler(logging.Handler):
+    """Forwards asyncio's debug-mode warnings into loguru."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logger.log(record.levelname, "asyncio: {}", record.getMessage())
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        stall_threshold: float = 0.1,
+        interval: float = 0.1,
+        summary_interval: float = 60.0,
+        debug: bool = False,
+    ):
+        self.stall_threshold = stall_threshold
+        # Debug mode samples often enough to see short stalls in the histogram.
+        self.interval = min(interval, 0.01) if debug else interval
+        self.summary_interval = summary_interval
+        self.debug = debug
+        self._lags: Deque[float] = deque(maxlen=SUMMARY_WINDOW)
+        self._max_lag = 0.0
+        self._due = 0.0
+        self._pending: Optional[Stall] = None
+        # coroutine -> (stalls, seconds) since the last summary.
+        self._stalls: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._loop_thread: Optional[int] = None
+        self._tasks: List[asyncio.Task] = []
+        self._watchdog: Optional[threading.Thread] = None
+        self._log_handler: Optional[logging.Handler] = None
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+        loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stopped.clear()
+        if self.debug:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.stall_threshold
+            self._log_handler = _AsyncioLogHandler(logging.WARNING)
+            logging.getLogger("asyncio").addHandler(self._log_handler)
+        self._tasks = [
+            asyncio.create_task(self._sample(), name="loop-monitor-sampler"),
+            asyncio.create_task(self._summarize(), name="loop-monitor-summary"),
+        ]
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor-watchdog", daemon=True
+        )
+        self._watchdog.start()
+        logger.info(
+            f"loop monitor: stall threshold {self.stall_threshold * 1000:.0f}ms"
+            + (", debug mode" if self.debug else "")
+        )
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._log_handler is not None:
+            logging.getLogger("asyncio").removeHandler(self._log_handler)
+            self._log_handler = None
+        self._log_summary()
+
+    async def _sample(self) -> None:
+        while True:
+            due = time.perf_counter() + self.interval
+            self._due = due
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - due, 0.0)
+            LOOP_LAG.observe(lag)
+            if lag > self._max_lag:
+                self._max_lag = lag
+                LOOP_LAG_MAX.set(lag)
+            self._lags.append(lag)
+            with self._lock:
+                stall, self._pending = self._pending, None
+            if stall is not None and stall.due == due:
+                self._finish(stall, lag)
+
+    def _watch(self) -> None:
+        # Poll at a fraction of the threshold so a stall is caught while the
+        # offending code is still on the stack.
+        poll = max(self.stall_threshold / 4, 0.005)
+        while not self._stopped.wait(poll):
+            due = self._due
+            if not due or time.perf_counter() - due < self.stall_threshold:
+                continue
+            with self._lock:
+                if self._pending is not None and self._pending.due == due:
+                    continue
+            frame = sys._current_frames().get(self._loop_thread)
+            stall = Stall(
+                coroutine=blocking_coroutine(frame),
+                stack=traceback.format_stack(frame, limit=STACK_DEPTH),
+                due=due,
+            )
+            del frame
+            with self._lock:
+                self._pending = stall
+
+    def _finish(self, stall: Stall, seconds: float) -> None:
+        stall.seconds = seconds
+        count, total = self._stalls.get(stall.coroutine, (0, 0.0))
+        self._stalls[stall.coroutine] = (count + 1, total + seconds)
+        LOOP_STALLS.inc(coroutine=stall.coroutine)
+        LOOP_STALL_SECONDS.inc(seconds, coroutine=stall.coroutine)
+        if self.debug:
+            logger.warning(
+                f"loop monitor: event loop blocked {seconds * 1000:.0f}ms in "
+                f"{stall.coroutine}\n{''.join(stall.stack).rstrip()}"
+            )
+
+    async def _summarize(self) -> None:
+        while True:
+            await asyncio.sleep(self.summary_interval)
+            self._log_summary()
+
+    def _log_summary(self) -> None:
+        lags = sorted(self._lags)
+        self._lags.clear()
+        stalls, self._stalls = self._stalls, {}
+        max_lag, self._max_lag = self._max_lag, 0.0
+        LOOP_LAG_MAX.set(0.0)
+        if not lags:
+            return
+        p50 = lags[len(lags) // 2] * 1000
+        p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000
+        message = (
+            f"loop monitor: lag p50={p50:.1f}ms p99={p99:.1f}ms "
+            f"max={max_lag * 1000:.1f}ms, {sum(c for c, _ in stalls.values())} stalls"
+        )
+        if not stalls:
+            logger.debug(message)
+            return
+        worst = sorted(stalls.items(), key=lambda item: -item[1][1])[:5]
+        offenders = ", ".join(
+            f"{name} ({count}x, {seconds * 1000:.0f}ms)"
+            for name, (count, seconds) in worst
+        )
+        logger.warning(f"{message}; worst: {offenders}")
@@ -0,0 +1,311 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+DEFAULT_SIZE_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+# Graph node -> model role. Researchers run inside a nested ReAct agent whose
+# graph nodes are named "model"/"tools", so they are recognized by node_id.
+_NODE_ROLES = {
+    "general_assistant": "general_assistant",
+    "planner": "planner",
+    "write_report": "writer",
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{k}="{_escape(str(v))}"' for k, v in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self.samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        super().__init__(name, documentation, tuple(labelnames))
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return [
+            f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(v)}"
+            for key, v in items
+        ]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        super().__init__(name, documentation, tuple(labelnames))
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Compute the (unlabelled) value lazily at scrape time."""
+        self._function = function
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+        with self._lock:
+            items = list(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return [
+            f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(v)}"
+            for key, v in items
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, tuple(labelnames))
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label key -> (bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, (list(c), s, n)) for k, (c, s, n) in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels([*labels, ("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(
+                f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            )
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+MODEL_LATENCY = REGISTRY.histogram(
+    "research_workbench_model_latency_seconds",
+    "Chat model call latency by role.",
+    ("role", "status"),
+)
+MODEL_TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    "research_workbench_model_time_to_first_token_seconds",
+    "Time from chat model call start to the first streamed token, by role.",
+    ("role",),
+)
+TOOL_LATENCY = REGISTRY.histogram(
+    "research_workbench_tool_latency_seconds",
+    "Tool call latency by tool name.",
+    ("tool", "status"),
+)
+
+
+def role_from_metadata(metadata: Optional[Dict[str, Any]]) -> str:
+    metadata = metadata or {}
+    node_id = metadata.get("node_id") or ""
+    if node_id.startswith("researcher-"):
+        return "researcher"
+    if node_id.startswith("writer-"):
+        return "writer"
+    return _NODE_ROLES.get(metadata.get("langgraph_node"), "other")
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Measures model and tool latency for every run inside the graph.
+    Attached once to the compiled graph so node code stays free of timing logic.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        # run_id -> (label, start time, first token seen)
+        self._model_runs: Dict[UUID, Tuple[str, float, bool]] = {}
+        self._tool_runs: Dict[UUID, Tuple[str, float]] = {}
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ):
+        self._model_runs[run_id] = (
+            role_from_metadata(metadata),
+            time.perf_counter(),
+            False,
+        )
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._model_runs[run_id] = (
+            role_from_metadata(metadata),
+            time.perf_counter(),
+            False,
+        )
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._model_runs.get(run_id)
+        if run is None or run[2]:
+            return
+        role, start, _ = run
+        MODEL_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start, role=role)
+        self._model_runs[run_id] = (role, start, True)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish_model(run_id, "ok")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish_model(run_id, "error")
+
+    def _finish_model(self, run_id: UUID, status: str) -> None:
+        run = self._model_runs.pop(run_id, None)
+        if run is None:
+            return
+        role, start, _ = run
+        MODEL_LATENCY.observe(time.perf_counter() - start, role=role, status=status)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._tool_runs[run_id] = (name, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish_tool(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish_tool(run_id, "error")
+
+    def _finish_tool(self, run_id: UUID, status: str) -> None:
+        run = self._tool_runs.pop(run_id, None)
+        if run is None:
+            return
+        name, start = run
+        TOOL_LATENCY.observe(time.perf_counter() - start, tool=name, status=status)
@@ -0,0 +1,176 @@
+"""
+Session-scoped passage index over everything the web tools returned.
+
+Search results and extracted pages are split into overlapping passages and
+added to an in-process BM25 index as soon as a tool returns them, so later
+steps of the same graph thread (the planner, other researchers, the report
+writer) can look them up with the `search_notes` tool instead of searching
+or extracting again. Inserts are incremental; there is no rebuild step.
+"""
+
+import math
+import re
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from loguru import logger
+
+from research_workbench.wrappers import WrappedTool, cached_wrapper, thread_id
+
+PASSAGE_WORDS = 120
+PASSAGE_OVERLAP = 30
+MAX_SESSIONS = 32
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t.lower() for t in _TOKEN.findall(text)]
+
+
+@dataclass
+class Passage:
+    url: str
+    title: str
+    text: str
+    source: str
+
+
+class PassageIndex:
+    """An append-only BM25 index of passages."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.passages: List[Passage] = []
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._lengths: List[int] = []
+        self._total_length = 0
+        self._seen: Set[Tuple[str, str]] = set()
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def _add_passage(self, passage: Passage) -> bool:
+        key = (passage.url, passage.text)
+        if key in self._seen:
+            return False
+        tokens = tokenize(passage.text)
+        if not tokens:
+            return False
+        self._seen.add(key)
+        passage_id = len(self.passages)
+        self.passages.append(passage)
+        for token in tokens:
+            postings = self._postings[token]
+            postings[passage_id] = postings.get(passage_id, 0) + 1
+        self._lengths.append(len(tokens))
+        self._total_length += len(tokens)
+        return True
+
+    def add_document(self, url: str, title: str, text: str, source: str) -> int:
+        """Chunk `text` into overlapping passages; returns how many were new."""
+        words = text.split()
+        step = PASSAGE_WORDS - PASSAGE_OVERLAP
+        added = 0
+        for start in range(0, max(len(words) - PASSAGE_OVERLAP, 1), step):
+            chunk = " ".join(words[start : start + PASSAGE_WORDS])
+            added += self._add_passage(Passage(url, title, chunk, source))
+        return added
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[float, Passage]]:
+        if not self.passages:
+            return []
+        n = len(self.passages)
+        avg_length = self._total_length / n
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(tokenize(query)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for passage_id, tf in postings.items():
+                norm = 1 - self.b + self.b * self._lengths[passage_id] / avg_length
+                scores[passage_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [(score, self.passages[i]) for i, score in ranked[:k]]
+
+
+_SESSIONS: "OrderedDict[str, PassageIndex]" = OrderedDict()
+
+
+def get_notes_index(config: Optional[RunnableConfig]) -> PassageIndex:
+    """The passage index of this run's graph thread (bounded LRU of threads)."""
+    thread = thread_id(config)
+    if thread in _SESSIONS:
+        _SESSIONS.move_to_end(thread)
+    else:
+        _SESSIONS[thread] = PassageIndex()
+        if len(_SESSIONS) > MAX_SESSIONS:
+            _SESSIONS.popitem(last=False)
+    return _SESSIONS[thread]
+
+
+def _field(block: str, name: str) -> Optional[str]:
+    match = re.search(rf"^{name}: (.*)$", block, re.MULTILINE)
+    return match.group(1).strip() if match else None
+
+
+def documents_from_tool_output(
+    output: Any, url: Optional[str] = None
+) -> List[Tuple[str, str, str]]:
+    """
+    (url, title, content) triples from a web tool result: raw Tavily
+    responses, or the `Title:/URL:/Content:` blocks separated by `----`
+    that the search and extract tools format.
+    """
+    if isinstance(output, dict):
+        return [
+            (r["url"], r.get("title", ""), r.get("content", ""))
+            for r in output.get("results", [])
+            if r.get("url")
+        ]
+    if not isinstance(output, str):
+        return []
+    documents = []
+    for block in output.split("\n----\n"):
+        if "Content: " not in block or block.lstrip().startswith("Error"):
+            continue
+        block_url = _field(block, "URL") or url
+        if not block_url:
+            continue
+        content = block.split("Content: ", 1)[1]
+        documents.append((block_url, _field(block, "Title") or "", content))
+    return documents
+
+
+class IndexingTool(WrappedTool):
+    """Runs the wrapped web tool and indexes what it returned."""
+
+    async def _arun(
+        self,
+        config: RunnableConfig,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+        **kwargs: Any,
+    ) -> Any:
+        result = await self._call_inner(kwargs, config)
+        try:
+            index = get_notes_index(config)
+            added = sum(
+                index.add_document(url, title, content, source=self.name)
+                for url, title, content in documents_from_tool_output(
+                    result, kwargs.get("url")
+                )
+            )
+            logger.debug(f"notes: indexed {added} passages from {self.name}")
+        except Exception as e:
+            logger.warning(f"notes: failed to index {self.name} output: {e}")
+        return result
+
+
+def wrap_indexing_tool(tool: BaseTool) -> BaseTool:
+    return cached_wrapper((IndexingTool, id(tool)), lambda: IndexingTool(tool))
@@ -0,0 +1,106 @@
+"""
+Novelty of each planner round's researcher findings.
+
+A round is one planner response that fanned out `start_research` calls plus
+the researcher reports that came back. Its novelty compares those reports
+with every earlier round: the share of cited sources (URLs) not cited before
+and the share of word trigrams not seen before. The planner uses it to hint
+or force an early `write_report` once further rounds stop adding material.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
+
+from langchain_core.messages import AnyMessage
+
+from research_workbench.metrics import REGISTRY
+from research_workbench.notes import tokenize
+
+ROUND_NOVELTY = REGISTRY.histogram(
+    "research_workbench_planner_round_novelty",
+    "Novelty (0-1) of each planner round's researcher findings.",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1.0),
+)
+
+_URL = re.compile(r"https?://[^\s<>()\[\]\"']+")
+
+
+@dataclass
+class RoundNovelty:
+    round: int
+    score: float
+    sources: int
+    new_sources: int
+    content: float
+
+    def describe(self) -> str:
+        return (
+            f"round {self.round} novelty {self.score:.2f} "
+            f"(new sources {self.new_sources}/{self.sources}, "
+            f"new content {self.content:.0%})"
+        )
+
+
+def _sources(text: str) -> Set[str]:
+    return {url.rstrip(".,;:") for url in _URL.findall(text)}
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    tokens = tokenize(_URL.sub(" ", text))
+    return {tuple(tokens[i : i + 3]) for i in range(len(tokens) - 2)}
+
+
+def _is_research_round(message: AnyMessage) -> bool:
+    return message.type == "ai" and any(
+        tc["name"] == "start_research" for tc in message.tool_calls
+    )
+
+
+def research_rounds(planner_messages: List[AnyMessage]) -> List[List[str]]:
+    """The `start_research` results of each completed round, in order."""
+    rounds: List[List[str]] = []
+    for message in planner_messages:
+        if _is_research_round(message):
+            rounds.append([])
+        elif message.type == "tool" and message.name == "start_research" and rounds:
+            rounds[-1].append(str(message.content))
+    return [r for r in rounds if r]
+
+
+def latest_round_novelty(
+    planner_messages: List[AnyMessage],
+) -> Optional[RoundNovelty]:
+    """
+    Novelty of the round that just finished against all earlier ones, or
+    None if the planner's last step was not a research round.
+    """
+    last_ai = next((m for m in reversed(planner_messages) if m.type == "ai"), None)
+    if last_ai is None or not _is_research_round(last_ai):
+        return None
+    rounds = research_rounds(planner_messages)
+    if not rounds:
+        return None
+    seen_sources: Set[str] = set()
+    seen_shingles: Set[Tuple[str, ...]] = set()
+    for earlier in rounds[:-1]:
+        for text in earlier:
+            seen_sources |= _sources(text)
+            seen_shingles |= _shingles(text)
+
+    latest = "\n".join(rounds[-1])
+    sources, shingles = _sources(latest), _shingles(latest)
+    new_sources = len(sources - seen_sources)
+    content = len(shingles - seen_shingles) / len(shingles) if shingles else 0.0
+    if sources:
+        score = 0.5 * new_sources / len(sources) + 0.5 * content
+    else:
+        score = content
+    ROUND_NOVELTY.observe(score)
+    return RoundNovelty(
+        round=len(rounds),
+        score=score,
+        sources=len(sources),
+        new_sources=new_sources,
+        content=content,
+    )
@@ -0,0 +1,260 @@
+"""
+Speculative prefetch of the URLs a researcher is likely to extract next.
+
+With `PREFETCH_ENABLED=1`, every `web_search` result schedules background
+extraction of its top `prefetch_top_k` URLs, with the run's settings. A
+later `web_extract` for one of those URLs awaits the in-flight (or finished)
+prefetch instead of starting from scratch. Prefetches are scoped to the
+graph thread: they share one concurrency cap and byte budget (a download is
+abandoned once it would overrun the budget), expire after `prefetch_ttl`
+seconds, and are cancelled when the run ends (after `write_report`, when the
+general assistant answers, or when the run fails or is cancelled).
+Hit/miss/waste counts are logged at that point and exported on /metrics so
+`prefetch_top_k` can be tuned.
+"""
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from loguru import logger
+
+from research_workbench.config import Configuration
+from research_workbench.metrics import REGISTRY
+from research_workbench.tools.web_extract import PageTooLarge
+from research_workbench.wrappers import WrappedTool, cached_wrapper, thread_id
+
+PREFETCH_EVENTS = REGISTRY.counter(
+    "research_workbench_prefetch_total",
+    "Speculative extraction outcomes (scheduled, hit, miss, wasted, failed, "
+    "skipped_budget, dropped_budget, cancelled).",
+    ("outcome",),
+)
+
+_URL_LINE = re.compile(r"^URL: (\S+)", re.MULTILINE)
+
+
+def urls_from_search_result(result: Any) -> List[str]:
+    """URLs in a search result, in ranking order, for both engines' formats."""
+    if isinstance(result, dict):
+        # Raw Tavily response.
+        return [r["url"] for r in result.get("results", []) if r.get("url")]
+    if isinstance(result, str):
+        return _URL_LINE.findall(result)
+    return []
+
+
+@dataclass
+class _Prefetch:
+    task: asyncio.Task
+    started: float
+    size: int = 0
+    used: bool = False
+
+
+class _OverBudget(Exception):
+    pass
+
+
+@dataclass
+class PrefetchStats:
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, outcome: str) -> None:
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        PREFETCH_EVENTS.inc(outcome=outcome)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.counts.get("hit", 0) + self.counts.get("miss", 0)
+        return self.counts.get("hit", 0) / lookups if lookups else 0.0
+
+
+class Prefetcher:
+    """Background extraction cache for one graph thread."""
+
+    def __init__(self, extract_tool: BaseTool, configuration: Configuration):
+        self.extract_tool = extract_tool
+        self.top_k = configuration.prefetch_top_k
+        self.byte_budget = configuration.prefetch_byte_budget
+        self.ttl = configuration.prefetch_ttl
+        self._semaphore = asyncio.Semaphore(configuration.prefetch_concurrency)
+        self._entries: Dict[str, _Prefetch] = {}
+        self._bytes = 0
+        self.stats = PrefetchStats()
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for url, entry in list(self._entries.items()):
+            if entry.task.done() and now - entry.started > self.ttl:
+                self._release(url)
+
+    def _release(self, url: str) -> None:
+        entry = self._entries.pop(url)
+        self._bytes -= entry.size
+        if not entry.task.done():
+            entry.task.cancel()
+            self.stats.add("cancelled")
+        elif not entry.used and entry.task.exception() is None:
+            self.stats.add("wasted")
+
+    async def _fetch(self, url: str, config: RunnableConfig) -> Any:
+        async with self._semaphore:
+            # The download stops once it would overrun the remaining budget.
+            configurable = {
+                **(config.get("configurable") or {}),
+                "extract_max_bytes": max(self.byte_budget - self._bytes, 0),
+            }
+            try:
+                # Keep background fetches out of the run's callbacks (and the
+                # UI), but with the run's settings.
+                result = await self.extract_tool.ainvoke(
+                    {"url": url},
+                    config={**config, "callbacks": [], "configurable": configurable},
+                )
+            except PageTooLarge:
+                self.stats.add("dropped_budget")
+                raise _OverBudget(url)
+        if isinstance(result, str) and result.startswith("Error"):
+            # Let the researcher's own call retry (or see the error) later.
+            raise RuntimeError(result)
+        size = len(str(result).encode("utf-8"))
+        entry = self._entries.get(url)
+        if entry is not None:
+            if self._bytes + size > self.byte_budget:
+                self.stats.add("dropped_budget")
+                raise _OverBudget(url)
+            entry.size = size
+            self._bytes += size
+        return result
+
+    def schedule(self, urls: List[str], config: RunnableConfig) -> None:
+        """
+        Start prefetching the top-k `urls` that are not already cached, with
+        the settings of the run (`config`) that found them.
+        """
+        self._expire()
+        for url in urls[: self.top_k]:
+            if url in self._entries:
+                continue
+            if self._bytes >= self.byte_budget:
+                self.stats.add("skipped_budget")
+                continue
+            task = asyncio.create_task(self._fetch(url, config))
+            # Failures surface as misses; don't log "exception never retrieved".
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._entries[url] = _Prefetch(task=task, started=time.monotonic())
+            self.stats.add("scheduled")
+
+    async def get(self, url: str) -> Optional[Any]:
+        """The prefetched extraction for `url`, or None on a miss."""
+        self._expire()
+        entry = self._entries.get(url)
+        if entry is None:
+            self.stats.add("miss")
+            return None
+        try:
+            result = await asyncio.shield(entry.task)
+        except Exception as e:
+            if not isinstance(e, _OverBudget):
+                self.stats.add("failed")
+            self.stats.add("miss")
+            if self._entries.get(url) is entry:
+                self._release(url)
+            return None
+        entry.used = True
+        self.stats.add("hit")
+        return result
+
+    async def aclose(self) -> None:
+        """Cancel outstanding prefetches and log the hit rate."""
+        for url in list(self._entries):
+            self._release(url)
+        counts = self.stats.counts
+        if counts:
+            logger.info(
+                f"prefetch: hit rate {self.stats.hit_rate:.0%} "
+                f"(top_k={self.top_k}) {counts}"
+            )
+
+
+_PREFETCHERS: Dict[str, Prefetcher] = {}
+
+
+def get_prefetcher(
+    config: Optional[RunnableConfig], extract_tool: BaseTool
+) -> Optional[Prefetcher]:
+    """The prefetcher for this run's thread, if prefetching is enabled."""
+    configuration = Configuration.from_runnable_config(config)
+    if not configuration.prefetch_enabled:
+        return None
+    thread = thread_id(config)
+    if thread not in _PREFETCHERS:
+        _PREFETCHERS[thread] = Prefetcher(extract_tool, configuration)
+    return _PREFETCHERS[thread]
+
+
+async def close_prefetcher(config: Optional[RunnableConfig]) -> None:
+    """
+    End-of-run hook: cancel this thread's outstanding prefetches. Safe to call
+    more than once; the server also calls it when a run fails or is cancelled.
+    """
+    prefetcher = _PREFETCHERS.pop(thread_id(config), None)
+    if prefetcher is not None:
+        await prefetcher.aclose()
+
+
+class PrefetchingSearchTool(WrappedTool):
+    """Runs the wrapped search tool, then prefetches its top results."""
+
+    extract_tool: BaseTool
+
+    def __init__(self, inner: BaseTool, extract_tool: BaseTool):
+        super().__init__(inner, extract_tool=extract_tool)
+
+    async def _arun(
+        self,
+        config: RunnableConfig,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+        **kwargs: Any,
+    ) -> Any:
+        result = await self._call_inner(kwargs, config)
+        prefetcher = get_prefetcher(config, self.extract_tool)
+        if prefetcher is not None:
+            prefetcher.schedule(urls_from_search_result(result), config)
+        return result
+
+
+class PrefetchingExtractTool(WrappedTool):
+    """Serves `web_extract` from the prefetch cache, falling back to the tool."""
+
+    async def _arun(
+        self,
+        config: RunnableConfig,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+        **kwargs: Any,
+    ) -> Any:
+        prefetcher = get_prefetcher(config, self.inner)
+        if prefetcher is not None and "url" in kwargs:
+            result = await prefetcher.get(kwargs["url"])
+            if result is not None:
+                return result
+        return await self._call_inner(kwargs, config)
+
+
+def wrap_search_tool(tool: BaseTool, extract_tool: BaseTool) -> BaseTool:
+    return cached_wrapper(
+        (PrefetchingSearchTool, id(tool), id(extract_tool)),
+        lambda: PrefetchingSearchTool(tool, extract_tool),
+    )
+
+
+def wrap_extract_tool(tool: BaseTool) -> BaseTool:
+    return cached_wrapper(
+        (PrefetchingExtractTool, id(tool)), lambda: PrefetchingExtractTool(tool)
+    )
@@ -36,10 +36,17 @@ Evaluate the user's latest query and conversation history to determine the next
 - If you intend to start Deep Research but lack basic context (e.g., definitions of terms), use this tool *first* to frame the Deep Research query better.
 - Queries should be orthogonal to each other.
 
+`web_search_batch`:
+- Runs several `web_search` queries at once and returns one merged, de-duplicated list.
+- Use it instead of consecutive `web_search` calls when you already know the queries you need.
+
 `web_extract`:
 - Use this when you need to extract the full content from a URL.
 - This tool is useful when the `web_search` tool results are too incomplete.
 
+`web_extract_batch`:
+- Extracts several URLs at once; long pages are truncated to fit a size budget.
+
 `start_deep_research`:
 - **CRITICAL WARNING**: This tool is expensive and time-consuming. Never use it for simple fact-checking or questions that can be answered in 1-2 search queries.
 - **Pre-requisites**:
@@ -74,10 +81,19 @@ The update message should be concise, honest, and informative, written in first
 `web_search`:
 - Use this strictly for your own planning needs (e.g., to understand technical terms or scope the breadth of a topic) before assigning tasks.
 
+`web_search_batch`:
+- Same purpose as `web_search`, but runs several queries at once and returns one merged, de-duplicated list.
+
 `web_extract`:
 - Use this when you need to extract the full content from a URL.
 - This tool is useful when the `web_search` tool results are too incomplete.
 
+`web_extract_batch`:
+- Extracts several URLs at once; long pages are truncated to fit a size budget.
+
+`search_notes`:
+- Searches the pages and search results already gathered in this session (by you or any researcher) without a web request. Check it before repeating a search.
+
 `start_research`:
 - This tool spawns a dedicated **Researcher Sub-Agent**.
 - When you call this tool, you are assigning a task to a specialized worker.
@@ -149,9 +165,20 @@ The update message should be concise, honest, and informative, written in first
 - Use specific queries rather than broad questions.
 - Critically evaluate results for credibility and relevance before accepting them as fact.
 
+`web_search_batch`:
+- Runs several searches at once (each with its own filters) and returns one merged, de-duplicated list.
+- Prefer it when you can already name 2-5 related queries; it saves a full step per query.
+
 `web_extract`:
 - Use this when you need to extract the full content from a URL.
 - This tool is useful when the `web_search` tool results are too incomplete.
+
+`web_extract_batch`:
+- Extracts several URLs at once; long pages are truncated to fit a size budget.
+
+`search_notes`:
+- Searches the pages and search results other researchers already gathered in this session, without a web request.
+- Check it first; only go to the web for what it does not cover.
 </tools>
 
 <workflow>
@@ -179,6 +206,8 @@ Today's date is {date}.
 You will receive two inputs:
 1. **Research Trajectory**: The complete interaction history between the Planner (PI) and Researcher Agents, including research plans and findings.
 2. **PI Instructions** (optional): Specific directives regarding the report's focus, structure, or length.
+
+You may call `search_notes` to look up the full source passages behind a finding (exact figures, quotes, URLs for citations). It only searches material gathered during this research.
 </inputs>
 
 <instructions>
@@ -196,4 +225,64 @@ You will receive two inputs:
 - **Completeness**: If the research found conflicting data, present both sides. If data was missing, state the limitation clearly.
 - **Priority**: Strictly adhere to the PI Instructions regarding the specific angle or key points to highlight.
 </constraints>
-"""
\ No newline at end of file
+"""
+
+PLANNER_LOW_NOVELTY_HINT = """
+<system_notice>
+The last research round added little new material: {new_sources} of {sources} cited sources and {content:.0%} of its content were new (novelty {score:.2f}, threshold {threshold:.2f}).
+Unless a critical gap remains that a targeted round can close, call `write_report` now.
+</system_notice>
+"""
+
+PLANNER_COMPACTION_PROMPT = """
+You are condensing the earlier rounds of a research planner's trajectory so the planner can keep working with a shorter context. The full material is preserved elsewhere for the final report; your summary only has to let the planner decide what to research next.
+
+<previous_summary>
+{previous_summary}
+</previous_summary>
+
+<new_rounds>
+{rounds}
+</new_rounds>
+
+Merge the previous summary and the new rounds into one summary with exactly these sections:
+
+## Research Tasks Done
+One line per `start_research` / search call: what was asked.
+
+## Key Findings
+Concrete facts, figures and conclusions, each followed by its source URL(s).
+
+## Conflicts and Gaps
+Contradictions between sources, and questions that remain unanswered.
+
+Be dense and factual. Do not add information that is not in the input.
+"""
+
+PLANNER_COMPACTED_HISTORY = """
+<compacted_history rounds="{rounds}">
+The first {rounds} research rounds were condensed to save context. Their full reports are still available to the report writer, and their sources can be looked up with `search_notes`.
+
+{summary}
+</compacted_history>
+"""
+
+REPORT_SUMMARY_PROMPT = """
+Summarize the research report below for an assistant that will answer follow-up questions about it. The full report can be retrieved later, so keep only what is needed to recognize what it covers and answer quick questions.
+
+Include: the research question, the main conclusions, key figures with their sources, and the report's section titles. Use at most 250 words.
+
+<report>
+{report}
+</report>
+"""
+
+REPORT_SUMMARY_STUB = """
+<report_summary id="{report_id}">
+This earlier deep research report was condensed to save context. Call `recall_report` with report_id="{report_id}" for the full text before quoting or analyzing it in detail.
+
+{summary}
+</report_summary>
+"""
+
+OMITTED_TURNS_NOTE = "[{turns} earlier conversation turns were omitted to save context.]"
@@ -0,0 +1,349 @@
+"""
+Readability-style main-content extraction from HTML to Markdown.
+
+Standard library only, so it can run in worker processes without importing
+the rest of the package. The page is parsed into a small element tree; every
+paragraph-like block scores its parent (fully) and grandparent (half) by text
+length and comma count; scores are adjusted by class/id hints and scaled by
+link density, and the best-scoring container plus its strong siblings is
+rendered as Markdown.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urljoin
+
+# Content of these elements is never part of the article.
+_SKIP_TAGS = {
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "canvas",
+    "iframe",
+    "form",
+    "button",
+    "select",
+    "nav",
+    "footer",
+    "aside",
+    "head",
+}
+_VOID_TAGS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+}
+_BLOCK_TAGS = {
+    "p",
+    "div",
+    "section",
+    "article",
+    "main",
+    "ul",
+    "ol",
+    "li",
+    "table",
+    "tr",
+    "blockquote",
+    "pre",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "dl",
+    "dt",
+    "dd",
+    "figure",
+    "figcaption",
+}
+_SCORED_TAGS = {"p", "pre", "td", "blockquote", "li", "dd"}
+_POSITIVE = re.compile(
+    r"article|body|content|entry|main|page|post|story|text|blog", re.IGNORECASE
+)
+_NEGATIVE = re.compile(
+    r"comment|combx|contact|footer|footnote|masthead|menu|meta|nav|outbrain|"
+    r"promo|related|share|shoutbox|sidebar|skyscraper|sponsor|social|ad-|"
+    r"banner|cookie|popup|subscribe",
+    re.IGNORECASE,
+)
+_WHITESPACE = re.compile(r"\s+")
+
+MIN_PARAGRAPH_CHARS = 25
+
+
+class Element:
+    __slots__ = ("tag", "attrs", "children", "parent", "score")
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional["Element"]):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: List[Union["Element", str]] = []
+        self.parent = parent
+        self.score = 0.0
+
+    def text(self) -> str:
+        parts: List[str] = []
+        stack: List[Union[Element, str]] = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            else:
+                stack.extend(reversed(node.children))
+        return _WHITESPACE.sub(" ", "".join(parts)).strip()
+
+    def iter(self):
+        stack: List[Element] = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(c for c in reversed(node.children) if isinstance(c, Element))
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("root", {}, None)
+        self.current = self.root
+        self.title = ""
+        self._in_title = False
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        if self._skip_depth or tag in _SKIP_TAGS:
+            if tag not in _VOID_TAGS:
+                self._skip_depth += 1
+            return
+        # Paragraphs and list items are often left unclosed.
+        if self.current.tag == "p" and tag in _BLOCK_TAGS:
+            self.current = self.current.parent
+        elif self.current.tag == "li" and tag == "li":
+            self.current = self.current.parent
+        element = Element(tag, {k: v or "" for k, v in attrs}, self.current)
+        self.current.children.append(element)
+        if tag not in _VOID_TAGS:
+            self.current = element
+
+    def handle_startendtag(self, tag, attrs):
+        if not self._skip_depth:
+            element = Element(tag, {k: v or "" for k, v in attrs}, self.current)
+            self.current.children.append(element)
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if self._skip_depth:
+            if tag not in _VOID_TAGS:
+                self._skip_depth -= 1
+            return
+        # Close up to the matching open element; stray end tags are ignored.
+        node = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self.current.children.append(data)
+
+
+def _class_weight(element: Element) -> float:
+    weight = 0.0
+    for name in ("class", "id"):
+        value = element.attrs.get(name, "")
+        if value:
+            if _NEGATIVE.search(value):
+                weight -= 25
+            if _POSITIVE.search(value):
+                weight += 25
+    return weight
+
+
+def _link_density(element: Element, text_length: int) -> float:
+    if not text_length:
+        return 0.0
+    link_length = sum(len(a.text()) for a in element.iter() if a.tag == "a")
+    return link_length / text_length
+
+
+def _best_candidate(root: Element) -> Element:
+    candidates: Dict[int, Element] = {}
+    for element in root.iter():
+        if element.tag not in _SCORED_TAGS:
+            continue
+        text = element.text()
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = element.parent
+        for level, ancestor in enumerate((parent, parent and parent.parent)):
+            if ancestor is None or ancestor.tag == "root":
+                break
+            if id(ancestor) not in candidates:
+                ancestor.score = _class_weight(ancestor)
+                candidates[id(ancestor)] = ancestor
+            ancestor.score += score / (1 + level)
+
+    best: Optional[Element] = None
+    for candidate in candidates.values():
+        candidate.score *= 1 - _link_density(candidate, len(candidate.text()))
+        if best is None or candidate.score > best.score:
+            best = candidate
+    if best is None:
+        body = next((e for e in root.iter() if e.tag == "body"), None)
+        return body or root
+    return best
+
+
+def _content_nodes(best: Element) -> List[Element]:
+    """The best candidate plus siblings that look like part of the article."""
+    if best.parent is None:
+        return [best]
+    threshold = max(10.0, best.score * 0.2)
+    nodes = []
+    for sibling in best.parent.children:
+        if not isinstance(sibling, Element):
+            continue
+        if sibling is best or sibling.score >= threshold:
+            nodes.append(sibling)
+        elif sibling.tag == "p":
+            text = sibling.text()
+            density = _link_density(sibling, len(text))
+            if (len(text) > 80 and density < 0.25) or (
+                text.endswith(".") and density == 0
+            ):
+                nodes.append(sibling)
+    return nodes
+
+
+class _MarkdownWriter:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.blocks: List[str] = []
+
+    def inline(self, node: Union[Element, str]) -> str:
+        if isinstance(node, str):
+            return _WHITESPACE.sub(" ", node)
+        inner = "".join(self.inline(c) for c in node.children)
+        tag = node.tag
+        if tag == "br":
+            return "\n"
+        if tag == "a":
+            href = node.attrs.get("href", "")
+            text = inner.strip()
+            if href and text and not href.startswith(("javascript:", "#")):
+                return f"[{text}]({urljoin(self.base_url, href)})"
+            return inner
+        if tag in ("strong", "b") and inner.strip():
+            return f"**{inner.strip()}**"
+        if tag in ("em", "i") and inner.strip():
+            return f"*{inner.strip()}*"
+        if tag == "code" and inner.strip():
+            return f"`{inner.strip()}`"
+        return inner
+
+    def _has_blocks(self, node: Element) -> bool:
+        return any(
+            isinstance(c, Element) and c.tag in _BLOCK_TAGS for c in node.children
+        )
+
+    def block(self, node: Element) -> None:
+        tag = node.tag
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            text = self.inline(node).strip()
+            if text:
+                self.blocks.append(f"{'#' * int(tag[1])} {text}")
+        elif tag == "pre":
+            self.blocks.append(f"```\n{_raw_text(node)}\n```")
+        elif tag in ("ul", "ol"):
+            items = [
+                c for c in node.children if isinstance(c, Element) and c.tag == "li"
+            ]
+            lines = []
+            for i, item in enumerate(items, start=1):
+                marker = f"{i}." if tag == "ol" else "-"
+                text = self.inline(item).strip()
+                if text:
+                    lines.append(f"{marker} {text}")
+            if lines:
+                self.blocks.append("\n".join(lines))
+        elif tag == "table":
+            rows = []
+            for row in node.iter():
+                if row.tag == "tr":
+                    cells = [
+                        self.inline(c).strip().replace("|", "\\|")
+                        for c in row.children
+                        if isinstance(c, Element) and c.tag in ("td", "th")
+                    ]
+                    if any(cells):
+                        rows.append("| " + " | ".join(cells) + " |")
+            if rows:
+                width = rows[0].count(" | ") + 1
+                rows.insert(1, "|" + " --- |" * width)
+                self.blocks.append("\n".join(rows))
+        elif tag == "blockquote":
+            text = self.inline(node).strip()
+            if text:
+                self.blocks.append("\n".join(f"> {line}" for line in text.splitlines()))
+        elif self._has_blocks(node):
+            run: List[Union[Element, str]] = []
+            for child in node.children:
+                if isinstance(child, Element) and child.tag in _BLOCK_TAGS:
+                    self._paragraph(run)
+                    run = []
+                    self.block(child)
+                else:
+                    run.append(child)
+            self._paragraph(run)
+        else:
+            self._paragraph([node])
+
+    def _paragraph(self, nodes: List[Union[Element, str]]) -> None:
+        text = "".join(self.inline(n) for n in nodes)
+        text = "\n".join(line.strip() for line in text.splitlines()).strip()
+        if text:
+            self.blocks.append(text)
+
+
+def _raw_text(node: Union[Element, str]) -> str:
+    if isinstance(node, str):
+        return node
+    return "".join(_raw_text(c) for c in node.children).strip("\n")
+
+
+def extract(html: str, url: str = "") -> Tuple[str, str]:
+    """The (title, Markdown main content) of an HTML page."""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    best = _best_candidate(builder.root)
+    writer = _MarkdownWriter(url)
+    for node in _content_nodes(best):
+        writer.block(node)
+    title = _WHITESPACE.sub(" ", builder.title).strip()
+    if not title:
+        heading = next((e for e in builder.root.iter() if e.tag == "h1"), None)
+        title = heading.text() if heading is not None else ""
+    return title, "\n\n".join(writer.blocks)
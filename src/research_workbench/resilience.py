@@ -0,0 +1,213 @@
+"""
+Retries and circuit breakers for the search and extract backends.
+
+`call_provider` runs one backend request with bounded exponential backoff and
+full jitter, and feeds every attempt's outcome into the provider's circuit
+breaker. After `breaker_failure_threshold` consecutive transient failures the
+breaker opens and calls fail fast with `ProviderUnavailable`, so callers can
+fall back to another provider (see `tools.web_search`). After
+`breaker_reset_timeout` seconds one probe request is let through; its outcome
+closes the breaker or re-opens it. Breaker state is exported on /metrics.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import aiohttp
+from loguru import logger
+
+from research_workbench.config import Configuration
+from research_workbench.metrics import REGISTRY
+
+T = TypeVar("T")
+
+BREAKER_STATE = REGISTRY.gauge(
+    "research_workbench_circuit_breaker_state",
+    "Circuit breaker state per backend provider and breaker settings "
+    "(0=closed, 1=open, 2=half-open).",
+    ("provider", "threshold", "reset_timeout"),
+)
+PROVIDER_CALLS = REGISTRY.counter(
+    "research_workbench_provider_calls_total",
+    "Backend provider call attempts by outcome (success, error, retry, "
+    "rejected, fallback).",
+    ("provider", "outcome"),
+)
+
+
+class ProviderError(Exception):
+    """A backend answered with an error status."""
+
+    def __init__(self, provider: str, status: Optional[int], detail: str = ""):
+        super().__init__(f"{provider} returned status {status}: {detail}".strip())
+        self.provider = provider
+        self.status = status
+
+    @property
+    def transient(self) -> bool:
+        # An unknown status is not retried: it may well be a bad request.
+        return self.status is not None and (self.status == 429 or self.status >= 500)
+
+
+class ProviderUnavailable(Exception):
+    """The provider's circuit breaker is open; the call was not attempted."""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(
+            f"{provider} is temporarily unavailable (retry in {retry_in:.0f}s)"
+        )
+        self.provider = provider
+
+
+def is_transient(error: BaseException) -> bool:
+    """Failures worth retrying and counting against the provider's health."""
+    if isinstance(error, ProviderError):
+        return error.transient
+    return isinstance(
+        error, (OSError, asyncio.TimeoutError, TimeoutError, aiohttp.ClientError)
+    )
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+    def __init__(self, provider: str, failure_threshold: int, reset_timeout: float):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        # Breakers of one provider with different settings are separate series.
+        self._labels = {
+            "provider": provider,
+            "threshold": str(failure_threshold),
+            "reset_timeout": f"{reset_timeout:g}",
+        }
+        BREAKER_STATE.set(self.CLOSED, **self._labels)
+
+    def _set_state(self, state: int) -> None:
+        if state != self.state:
+            names = {
+                self.CLOSED: "closed",
+                self.OPEN: "open",
+                self.HALF_OPEN: "half-open",
+            }
+            logger.warning(f"resilience: {self.provider} breaker {names[state]}")
+        self.state = state
+        BREAKER_STATE.set(state, **self._labels)
+
+    def retry_in(self) -> float:
+        return max(self.opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        with self._lock:
+            if self.state == self.OPEN and self.retry_in() == 0.0:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                # A single probe at a time decides whether to close again.
+                if self._probing:
+                    return False
+                self._probing = True
+            return self.state != self.OPEN
+
+    def release(self) -> None:
+        """Forget an in-flight probe that ended without an outcome."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and self.retry_in() > 0.0
+
+
+_BREAKERS: Dict[Tuple[str, int, float], CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(provider: str, configuration: Configuration) -> CircuitBreaker:
+    """
+    The process-wide breaker of `provider` for the configured thresholds;
+    runs with different breaker settings get breakers of their own.
+    """
+    key = (
+        provider,
+        configuration.breaker_failure_threshold,
+        configuration.breaker_reset_timeout,
+    )
+    with _BREAKERS_LOCK:
+        if key not in _BREAKERS:
+            _BREAKERS[key] = CircuitBreaker(*key)
+        return _BREAKERS[key]
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (0-based)."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+async def call_provider(
+    provider: str,
+    request: Callable[[], Awaitable[T]],
+    configuration: Configuration,
+) -> T:
+    """
+    Await `request()` with retries on transient failures. Raises
+    `ProviderUnavailable` without calling it while the breaker is open, and
+    the last error once retries are exhausted.
+    """
+    breaker = get_breaker(provider, configuration)
+    attempts = max(configuration.retry_attempts, 1)
+    for attempt in range(attempts):
+        if not breaker.allow():
+            PROVIDER_CALLS.inc(provider=provider, outcome="rejected")
+            raise ProviderUnavailable(provider, breaker.retry_in())
+        try:
+            result = await request()
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                # The provider answered; the request itself was bad.
+                breaker.record_success()
+                PROVIDER_CALLS.inc(provider=provider, outcome="error")
+                raise
+            breaker.record_failure()
+            if attempt + 1 == attempts or breaker.is_open:
+                PROVIDER_CALLS.inc(provider=provider, outcome="error")
+                raise
+            PROVIDER_CALLS.inc(provider=provider, outcome="retry")
+            delay = backoff_delay(
+                attempt, configuration.retry_base_delay, configuration.retry_max_delay
+            )
+            logger.debug(
+                f"resilience: {provider} attempt {attempt + 1} failed ({e}); "
+                f"retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            PROVIDER_CALLS.inc(provider=provider, outcome="success")
+            return result
+    raise AssertionError("unreachable")
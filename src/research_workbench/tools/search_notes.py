@@ -0,0 +1,33 @@
+from langchain.tools import tool
+from langgraph.graph.state import RunnableConfig
+from loguru import logger
+
+from research_workbench.notes import get_notes_index
+
+MAX_NOTES = 10
+
+
+@tool("search_notes")
+async def search_notes(query: str, k: int = 5, config: RunnableConfig = None) -> str:
+    """
+    Search the pages and search results already fetched during this research session. No web request is made.
+    Use this before `web_search`/`web_extract` to reuse material other researchers have already gathered.
+    Args:
+        query: Keywords describing the information you need.
+        k: Number of passages to return (at most 10).
+    Returns:
+        The most relevant passages, each with its source title and URL.
+    """
+    logger.debug(f"search_notes: {query = }")
+    index = get_notes_index(config)
+    hits = index.search(query, k=max(1, min(k, MAX_NOTES)))
+    if not hits:
+        return "No matching notes found. Use web_search to gather new material."
+
+    results_str = ""
+    for score, passage in hits:
+        results_str += (
+            f"Title: {passage.title}\nURL: {passage.url}\nContent: {passage.text}"
+        )
+        results_str += "\n----\n"
+    return results_str
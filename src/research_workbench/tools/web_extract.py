@@ -1,36 +1,186 @@
 import asyncio
+import json
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
 
 from loguru import logger
 import requests
+from requests.adapters import HTTPAdapter
 from langchain.tools import BaseTool, tool
+from langgraph.graph.state import RunnableConfig
 
+from research_workbench import readability
+from research_workbench.clients import CLIENTS, get_aiohttp_session
+from research_workbench.config import Configuration, ExtractEngine
+from research_workbench.resilience import ProviderError, call_provider
 
-def jina_reader(url: str) -> str:
-    headers = {
-        "Accept": "application/json",  # returns JSON
-        "X-Retain-Images": "none",  # don't retain images TODO: support images
-    }
-    jina_api_key = os.getenv("JINA_API_KEY")
+JINA_POOL_SIZE = 32
+JINA_TIMEOUT = 60.0
+PAGE_TIMEOUT = 30.0
+# Larger pages are cut before parsing.
+MAX_PAGE_BYTES = 5_000_000
+READ_CHUNK_BYTES = 64 * 1024
+USER_AGENT = "Mozilla/5.0 (compatible; research-workbench/0.1)"
+MAX_BATCH_URLS = 10
+BATCH_CONCURRENCY = 5
+
+
+class PageTooLarge(Exception):
+    """The download passed `extract_max_bytes` and was aborted."""
+
+    def __init__(self, url: str, max_bytes: int):
+        super().__init__(f"{url} is larger than {max_bytes} bytes")
+        self.url = url
+
+
+def _make_jina_session(jina_api_key: Optional[str]) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(
+        {
+            "Accept": "application/json",  # returns JSON
+            "X-Retain-Images": "none",  # don't retain images TODO: support images
+        }
+    )
     if jina_api_key:
-        headers["Authorization"] = f"Bearer {jina_api_key}"
+        session.headers["Authorization"] = f"Bearer {jina_api_key}"
+    # Parallel researchers extract concurrently from worker threads.
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=JINA_POOL_SIZE)
+    session.mount("https://", adapter)
+    return session
+
 
-    response = requests.get(
-        f"https://r.jina.ai/{url}",
-        headers=headers,
+def get_jina_session() -> requests.Session:
+    """Pooled HTTP session for the Jina reader, one per API key."""
+    jina_api_key = os.getenv("JINA_API_KEY")
+    return CLIENTS.get(
+        "jina",
+        jina_api_key,
+        lambda: _make_jina_session(jina_api_key),
+        close=lambda session: session.close(),
     )
 
-    if response.status_code != 200:
-        return f"Error: Failed to extract content from {url}. Status code: {response.status_code}. Response: {response.text}"
 
-    raw_result = response.json()
+def jina_reader(
+    url: str,
+    session: Optional[requests.Session] = None,
+    reader_url: str = "https://r.jina.ai/",
+    max_bytes: Optional[int] = None,
+) -> str:
+    """
+    Extract `url` with the Jina reader. Rate limiting and server errors raise
+    `ProviderError` so they can be retried; other failures are returned as an
+    error message for the model. A response above `max_bytes` is abandoned
+    mid-download with `PageTooLarge`.
+    """
+    session = session or get_jina_session()
+    with session.get(
+        f"{reader_url}{url}", timeout=JINA_TIMEOUT, stream=True
+    ) as response:
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ProviderError("jina", response.status_code, response.text[:200])
+        if response.status_code != 200:
+            return f"Error: Failed to extract content from {url}. Status code: {response.status_code}. Response: {response.text}"
+        if max_bytes is None:
+            raw_result = response.json()
+        else:
+            body = bytearray()
+            for chunk in response.iter_content(READ_CHUNK_BYTES):
+                body += chunk
+                if len(body) > max_bytes:
+                    raise PageTooLarge(url, max_bytes)
+            raw_result = json.loads(body)
     data = raw_result.get("data", {})
 
     return f"Title: {data.get('title', 'No Title')}\nContent: {data.get('content', 'No Content')}"
 
 
+_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def get_extract_pool(workers: int) -> ProcessPoolExecutor:
+    """Worker processes that parse HTML off the event loop (created on first use)."""
+    global _POOL
+    if _POOL is None:
+        # Spawned, not forked: the parent runs threads (and an event loop).
+        _POOL = ProcessPoolExecutor(
+            max_workers=max(workers, 1), mp_context=multiprocessing.get_context("spawn")
+        )
+    return _POOL
+
+
+async def local_reader(url: str, configuration: Configuration) -> Optional[str]:
+    """
+    Fetch `url` and extract its main content as Markdown in the process pool.
+    Returns None for content types it cannot extract (e.g. PDF).
+    """
+    session = get_aiohttp_session("page", PAGE_TIMEOUT)
+    async with session.get(url, headers={"User-Agent": USER_AGENT}) as response:
+        if response.status != 200:
+            return f"Error: Failed to extract content from {url}. Status code: {response.status}."
+        content_type = response.headers.get("Content-Type", "").lower()
+        if "html" not in content_type and not content_type.startswith("text/"):
+            return None
+        # `read(n)` returns only what has arrived so far; read up to the cap.
+        body = bytearray()
+        max_bytes = configuration.extract_max_bytes
+        async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+            if max_bytes is not None and len(body) + len(chunk) > max_bytes:
+                raise PageTooLarge(url, max_bytes)
+            body += chunk[: MAX_PAGE_BYTES - len(body)]
+            if len(body) >= MAX_PAGE_BYTES:
+                break
+        text = body.decode(response.charset or "utf-8", errors="replace")
+        final_url = str(response.url)
+
+    if "html" in content_type:
+        loop = asyncio.get_running_loop()
+        title, content = await loop.run_in_executor(
+            get_extract_pool(configuration.extract_workers),
+            readability.extract,
+            text,
+            final_url,
+        )
+    else:
+        title, content = "", text
+    return f"Title: {title or 'No Title'}\nContent: {content or 'No Content'}"
+
+
+async def read_url(
+    url: str, session: requests.Session, configuration: Configuration
+) -> str:
+    """
+    Extract `url` with the configured engine. Jina runs in a worker thread,
+    with retries and the jina circuit breaker; the local engine hands pages
+    it cannot parse to Jina. Only `PageTooLarge` is raised; other failures
+    are returned as an error message.
+    """
+    try:
+        if configuration.extract_engine == ExtractEngine.LOCAL:
+            result = await local_reader(url, configuration)
+            if result is not None:
+                return result
+        return await call_provider(
+            "jina",
+            lambda: asyncio.to_thread(
+                jina_reader,
+                url,
+                session,
+                configuration.jina_reader_url,
+                configuration.extract_max_bytes,
+            ),
+            configuration,
+        )
+    except PageTooLarge:
+        raise
+    except Exception as e:
+        logger.error(f"web_extract: Error extracting {url}: {e}")
+        return f"Error: Failed to extract content from {url}: {e}"
+
+
 @tool("web_extract")
-async def web_extract(url: str) -> str:
+async def web_extract(url: str, config: RunnableConfig = None) -> str:
     """
     A content extractor tool. Use this tool when you need to extract the full content from a web page.
     Args:
@@ -39,4 +189,71 @@ async def web_extract(url: str) -> str:
         The extracted content, containing title and content.
     """
     logger.debug(f"web_extract: {url = }")
-    return await asyncio.to_thread(jina_reader, url)
+    configuration = Configuration.from_runnable_config(config)
+    return await read_url(url, get_jina_session(), configuration)
+
+
+def _allocate(lengths: List[int], per_document: int, total: int) -> List[int]:
+    """
+    Split `total` characters across documents, none above `per_document`.
+    Short documents keep their full length and leave the rest of their
+    share to the longer ones.
+    """
+    caps = [min(n, per_document) for n in lengths]
+    allocation = [0] * len(caps)
+    pending = sorted(range(len(caps)), key=lambda i: caps[i])
+    remaining = total
+    while pending:
+        share = remaining // len(pending)
+        i = pending.pop(0)
+        allocation[i] = min(caps[i], share)
+        remaining -= allocation[i]
+    return allocation
+
+
+async def _extract(
+    url: str, session: requests.Session, semaphore, configuration: Configuration
+) -> str:
+    async with semaphore:
+        return await read_url(url, session, configuration)
+
+
+@tool("web_extract_batch")
+async def web_extract_batch(urls: List[str], config: RunnableConfig = None) -> str:
+    """
+    Extract the content of several web pages at once. Use this instead of consecutive `web_extract` calls when you already know which pages to read.
+    Long pages are truncated so the whole batch fits the size budget.
+    Args:
+        urls: Up to 10 URLs of the web pages to extract the content from.
+    Returns:
+        The extracted documents in request order, each with its URL, title and content, or an error for that URL.
+    """
+    urls, skipped = urls[:MAX_BATCH_URLS], urls[MAX_BATCH_URLS:]
+    logger.debug(f"web_extract_batch: {urls = }")
+    if not urls:
+        return "Error: Provide at least one URL."
+    configuration = Configuration.from_runnable_config(config)
+
+    session, semaphore = get_jina_session(), asyncio.Semaphore(BATCH_CONCURRENCY)
+    documents = await asyncio.gather(
+        *[_extract(url, session, semaphore, configuration) for url in urls]
+    )
+    allocation = _allocate(
+        [len(d) for d in documents],
+        configuration.extract_max_chars_per_document,
+        configuration.extract_max_total_chars,
+    )
+
+    results_str = ""
+    if skipped:
+        logger.warning(f"web_extract_batch: skipped {len(skipped)} URLs")
+        results_str += (
+            f"Only the first {MAX_BATCH_URLS} URLs were extracted. Skipped, "
+            f"send them in another call: {', '.join(skipped)}\n----\n"
+        )
+    for url, document, chars in zip(urls, documents, allocation):
+        results_str += f"URL: {url}\n{document[:chars]}"
+        if chars < len(document):
+            results_str += f"\n[... truncated {len(document) - chars} characters]"
+        results_str += "\n----\n"
+    return results_str
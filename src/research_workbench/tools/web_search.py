@@ -1,33 +1,59 @@
-from typing import Literal, Optional
+import asyncio
+import os
+import re
+from typing import Any, Dict, List, Literal, Optional
 
+import aiohttp
 from langchain.tools import BaseTool, tool
-from langchain_community.utilities import SearxSearchWrapper
+from langchain_core.tools import ToolException
 from langchain_tavily.tavily_search import TavilySearch
 from langgraph.graph.state import RunnableConfig
 from loguru import logger
+from pydantic import BaseModel, Field
 
+from research_workbench.clients import CLIENTS, get_aiohttp_session
 from research_workbench.config import Configuration, SearchEngine
+from research_workbench.resilience import (
+    PROVIDER_CALLS,
+    ProviderError,
+    ProviderUnavailable,
+    call_provider,
+    is_transient,
+)
+
+SEARX_TIMEOUT = 30.0
 
 
 def get_search_tool(configuration: Configuration) -> BaseTool:
     if configuration.search_engine == SearchEngine.TAVILY:
-        return get_tavily_search_tool()
+        return tavily_search
     elif configuration.search_engine == SearchEngine.SEARX:
         return searx_search
     else:
         raise ValueError(f"Invalid search engine: {configuration.search_engine}")
 
 
-_TAVILY_SEARCH_TOOL: Optional[TavilySearch] = None
+def _make_tavily_search_tool(max_results: int, api_url: Optional[str]) -> TavilySearch:
+    if api_url:
+        search_tool = TavilySearch(max_results=max_results, api_base_url=api_url)
+    else:
+        search_tool = TavilySearch(max_results=max_results)
+    search_tool.name = "web_search"
+    return search_tool
 
 
-def get_tavily_search_tool() -> TavilySearch:
-    """Lazily initialize Tavily tool to avoid import-time failures."""
-    global _TAVILY_SEARCH_TOOL
-    if _TAVILY_SEARCH_TOOL is None:
-        _TAVILY_SEARCH_TOOL = TavilySearch(max_results=10)
-        _TAVILY_SEARCH_TOOL.name = "web_search"
-    return _TAVILY_SEARCH_TOOL
+def get_tavily_search_tool(configuration: Configuration) -> TavilySearch:
+    """
+    Lazily initialize the raw Tavily tool (one per max_results, API URL and
+    key). Agents get `tavily_search`, which adds retries and fallback.
+    """
+    max_results = configuration.search_engine_max_results
+    api_url = configuration.tavily_api_url
+    return CLIENTS.get(
+        "tavily",
+        (max_results, api_url, os.environ.get("TAVILY_API_KEY")),
+        lambda: _make_tavily_search_tool(max_results, api_url),
+    )
 
 
 @tool("web_search")
@@ -37,6 +63,7 @@ async def tavily_search(
     topic: Optional[Literal["general", "news", "finance"]] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    config: RunnableConfig = None,
 ) -> str:
     """
     A search engine optimized for comprehensive, accurate, and trusted results.
@@ -58,39 +85,81 @@ async def tavily_search(
         f'web_search: Searching for "{query}" with time_range={time_range}, topic={topic}, start_date={start_date}, end_date={end_date}'
     )
     try:
-        raw_results = await get_tavily_search_tool().ainvoke(
-            query,
-            time_range=time_range,
-            topic=topic,
+        configuration = Configuration.from_runnable_config(config)
+        results = await _search_results(
+            configuration,
+            SearchQuery(query=query, time_range=time_range, topic=topic),
             start_date=start_date,
             end_date=end_date,
         )
-        if isinstance(raw_results, str):
-            logger.debug(f"web_search: raw_results is a string: {raw_results}")
-            return f"web_search returned: {raw_results}"
-        results = raw_results["results"]
-        results.sort(key=lambda x: x["score"], reverse=True)
-        results_str = ""
-        for result in results:
-            title, url, content = result["title"], result["url"], result["content"]
-            results_str += f"Title: {title}\nURL: {url}\nContent: {content}"
-            results_str += "\n----\n"
-        # logger.debug(f"web_search: Web search results: {results_str}")
     except Exception as e:
         logger.error(f"web_search: Error calling web_search: {e}")
-        return f"Error calling web_search. Please try again using valid arguments."
+        return f"Error calling web_search ({e}). Please try again later or using valid arguments."
+    return _format_results(results)
+
+
+def _format_results(results: List[Dict[str, str]]) -> str:
+    if not results:
+        return "No search result found!"
+    results_str = ""
+    for result in results:
+        title, url, content = result["title"], result["url"], result["content"]
+        results_str += f"Title: {title}\nURL: {url}\nContent: {content}"
+        results_str += "\n----\n"
     return results_str
 
 
-_SEARX_SEARCH_WRAPPER: Optional[SearxSearchWrapper] = None
+def get_searx_session() -> aiohttp.ClientSession:
+    """Pooled aiohttp session for SearxNG requests (see `get_aiohttp_session`)."""
+    return get_aiohttp_session("searx", SEARX_TIMEOUT)
+
 
+async def _searx_query(
+    configuration: Configuration, params: Dict[str, Any]
+) -> List[Dict[str, str]]:
+    """One request to the SearxNG JSON API."""
+    async with get_searx_session().get(
+        configuration.searx_host,
+        params={"format": "json", "language": "en", **params},
+    ) as response:
+        if response.status != 200:
+            raise ProviderError("searx", response.status, (await response.text())[:200])
+        raw_results = (await response.json(content_type=None)).get("results", [])
+    return [
+        {
+            "title": r.get("title", "No Title"),
+            "url": r.get("url", "No Link"),
+            "content": r.get("content", "No Preview"),
+        }
+        for r in raw_results[: configuration.search_engine_max_results]
+    ]
 
-def get_searx_search_wrapper(configuration: Configuration) -> SearxSearchWrapper:
-    """Lazily initialize Searx tool to avoid import-time failures."""
-    global _SEARX_SEARCH_WRAPPER
-    if _SEARX_SEARCH_WRAPPER is None:
-        _SEARX_SEARCH_WRAPPER = SearxSearchWrapper(searx_host=configuration.searx_host)
-    return _SEARX_SEARCH_WRAPPER
+
+async def _tavily_query(
+    configuration: Configuration, params: Dict[str, Any]
+) -> List[Dict[str, str]]:
+    """One request to the Tavily API."""
+    try:
+        raw_results = await get_tavily_search_tool(configuration).ainvoke(params)
+    except ToolException:
+        # Raised for an empty result set, not for a provider failure.
+        return []
+    if isinstance(raw_results, str):
+        raise ProviderError("tavily", None, raw_results)
+    if "error" in raw_results:
+        # TavilySearch returns HTTP and connection errors instead of raising.
+        error = raw_results["error"]
+        if isinstance(error, Exception) and is_transient(error):
+            raise error
+        # HTTP errors read "Error <status>: <reason>".
+        status = re.match(r"Error (\d{3})\b", str(error))
+        raise ProviderError(
+            "tavily", int(status.group(1)) if status else None, str(error)
+        )
+    results = sorted(raw_results["results"], key=lambda x: x["score"], reverse=True)
+    return [
+        {"title": r["title"], "url": r["url"], "content": r["content"]} for r in results
+    ]
 
 
 @tool("web_search")
@@ -118,25 +187,165 @@ async def searx_search(
     if time_range is not None and time_range not in {"day", "month", "year"}:
         return "Error: Time range must be one of 'day', 'month', or 'year'."
 
-    param_dict = {
-        "query": query,
-        "num_results": configuration.search_engine_max_results,
-        "pageno": pageno,
-    }
-    if time_range in {"day", "month", "year"}:
-        param_dict["time_range"] = time_range
+    try:
+        results = await _search_results(
+            configuration,
+            SearchQuery(query=query, time_range=time_range),
+            pageno=pageno,
+        )
+    except Exception as e:
+        logger.error(f"searx_search: Error calling web_search: {e}")
+        return f"Error calling web_search ({e}). Please try again later."
+    return _format_results(results)
 
-    raw_results = await get_searx_search_wrapper(configuration).aresults(**param_dict)
-    if len(raw_results) == 1 and raw_results[0].get("Result"):
-        return "No search result found!"
-    
-    results_str = "" if raw_results else "No search result found!"
-    for result in raw_results:
-        title, url, content = (
-            result.get("title", "No Title"),
-            result.get("link", "No Link"),
-            result.get("snippet", "No Preview"),
+
+MAX_BATCH_QUERIES = 8
+
+
+class SearchQuery(BaseModel):
+    query: str = Field(description="The search query.")
+    time_range: Optional[Literal["day", "week", "month", "year"]] = Field(
+        default=None,
+        description="Only return results published or updated within this range.",
+    )
+    topic: Optional[Literal["general", "news", "finance"]] = Field(
+        default=None,
+        description="Search category (Tavily only); 'news' for current events.",
+    )
+
+
+_FALLBACK_ENGINES = {
+    SearchEngine.TAVILY: SearchEngine.SEARX,
+    SearchEngine.SEARX: SearchEngine.TAVILY,
+}
+
+
+async def _engine_results(
+    engine: SearchEngine,
+    configuration: Configuration,
+    search: SearchQuery,
+    **engine_args: Any,
+) -> List[Dict[str, str]]:
+    """
+    Run one query on `engine`, with retries. `engine_args` are extra
+    engine-specific parameters (Tavily: start_date/end_date, Searx: pageno);
+    each engine ignores the ones it does not know.
+    """
+    if engine == SearchEngine.TAVILY:
+        params = {
+            "query": search.query,
+            "time_range": search.time_range,
+            "topic": search.topic,
+            "start_date": engine_args.get("start_date"),
+            "end_date": engine_args.get("end_date"),
+        }
+        return await call_provider(
+            "tavily", lambda: _tavily_query(configuration, params), configuration
+        )
+    elif engine == SearchEngine.SEARX:
+        params: Dict[str, Any] = {"q": search.query}
+        if engine_args.get("pageno"):
+            params["pageno"] = engine_args["pageno"]
+        if search.time_range in {"day", "month", "year"}:
+            params["time_range"] = search.time_range
+        return await call_provider(
+            "searx", lambda: _searx_query(configuration, params), configuration
+        )
+    else:
+        raise ValueError(f"Invalid search engine: {engine}")
+
+
+async def _search_results(
+    configuration: Configuration, search: SearchQuery, **engine_args: Any
+) -> List[Dict[str, str]]:
+    """
+    Run one query on the configured engine, as title/url/content dicts. If
+    the engine keeps failing transiently (after retries) or its circuit
+    breaker is open, the query is sent to the other engine (unless
+    `search_fallback` is off). Other errors, such as a rejected API key or a
+    bad request, are raised as they are.
+    """
+    engine = configuration.search_engine
+    try:
+        return await _engine_results(engine, configuration, search, **engine_args)
+    except Exception as e:
+        fallback = _FALLBACK_ENGINES.get(engine)
+        if not configuration.search_fallback or fallback is None:
+            raise
+        if not (isinstance(e, ProviderUnavailable) or is_transient(e)):
+            raise
+        logger.warning(
+            f"web_search: {engine.value} failed ({e}); falling back to {fallback.value}"
+        )
+        PROVIDER_CALLS.inc(provider=fallback.value, outcome="fallback")
+        return await _engine_results(fallback, configuration, search, **engine_args)
+
+
+def _url_key(url: str) -> str:
+    return url.split("#", 1)[0].rstrip("/").lower()
+
+
+@tool("web_search_batch")
+async def web_search_batch(
+    queries: List[SearchQuery], config: RunnableConfig = None
+) -> str:
+    """
+    Run several related web searches at once and get one merged, de-duplicated result list.
+    Prefer this over consecutive `web_search` calls when you already know the queries you need.
+    Args:
+        queries: Up to 8 searches, each with its own query and optional time_range/topic filters. Queries should be orthogonal to each other.
+    Returns:
+        The formatted results ordered by rank across queries, each with the numbers of the queries that found it.
+    """
+    searches = [SearchQuery.model_validate(q) for q in queries]
+    searches, skipped = searches[:MAX_BATCH_QUERIES], searches[MAX_BATCH_QUERIES:]
+    logger.debug(f"web_search_batch: {[q.query for q in searches]}")
+    if not searches:
+        return "Error: Provide at least one query."
+    configuration = Configuration.from_runnable_config(config)
+
+    outcomes = await asyncio.gather(
+        *[_search_results(configuration, q) for q in searches],
+        return_exceptions=True,
+    )
+
+    errors_str = ""
+    if skipped:
+        logger.warning(f"web_search_batch: skipped {len(skipped)} queries")
+        errors_str += (
+            f"Only the first {MAX_BATCH_QUERIES} queries were run. Skipped, "
+            f"send them in another call: {'; '.join(q.query for q in skipped)}\n"
+        )
+    ranked: List[List[Dict[str, str]]] = []
+    for i, outcome in enumerate(outcomes, start=1):
+        if isinstance(outcome, Exception):
+            logger.error(f"web_search_batch: query {i} failed: {outcome}")
+            errors_str += f"Query {i} failed. Please retry it on its own.\n"
+            ranked.append([])
+        else:
+            ranked.append(outcome)
+
+    # Interleave by rank so every query's best hits come first, then merge
+    # duplicates under the first occurrence.
+    merged: Dict[str, Dict[str, Any]] = {}
+    for rank in range(max((len(r) for r in ranked), default=0)):
+        for i, results in enumerate(ranked, start=1):
+            if rank >= len(results):
+                continue
+            result = results[rank]
+            entry = merged.setdefault(
+                _url_key(result["url"]), {**result, "queries": []}
+            )
+            entry["queries"].append(i)
+
+    results_str = errors_str
+    if not merged:
+        return results_str + "No search result found!"
+    for result in merged.values():
+        queries_str = ", ".join(str(i) for i in result["queries"])
+        results_str += (
+            f"Title: {result['title']}\nURL: {result['url']}\n"
+            f"Queries: {queries_str}\nContent: {result['content']}"
         )
-        results_str += f"Title: {title}\nURL: {url}\nContent: {content}"
         results_str += "\n----\n"
     return results_str
@@ -0,0 +1,414 @@
+"""
+Run-tree tracing for graph executions.
+
+`TraceRecorder` consumes `astream_events` (v2) events and turns the run_id /
+parent_ids hierarchy into spans for graph nodes, researchers, model calls and
+tool calls. Finished spans are appended to a JSONL file, one span per line, in
+the OTLP/JSON span encoding (traceId, spanId, parentSpanId, *TimeUnixNano,
+attributes as key/value pairs). Spans are buffered and written in batches by a
+background thread, so recording never does file I/O on the event loop.
+
+Summarize a trace file as a flame tree plus its critical path with:
+
+    python -m research_workbench.tracing summarize traces.jsonl
+"""
+
+import argparse
+import atexit
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from research_workbench.metrics import role_from_metadata
+
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_UNSET = 0
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+_GRAPH_NODES = {"general_assistant", "planner", "write_report"}
+
+# Finished spans a recorder buffers before handing them to the writer thread.
+FLUSH_SPANS = 64
+
+
+def _span_id(run_id: str) -> str:
+    # run_ids are uuid7: the low 64 bits are random, the high bits are a timestamp.
+    return UUID(run_id).hex[16:]
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def _attribute_value(value: Dict[str, Any]) -> Any:
+    if "intValue" in value:
+        return int(value["intValue"])
+    for kind in ("stringValue", "doubleValue", "boolValue"):
+        if kind in value:
+            return value[kind]
+    return None
+
+
+class _SpanWriter:
+    """Appends batches of span lines to trace files from one thread."""
+
+    def __init__(self):
+        # (path, lines), or (None, event) to signal that earlier batches are done.
+        self._queue: "queue.SimpleQueue[Tuple[Any, Any]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, path: str, lines: List[str]) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="trace-writer", daemon=True
+                )
+                self._thread.start()
+        self._queue.put((path, lines))
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until every batch submitted so far is written."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put((None, done))
+        done.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            path, lines = self._queue.get()
+            if path is None:
+                lines.set()
+                continue
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+
+
+_WRITER = _SpanWriter()
+atexit.register(_WRITER.flush, 5.0)
+
+
+def flush_traces(timeout: Optional[float] = None) -> None:
+    """Block until all finished spans have been written to their trace files."""
+    _WRITER.flush(timeout)
+
+
+@dataclass
+class _OpenSpan:
+    span_id: str
+    parent_span_id: str
+    name: str
+    start_ns: int
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class TraceRecorder:
+    """Builds spans from `astream_events` and appends them to a JSONL file."""
+
+    def __init__(self, path: str, attributes: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.attributes = dict(attributes or {})
+        self.trace_id: Optional[str] = None
+        self._open: Dict[str, _OpenSpan] = {}
+        # run_ids that produced a span; other runs are transparent for parenting.
+        self._recorded: set[str] = set()
+        self._pending: List[str] = []
+
+    def _span_name(self, event: Dict[str, Any]) -> Optional[str]:
+        kind, name = event["event"], event["name"]
+        meta = event.get("metadata", {})
+        parent_ids = event.get("parent_ids") or []
+        if kind == "on_chain_start":
+            if not parent_ids:
+                return "graph"
+            if len(parent_ids) == 1 and name in _GRAPH_NODES:
+                return f"node:{name}"
+            return None
+        if kind in {"on_chat_model_start", "on_llm_start"}:
+            return f"model:{role_from_metadata(meta)}"
+        if kind == "on_tool_start":
+            if name == "start_research":
+                return "researcher"
+            return f"tool:{name}"
+        return None
+
+    def _parent_span_id(self, event: Dict[str, Any]) -> str:
+        for parent in reversed(event.get("parent_ids") or []):
+            if parent in self._recorded:
+                return _span_id(parent)
+        return ""
+
+    def observe(self, event: Dict[str, Any]) -> None:
+        kind = event["event"]
+        run_id = event["run_id"]
+        if kind.endswith("_start"):
+            name = self._span_name(event)
+            if name is None:
+                return
+            if self.trace_id is None:
+                self.trace_id = UUID(run_id).hex
+            meta = event.get("metadata", {})
+            attributes = {"run.name": event["name"]}
+            for key in ("langgraph_node", "langgraph_step", "node_id", "thread_id"):
+                if meta.get(key) is not None:
+                    attributes[key] = meta[key]
+            if meta.get("ls_model_name"):
+                attributes["model"] = meta["ls_model_name"]
+            self._open[run_id] = _OpenSpan(
+                span_id=_span_id(run_id),
+                parent_span_id=self._parent_span_id(event),
+                name=name,
+                start_ns=time.time_ns(),
+                attributes=attributes,
+            )
+            self._recorded.add(run_id)
+        elif kind.endswith("_end"):
+            span = self._open.pop(run_id, None)
+            if span is None:
+                return
+            output = (event.get("data") or {}).get("output")
+            usage = getattr(output, "usage_metadata", None)
+            if usage:
+                span.attributes["input_tokens"] = usage.get("input_tokens", 0)
+                span.attributes["output_tokens"] = usage.get("output_tokens", 0)
+            self._write(span, time.time_ns(), STATUS_CODE_OK)
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        """Flush spans that never finished (cancelled or failed runs)."""
+        end_ns = time.time_ns()
+        status = STATUS_CODE_ERROR if error is not None else STATUS_CODE_UNSET
+        for span in self._open.values():
+            span.attributes["incomplete"] = True
+            if error is not None:
+                span.attributes["error"] = repr(error)
+            self._write(span, end_ns, status)
+        self._open.clear()
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            lines, self._pending = self._pending, []
+            _WRITER.submit(self.path, lines)
+
+    def _write(self, span: _OpenSpan, end_ns: int, status: int) -> None:
+        attributes = {**self.attributes, **span.attributes}
+        record = {
+            "traceId": self.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_span_id,
+            "name": span.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": [_attribute(k, v) for k, v in attributes.items()],
+            "status": {"code": status},
+        }
+        self._pending.append(json.dumps(record) + "\n")
+        if len(self._pending) >= FLUSH_SPANS:
+            self._flush()
+
+
+async def trace_event_stream(
+    events: AsyncIterator[Dict[str, Any]], recorder: TraceRecorder
+) -> AsyncIterator[Dict[str, Any]]:
+    """Pass `astream_events` through unchanged while recording spans."""
+    error: Optional[BaseException] = None
+    try:
+        async for event in events:
+            recorder.observe(event)
+            yield event
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        recorder.close(error)
+
+
+# === Summary CLI ===
+
+
+@dataclass
+class Span:
+    span_id: str
+    parent_span_id: str
+    name: str
+    start_ns: int
+    end_ns: int
+    attributes: Dict[str, Any]
+    children: List["Span"] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    @property
+    def self_time(self) -> float:
+        """Wall time not covered by any child span (children may overlap)."""
+        intervals = sorted((c.start_ns, c.end_ns) for c in self.children)
+        covered, cursor = 0, self.start_ns
+        for start, end in intervals:
+            start, end = max(start, cursor), min(end, self.end_ns)
+            if end > start:
+                covered += end - start
+                cursor = end
+        return (self.end_ns - self.start_ns - covered) / 1e9
+
+    @property
+    def label(self) -> str:
+        detail = self.attributes.get("node_id") or self.attributes.get("model")
+        return f"{self.name} ({detail})" if detail else self.name
+
+
+def load_traces(path: str) -> Dict[str, List[Span]]:
+    """Load a JSONL trace file into root spans grouped by trace id."""
+    by_trace: Dict[str, Dict[str, Span]] = defaultdict(dict)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            by_trace[record["traceId"]][record["spanId"]] = Span(
+                span_id=record["spanId"],
+                parent_span_id=record.get("parentSpanId", ""),
+                name=record["name"],
+                start_ns=int(record["startTimeUnixNano"]),
+                end_ns=int(record["endTimeUnixNano"]),
+                attributes={
+                    a["key"]: _attribute_value(a["value"])
+                    for a in record.get("attributes", [])
+                },
+            )
+
+    roots: Dict[str, List[Span]] = {}
+    for trace_id, spans in by_trace.items():
+        trace_roots = []
+        for span in spans.values():
+            parent = spans.get(span.parent_span_id)
+            if parent is None:
+                trace_roots.append(span)
+            else:
+                parent.children.append(span)
+        for span in spans.values():
+            span.children.sort(key=lambda s: s.start_ns)
+        roots[trace_id] = sorted(trace_roots, key=lambda s: s.start_ns)
+    return roots
+
+
+def critical_path(span: Span, depth: int = 0) -> List[tuple[int, Span]]:
+    """
+    Walk back from the end of `span`, taking the last-finishing child that ends
+    before the current cursor; recurse into each. Parallel siblings that did not
+    gate their parent's progress are left off the path.
+    """
+    path = [(depth, span)]
+    gating: List[Span] = []
+    cursor = span.end_ns
+    for child in sorted(span.children, key=lambda s: s.end_ns, reverse=True):
+        if child.end_ns <= cursor:
+            gating.append(child)
+            cursor = child.start_ns
+    for child in reversed(gating):
+        path.extend(critical_path(child, depth + 1))
+    return path
+
+
+def format_summary(roots: List[Span], min_seconds: float = 0.0) -> str:
+    start = min(r.start_ns for r in roots)
+    end = max(r.end_ns for r in roots)
+    total = max((end - start) / 1e9, 1e-9)
+    lines = [f"total {total:.2f}s", "", "Flame tree (offset, duration, % of run):"]
+
+    def walk(span: Span, depth: int):
+        if span.duration < min_seconds:
+            return
+        offset = (span.start_ns - start) / 1e9
+        bar = "#" * max(1, round(40 * span.duration / total))
+        lines.append(
+            f"{offset:8.2f}s {span.duration:8.2f}s {100 * span.duration / total:5.1f}% "
+            f"{'  ' * depth}{span.label} {bar}"
+        )
+        for child in span.children:
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+
+    lines += ["", "Critical path:"]
+    for root in roots:
+        for depth, span in critical_path(root):
+            lines.append(
+                f"  {span.duration:8.2f}s (self {span.self_time:7.2f}s) "
+                f"{'  ' * depth}{span.label}"
+            )
+
+    self_times: Dict[str, float] = defaultdict(float)
+    counts: Dict[str, int] = defaultdict(int)
+    stack = list(roots)
+    while stack:
+        span = stack.pop()
+        self_times[span.name] += span.self_time
+        counts[span.name] += 1
+        stack.extend(span.children)
+    lines += ["", "Self time by span name (summed across parallel spans):"]
+    for name, seconds in sorted(self_times.items(), key=lambda kv: -kv[1]):
+        lines.append(f"  {seconds:10.2f}s  x{counts[name]:<4d} {name}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m research_workbench.tracing",
+        description="Summarize run-tree traces recorded by the backend.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summarize = subparsers.add_parser("summarize", help="flame tree + critical path")
+    summarize.add_argument("path", help="JSONL trace file")
+    summarize.add_argument("--trace-id", help="only this trace (default: latest)")
+    summarize.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.0,
+        help="hide spans shorter than this in the flame tree",
+    )
+    subparsers.add_parser("list", help="list traces in a file").add_argument("path")
+    args = parser.parse_args(argv)
+
+    traces = load_traces(args.path)
+    if not traces:
+        print("No spans found.")
+        return
+    ordered = sorted(traces.items(), key=lambda kv: min(r.start_ns for r in kv[1]))
+
+    if args.command == "list":
+        for trace_id, roots in ordered:
+            start = min(r.start_ns for r in roots)
+            duration = (max(r.end_ns for r in roots) - start) / 1e9
+            thread_id = roots[0].attributes.get("thread_id", "")
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start / 1e9))
+            print(f"{trace_id}  {started}  {duration:8.2f}s  {thread_id}")
+        return
+
+    trace_id = args.trace_id or ordered[-1][0]
+    if trace_id not in traces:
+        parser.error(f"trace {trace_id} not found in {args.path}")
+    print(f"Trace {trace_id}")
+    print(format_summary(traces[trace_id], min_seconds=args.min_seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Shared plumbing of the tool and chat model wrappers (cassettes, corpus,
+prefetch, notes, hedging).
+
+A `WrappedTool` stands in for its `inner` tool under the same name,
+description and argument schema. It only runs async, and calls the inner
+tool without the run's callbacks, so each tool call appears once in traces
+and in the UI. `_web_tools` wraps the same tool objects on every graph step;
+`cached_wrapper` hands back the wrapper built the first time, from a bounded
+cache.
+
+A `WrappedChatModel` keeps the tools bound to it as OpenAI schemas and binds
+them to its `inner` model per call.
+"""
+
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+MAX_WRAPPED_TOOLS = 256
+
+
+def thread_id(config: Optional[RunnableConfig]) -> str:
+    """The graph thread a run belongs to ("default" outside of one)."""
+    configurable = (config or {}).get("configurable") or {}
+    return str(configurable.get("thread_id", "default"))
+
+
+class WrappedTool(BaseTool):
+    """Base class of tools that add behaviour around an inner tool."""
+
+    inner: BaseTool
+
+    def __init__(self, inner: BaseTool, **fields: Any):
+        super().__init__(
+            name=inner.name,
+            description=inner.description,
+            args_schema=inner.args_schema,
+            inner=inner,
+            **fields,
+        )
+
+    def _run(self, *args, **kwargs):
+        raise NotImplementedError(f"{type(self).__name__} only supports async calls")
+
+    async def _call_inner(self, kwargs: Dict[str, Any], config: RunnableConfig) -> Any:
+        return await self.inner.ainvoke(kwargs, config={**config, "callbacks": []})
+
+
+_WRAPPED_TOOLS: "OrderedDict[Tuple[Any, ...], BaseTool]" = OrderedDict()
+
+
+def cached_wrapper(key: Tuple[Any, ...], build: Callable[[], BaseTool]) -> BaseTool:
+    """
+    The wrapper cached under `key`, built on first use. Keys hold the `id()`
+    of objects the wrapper itself references, so an id cannot be reused by
+    another object while its entry is cached; the least recently used entry
+    is dropped beyond `MAX_WRAPPED_TOOLS`.
+    """
+    wrapper = _WRAPPED_TOOLS.get(key)
+    if wrapper is not None:
+        _WRAPPED_TOOLS.move_to_end(key)
+        return wrapper
+    wrapper = _WRAPPED_TOOLS[key] = build()
+    while len(_WRAPPED_TOOLS) > MAX_WRAPPED_TOOLS:
+        _WRAPPED_TOOLS.popitem(last=False)
+    return wrapper
+
+
+def to_chunk(message: AIMessage) -> AIMessageChunk:
+    """A complete message as the single chunk of a stream."""
+    return AIMessageChunk(
+        content=message.content,
+        tool_call_chunks=[
+            {
+                "name": tc["name"],
+                "args": json.dumps(tc["args"]),
+                "id": tc["id"],
+                "index": i,
+            }
+            for i, tc in enumerate(message.tool_calls)
+        ],
+        response_metadata=message.response_metadata,
+        usage_metadata=message.usage_metadata,
+    )
+
+
+class WrappedChatModel(BaseChatModel):
+    """Base class of chat models that add behaviour around an inner model."""
+
+    inner: Optional[BaseChatModel] = None
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _bound_inner(self, kwargs: Dict[str, Any]):
+        """The inner model with the call's tools and other bound kwargs."""
+        kwargs = dict(kwargs)
+        tools = kwargs.pop("tools", None)
+        if tools:
+            return self.inner.bind_tools(tools, **kwargs)
+        return self.inner.bind(**kwargs) if kwargs else self.inner
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError(f"{type(self).__name__} only supports async calls")
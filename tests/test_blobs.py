@@ -0,0 +1,52 @@
+import asyncio
+import os
+
+import httpx
+
+from backend import server
+from backend.blobs import BlobStore
+
+
+def _store(**options):
+    return BlobStore(threshold=64, preview_chars=10, max_bytes=1 << 20, **options)
+
+
+def test_large_text_is_offloaded_once_behind_a_preview():
+    store = _store()
+    text = "x" * 1000
+    fields = store.offload(text)
+    assert fields["output"] == "x" * 10
+    assert fields["outputSize"] == 1000
+    assert store.get(fields["outputBlobId"]) == text.encode()
+    assert store.offload(text)["outputBlobId"] == fields["outputBlobId"]
+    assert store.offload("small") == {"output": "small"}
+
+
+def test_blob_evicted_from_memory_is_read_back_from_disk(tmp_path):
+    store = BlobStore(
+        threshold=64, preview_chars=10, max_bytes=1500, directory=str(tmp_path)
+    )
+    first = store.offload("a" * 1000)["outputBlobId"]
+    store.offload("b" * 1000)
+    assert first not in store._blobs
+    assert store.get(first) == b"a" * 1000
+    assert store.get("../" + first) is None
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_logged_session_blobs_resolve_after_a_restart(tmp_path, monkeypatch):
+    blob_id = _store(directory=str(tmp_path)).offload("y" * 1000)["outputBlobId"]
+    # A new process starts with an empty in-memory store.
+    monkeypatch.setattr(server, "BLOBS", _store(directory=str(tmp_path)))
+
+    async def fetch(path, **headers):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await c.get(path, headers=headers)
+
+    response = asyncio.run(fetch(f"/api/blobs/{blob_id}"))
+    assert response.status_code == 200
+    assert response.text == "y" * 1000
+    ranged = asyncio.run(fetch(f"/api/blobs/{blob_id}", range="bytes=0-4"))
+    assert ranged.status_code == 206 and ranged.text == "yyyyy"
+    assert asyncio.run(fetch("/api/blobs/" + "0" * 64)).status_code == 404
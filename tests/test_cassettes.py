@@ -0,0 +1,13 @@
+import json
+
+from research_workbench.deep_research import get_formatted_date
+
+
+def test_cassette_set_per_run_pins_the_prompt_date(tmp_path, monkeypatch):
+    for name in ("CASSETTE_MODE", "CASSETTE_PATH"):
+        monkeypatch.delenv(name, raising=False)
+    path = tmp_path / "run.jsonl"
+    path.write_text(json.dumps({"kind": "header", "date": "2001-02-03"}) + "\n")
+    config = {"configurable": {"cassette_mode": "replay", "cassette_path": str(path)}}
+    assert get_formatted_date(config) == "2001-02-03"
+    assert get_formatted_date({}) != "2001-02-03"
@@ -0,0 +1,65 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from research_workbench.compaction import (
+    compact_planner_history,
+    estimate_tokens,
+    planner_view,
+)
+
+
+def _history(rounds, first=0):
+    history = [HumanMessage(content="<user_query>tides</user_query>")]
+    for i in range(first, first + rounds):
+        call = {"name": "start_research", "args": {"topic": f"t{i}"}, "id": f"c{i}"}
+        history += [
+            AIMessage(content=f"round {i}", tool_calls=[call]),
+            ToolMessage(content=f"report {i} " * 200, tool_call_id=f"c{i}"),
+        ]
+    return history
+
+
+class _Condenser:
+    """Answers with the given summaries in turn and records its prompts."""
+
+    def __init__(self, *summaries):
+        self.summaries = list(summaries)
+        self.prompts = []
+
+    async def ainvoke(self, messages, config=None):
+        self.prompts.append(messages[0].content)
+        if not self.summaries:
+            raise RuntimeError("condenser down")
+        return AIMessage(content=self.summaries.pop(0))
+
+
+def test_old_rounds_are_summarized_and_the_last_kept_verbatim():
+    history = _history(4)
+    model = _Condenser("first summary", "second summary")
+    summary = asyncio.run(compact_planner_history(history, None, model, 1))
+    assert summary == {"upto": 7, "rounds": 3, "summary": "first summary"}
+
+    view = planner_view(history, summary)
+    assert view[0] is history[0]
+    assert "first summary" in view[1].content
+    assert view[2:] == history[7:]
+    assert estimate_tokens(view) < estimate_tokens(history)
+
+    # The next compaction folds the previous summary in and counts on.
+    history += _history(2, first=4)[1:]
+    again = asyncio.run(compact_planner_history(history, summary, model, 1))
+    assert again == {"upto": 11, "rounds": 5, "summary": "second summary"}
+    assert "first summary" in model.prompts[1]
+    assert "round 3" in model.prompts[1] and "round 4" in model.prompts[1]
+    assert "round 2" not in model.prompts[1]
+
+
+def test_nothing_to_compact_or_a_failed_condenser_keeps_the_full_view():
+    history = _history(2)
+    model = _Condenser("unused")
+    assert asyncio.run(compact_planner_history(history, None, model, 2)) is None
+    assert model.prompts == []
+    failing = _Condenser()
+    assert asyncio.run(compact_planner_history(history, None, failing, 1)) is None
+    assert planner_view(history, None) == history
@@ -0,0 +1,75 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from research_workbench.compaction import estimate_tokens
+from research_workbench.conversation import window_messages
+from research_workbench.deep_research import recall_report
+
+
+def _turn(i, report_words=2000):
+    call = {"name": "start_deep_research", "args": {"query": f"q{i}"}, "id": f"r{i}"}
+    return [
+        HumanMessage(content=f"question {i}"),
+        AIMessage(content="", tool_calls=[call]),
+        ToolMessage(
+            content=f"report {i} " * report_words,
+            tool_call_id=f"r{i}",
+            name="start_deep_research",
+        ),
+        AIMessage(content=f"answer {i}"),
+    ]
+
+
+class _Condenser:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    async def ainvoke(self, messages, config=None):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("condenser down")
+        return AIMessage(content=f"summary #{self.calls}")
+
+
+def _window(messages, summaries, model, budget, keep_turns=1):
+    return asyncio.run(window_messages(messages, summaries, model, budget, keep_turns))
+
+
+def test_a_conversation_within_budget_is_sent_unchanged():
+    messages = _turn(0)
+    model = _Condenser()
+    assert _window(messages, {}, model, 10**6) == (messages, {})
+    assert model.calls == 0
+
+
+def test_old_reports_are_replaced_by_summaries_and_recent_turns_kept():
+    messages = _turn(0) + _turn(1) + _turn(2)
+    model = _Condenser()
+    window, made = _window(messages, {"r0": "known summary"}, model, 6000)
+    # Only the report without a summary yet is summarized.
+    assert made == {"r1": "summary #1"} and model.calls == 1
+    stubs = [m.content for m in window if m.type == "tool"][:2]
+    assert 'report_id="r0"' in stubs[0] and "known summary" in stubs[0]
+    assert 'report_id="r1"' in stubs[1] and "summary #1" in stubs[1]
+    assert window[-4:] == messages[-4:]
+    assert estimate_tokens(window) <= 6000
+
+
+def test_oldest_turns_are_dropped_when_summaries_are_not_enough():
+    messages = _turn(0) + _turn(1) + _turn(2, report_words=500)
+    window, _ = _window(messages, {}, _Condenser(fail=True), 1800)
+    # A failed condenser falls back to the report's head.
+    assert window[0].content.startswith("[1 earlier conversation turns")
+    assert "report 1 report 1" in window[3].content
+    assert window[-4:] == messages[-4:]
+
+
+def test_recall_report_returns_the_full_text():
+    messages = _turn(0) + _turn(1)
+    state = {"general_assistant_messages": messages}
+    full = recall_report.invoke({"report_id": "r1", "state": state})
+    assert full == messages[6].content
+    missing = recall_report.invoke({"report_id": "nope", "state": state})
+    assert missing.startswith("No report with id nope")
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+from langchain_core.tools import tool
+
+from research_workbench import corpus as corpus_module
+from research_workbench.corpus import Corpus, CorpusExtractTool, CorpusSearchTool
+
+
+def _config(path, **settings):
+    return {"configurable": {"corpus_path": str(path), **settings}}
+
+
+def _clear_env(monkeypatch):
+    for name in ("CORPUS_PATH", "CORPUS_LOOKUP", "CORPUS_SKIP_SEARCH_HITS"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_lookup_returns_the_newest_fresh_copy(tmp_path):
+    corpus = Corpus(str(tmp_path))
+    now = time.time()
+    corpus.add("https://a.example", "Old", "first fetch", fetched_at=now - 100)
+    corpus.add("https://a.example", "New", "second fetch", fetched_at=now - 10)
+    assert corpus.lookup("https://a.example").title == "New"
+    assert corpus.lookup("https://a.example", max_age=5) is None
+    assert corpus.lookup("https://b.example") is None
+    corpus.close()
+
+
+def test_compaction_drops_superseded_copies_and_keeps_search_working(tmp_path):
+    corpus = Corpus(str(tmp_path))
+    now = time.time()
+    corpus.add("https://a.example", "Tides", "moon tides ocean", fetched_at=now - 50)
+    corpus.add("https://a.example", "Tides", "moon tides ocean gravity")
+    corpus.add("https://b.example", "Bread", "yeast dough oven")
+    corpus.add("https://c.example", "Ancient", "moon myths", fetched_at=now - 9e6)
+    assert corpus.compact(retention=86400) == {"before": 4, "after": 2}
+    corpus.add("https://d.example", "Moon", "moon landing")
+    corpus.close()
+
+    # Reopened: two documents from the memory-mapped index, one in the tail.
+    reopened = Corpus(str(tmp_path))
+    assert (reopened._n_docs, len(reopened._tail)) == (2, 1)
+    urls = [d.url for _, d in reopened.search("moon tides")]
+    assert urls == ["https://a.example", "https://d.example"]
+    assert reopened.lookup("https://a.example").text == "moon tides ocean gravity"
+    reopened.close()
+
+
+def test_extract_is_served_from_the_corpus_once_stored(tmp_path, monkeypatch):
+    _clear_env(monkeypatch)
+    fetched, writers = [], []
+    add = Corpus.add
+
+    def recording_add(self, *args, **kwargs):
+        writers.append(threading.current_thread())
+        return add(self, *args, **kwargs)
+
+    monkeypatch.setattr(Corpus, "add", recording_add)
+
+    @tool("web_extract")
+    async def fake_extract(url: str) -> str:
+        """Fake extract."""
+        fetched.append(url)
+        return "Title: Tides\nContent: The moon raises the tides."
+
+    async def scenario():
+        wrapped = CorpusExtractTool(fake_extract)
+        config = _config(tmp_path, corpus_lookup=True)
+        first = await wrapped.ainvoke({"url": "https://a.example"}, config=config)
+        second = await wrapped.ainvoke({"url": "https://a.example"}, config=config)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert fetched == ["https://a.example"]
+    assert second == first
+    # The write happened in a worker thread, not on the event loop.
+    assert writers and threading.main_thread() not in writers
+
+
+def test_search_is_skipped_when_stored_copies_cover_the_query(tmp_path, monkeypatch):
+    _clear_env(monkeypatch)
+    monkeypatch.setattr(corpus_module, "_CORPORA", {})
+    searched = []
+
+    @tool("web_search")
+    async def fake_search(query: str) -> str:
+        """Fake search."""
+        searched.append(query)
+        return "Title: Web\nURL: https://web.example\nContent: fresh result"
+
+    corpus = corpus_module.get_corpus(
+        corpus_module.Configuration(corpus_path=str(tmp_path))
+    )
+    corpus.add("https://a.example", "Tides", "moon tides ocean")
+
+    async def search(query, **settings):
+        config = _config(tmp_path, corpus_lookup=True, **settings)
+        return await CorpusSearchTool(fake_search).ainvoke(
+            {"query": query}, config=config
+        )
+
+    skipped = asyncio.run(search("moon tides", corpus_skip_search_hits=1))
+    assert searched == [] and "Web search skipped" in skipped
+    combined = asyncio.run(search("moon tides", corpus_skip_search_hits=2))
+    assert searched == ["moon tides"]
+    assert combined.index("https://a.example") < combined.index("https://web.example")
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from backend.event_bus import Broker, BrokerEventBus, EventBus, InProcessEventBus
+
+
+def _event(kind, n=0):
+    return {"type": kind, "payload": {"n": n}}
+
+
+def _kinds(events):
+    return [(e["type"], e["payload"].get("n")) for e in events]
+
+
+async def _until(condition, timeout=5.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def _broker():
+    broker = Broker()
+    server = await asyncio.start_server(broker.handle, "127.0.0.1", 0)
+    return broker, server, server.sockets[0].getsockname()[1]
+
+
+def _bus(port, **options):
+    return BrokerEventBus("127.0.0.1", port, reconnect_delay=0.01, **options)
+
+
+def test_event_bus_is_abstract():
+    with pytest.raises(TypeError):
+        EventBus()
+
+
+def test_subscribers_get_the_session_history_then_live_events():
+    async def scenario():
+        bus = InProcessEventBus()
+        await bus.publish(_event("A"))
+        await bus.publish(_event("GRAPH_RESET"))
+        await bus.publish(_event("B"))
+        stream = bus.subscribe()
+        seen = [await stream.__anext__(), await stream.__anext__()]
+        await bus.publish(_event("C"))
+        seen.append(await stream.__anext__())
+        await stream.aclose()
+        return seen, bus.subscriber_count
+
+    seen, subscribers = asyncio.run(scenario())
+    assert _kinds(seen) == [("GRAPH_RESET", 0), ("B", 0), ("C", 0)]
+    assert subscribers == 0
+
+
+def test_workers_see_each_others_events_in_one_order():
+    async def scenario():
+        broker, server, port = await _broker()
+        a, b = _bus(port), _bus(port)
+        await a.start()
+        await b.start()
+        await _until(lambda: a._writer is not None and b._writer is not None)
+        for n in range(3):
+            await a.publish(_event("A", n))
+            await b.publish(_event("B", n))
+        await _until(lambda: len(a.history) == 6 and len(b.history) == 6)
+        await a.stop()
+        await b.stop()
+        server.close()
+        return a.history, b.history
+
+    a_history, b_history = asyncio.run(scenario())
+    assert a_history == b_history
+    assert sorted(_kinds(a_history)) == [(k, n) for k in "AB" for n in range(3)]
+
+
+def test_events_published_while_disconnected_are_held_up_to_the_cap():
+    async def scenario():
+        broker, server, port = await _broker()
+        bus = _bus(port, max_pending=2)
+        for n in range(3):
+            await bus.publish(_event("E", n))
+        assert (len(bus._pending), bus._dropped) == (2, 1)
+        await bus.start()
+        await _until(lambda: len(bus.history) == 2)
+        await bus.stop()
+        server.close()
+        return bus.history, broker.seq
+
+    history, published = asyncio.run(scenario())
+    assert _kinds(history) == [("E", 0), ("E", 1)]
+    assert published == 2
+
+
+def test_reconnecting_continues_or_resyncs_from_the_broker_tail():
+    async def scenario():
+        broker, server, port = await _broker()
+        bus = _bus(port)
+        await bus.start()
+        await _until(lambda: bus._writer is not None)
+        await bus.publish(_event("GRAPH_RESET"))
+        await bus.publish(_event("E", 1))
+        await _until(lambda: len(bus.history) == 2)
+
+        # Same broker: only the events missed while disconnected arrive.
+        bus._writer.close()
+        await _until(lambda: bus._writer is None)
+        broker.publish(_event("E", 2))
+        await _until(lambda: len(bus.history) == 3)
+        continued = list(bus.history)
+
+        # A restarted broker cannot continue, so subscribers start over.
+        other, other_server, other_port = await _broker()
+        other.publish(_event("E", 3))
+        bus.port = other_port
+        bus._writer.close()
+        await _until(lambda: len(bus.history) == 2 and bus._broker_id == other.id)
+        resynced = list(bus.history)
+        await bus.stop()
+        server.close()
+        other_server.close()
+        return continued, resynced
+
+    continued, resynced = asyncio.run(scenario())
+    assert _kinds(continued) == [("GRAPH_RESET", 0), ("E", 1), ("E", 2)]
+    assert resynced == [{"type": "GRAPH_RESET", "payload": {}}, _event("E", 3)]
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+from unittest import mock
+
+from backend import event_log
+from backend.event_log import SessionLog, fold_events, replay_session
+
+
+def _event(kind, **payload):
+    return {"type": kind, "payload": payload}
+
+
+async def _write(directory, session_id, events, **options):
+    log = SessionLog(directory, session_id, flush_interval=0.001, **options)
+    for event in events:
+        log.append(event)
+    await log.close()
+    return log
+
+
+def _replayed(path):
+    return [json.loads(line) for line in replay_session(path)]
+
+
+def test_fold_merges_streamed_text_and_keeps_last_mode():
+    events = [
+        _event("GRAPH_RESET"),
+        _event("MESSAGE_APPENDED", id="m1", nodeId="n1", content="Hel"),
+        _event("MESSAGE_UPDATED", id="m1", content="lo"),
+        _event("MESSAGE_UPDATED", id="m1", content="!", streaming=False),
+        _event("UI_MODE_SET", mode="chat"),
+        _event("UI_MODE_SET", mode="research"),
+        _event("EDGE_CREATED", id="e1"),
+        _event("EDGE_CREATED", id="e1"),
+    ]
+    folded = fold_events(events)
+    message = next(e for e in folded if e["type"] == "MESSAGE_APPENDED")
+    assert message["payload"]["content"] == "Hello!"
+    assert message["payload"]["streaming"] is False
+    assert [e["payload"]["mode"] for e in folded if e["type"] == "UI_MODE_SET"] == [
+        "research"
+    ]
+    assert sum(e["type"] == "EDGE_CREATED" for e in folded) == 1
+
+
+def test_fold_starts_over_at_graph_reset():
+    events = [_event("NODE_CREATED", id="old"), _event("GRAPH_RESET")]
+    assert fold_events(events) == [_event("GRAPH_RESET")]
+
+
+def test_replay_of_snapshot_matches_fold_of_full_log(tmp_path):
+    events = [_event("MESSAGE_APPENDED", id="m", nodeId="n", content="")]
+    events += [_event("MESSAGE_UPDATED", id="m", content=str(i)) for i in range(30)]
+    events.append(_event("NODE_CREATED", id="last"))
+    asyncio.run(_write(str(tmp_path), "s", events, snapshot_every=10))
+    path = str(tmp_path / "s")
+    replayed = _replayed(path)
+    assert len(replayed) < len(events)
+    assert fold_events(replayed) == fold_events(events)
+
+
+def test_reopen_after_torn_write_drops_the_partial_line(tmp_path):
+    directory = str(tmp_path)
+    asyncio.run(_write(directory, "s", [_event("A")], snapshot_every=1000))
+    path = os.path.join(directory, "s")
+    os.remove(os.path.join(path, "snapshot.jsonl"))
+    # A crash mid-batch: part of a line in the log, part of an index entry.
+    with open(os.path.join(path, "events.log"), "ab") as f:
+        f.write(b'{"type": "TO')
+    with open(os.path.join(path, "events.idx"), "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    asyncio.run(_write(directory, "s", [_event("B")], snapshot_every=1000))
+
+    assert [e["type"] for e in _replayed(path)] == ["A", "B"]
+    assert os.path.getsize(os.path.join(path, "events.idx")) == 16
+
+
+def test_reopen_drops_index_entry_of_a_line_never_written(tmp_path):
+    directory = str(tmp_path)
+    asyncio.run(_write(directory, "s", [_event("A")], snapshot_every=1000))
+    path = os.path.join(directory, "s")
+    os.remove(os.path.join(path, "snapshot.jsonl"))
+    log_size = os.path.getsize(os.path.join(path, "events.log"))
+    with open(os.path.join(path, "events.idx"), "ab") as f:
+        f.write(log_size.to_bytes(8, "little"))
+
+    log = asyncio.run(_write(directory, "s", [_event("B")], snapshot_every=1000))
+
+    assert log.count == 2
+    assert [e["type"] for e in _replayed(path)] == ["A", "B"]
+
+
+def test_failed_snapshot_keeps_the_writer_running(tmp_path):
+    async def scenario():
+        log = SessionLog(str(tmp_path), "s", flush_interval=0.001, snapshot_every=2)
+        with mock.patch.object(
+            SessionLog, "_write_snapshot", side_effect=ValueError("bad")
+        ):
+            for i in range(6):
+                log.append(_event("X", i=i))
+                await asyncio.sleep(0.01)
+            assert not log._writer.done()
+        await log.close()
+        return log
+
+    log = asyncio.run(scenario())
+    assert log.error is None
+    assert log.count == 6
+
+
+def test_failed_batch_stops_the_log_and_counts_drops(tmp_path):
+    async def scenario():
+        log = SessionLog(str(tmp_path), "s", flush_interval=0.001)
+        with mock.patch.object(SessionLog, "_write_batch", side_effect=OSError("disk")):
+            log.append(_event("X"))
+            await asyncio.sleep(0.05)
+            log.append(_event("Y"))
+        await log.close()
+        return log
+
+    dropped = event_log.EVENT_LOG_DROPPED.samples()
+    log = asyncio.run(scenario())
+    assert isinstance(log.error, OSError)
+    assert log._queue == []
+    assert event_log.EVENT_LOG_DROPPED.samples() != dropped
+
+
+def test_overlapping_runs_log_to_their_own_sessions(tmp_path, monkeypatch):
+    from backend import server
+
+    monkeypatch.setattr(server, "EVENT_LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(server, "EVENT_LOG_FLUSH_MS", 1)
+
+    async def run(thread_id, events, delay):
+        async with server._session_scope(thread_id):
+            for i in range(events):
+                await server.emit_event("X", {"thread": thread_id, "i": i})
+                await asyncio.sleep(delay)
+
+    async def scenario():
+        # "b" starts and ends while "a" is still running.
+        await asyncio.gather(run("a", 10, 0.01), run("b", 3, 0.005))
+
+    asyncio.run(scenario())
+    for thread_id, events in (("a", 10), ("b", 3)):
+        logged = _replayed(str(tmp_path / thread_id))
+        assert [e["payload"]["thread"] for e in logged] == [thread_id] * events
+    assert server.session_logs == {}
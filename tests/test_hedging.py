@@ -0,0 +1,109 @@
+import asyncio
+from typing import Any, List
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from research_workbench.config import Configuration
+from research_workbench.hedging import HedgedChatModel, Hedger, _race
+
+
+def _hedger(budget=1.0, min_samples=1):
+    configuration = Configuration(
+        hedge_percentile=50.0, hedge_budget=budget, hedge_min_samples=min_samples
+    )
+    hedger = Hedger("test", configuration)
+    hedger.observe("total", 0.02)
+    return hedger
+
+
+class _Attempts:
+    """Starts attempts with the given durations and records how each ended."""
+
+    def __init__(self, *durations):
+        self.durations = list(durations)
+        self.ended: List[str] = []
+
+    def start(self):
+        attempt = len(self.ended)
+        self.ended.append("running")
+
+        async def run():
+            try:
+                await asyncio.sleep(self.durations[attempt])
+            except asyncio.CancelledError:
+                self.ended[attempt] = "cancelled"
+                raise
+            self.ended[attempt] = "finished"
+            return f"attempt {attempt}"
+
+        return attempt, run()
+
+
+def test_no_hedge_before_enough_latencies_are_seen():
+    attempts = _Attempts(0.1)
+    result = asyncio.run(_race(_hedger(min_samples=5), "total", attempts.start))
+    assert result == ("attempt 0", 0)
+    assert attempts.ended == ["finished"]
+
+
+def test_a_slow_call_is_hedged_and_the_loser_cancelled():
+    attempts = _Attempts(5, 0.01)
+    result = asyncio.run(_race(_hedger(), "total", attempts.start))
+    assert result == ("attempt 1", 1)
+    assert attempts.ended == ["cancelled", "finished"]
+
+
+def test_no_hedge_without_budget():
+    attempts = _Attempts(0.1, 0.01)
+    result = asyncio.run(_race(_hedger(budget=0.0), "total", attempts.start))
+    assert result == ("attempt 0", 0)
+    assert attempts.ended == ["finished"]
+
+
+def test_cancelling_the_caller_cancels_every_attempt():
+    attempts = _Attempts(5, 5)
+
+    async def scenario():
+        race = asyncio.create_task(_race(_hedger(), "total", attempts.start))
+        # Cancel while waiting for the deadline, then again once hedged.
+        await asyncio.sleep(0.005)
+        race.cancel()
+        await asyncio.gather(race, return_exceptions=True)
+        assert attempts.ended == ["cancelled"]
+
+        attempts.ended.clear()
+        race = asyncio.create_task(_race(_hedger(), "total", attempts.start))
+        await asyncio.sleep(0.1)
+        race.cancel()
+        await asyncio.gather(race, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert attempts.ended == ["cancelled", "cancelled"]
+
+
+class _SlowThenFast(BaseChatModel):
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-then-fast"
+
+    def _generate(self, *args: Any, **kwargs: Any) -> ChatResult:
+        raise NotImplementedError
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(5)
+        message = AIMessage(content=f"call {self.calls}")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def test_hedged_model_answers_with_the_faster_request():
+    inner = _SlowThenFast()
+    model = HedgedChatModel(inner=inner, hedger=_hedger())
+    response = asyncio.run(asyncio.wait_for(model.ainvoke("hi"), 2))
+    assert response.content == "call 2"
+    assert inner.calls == 2
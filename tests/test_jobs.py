@@ -0,0 +1,133 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend import server
+from backend.event_bus import InProcessEventBus
+from backend.jobs import JobManager, JobStatus, QueueFull
+
+
+def _recorder():
+    updates = []
+
+    async def on_update(update):
+        updates.append(update)
+
+    return updates, on_update
+
+
+def _job(order, name, seconds=0.01):
+    async def run():
+        order.append(("start", name))
+        await asyncio.sleep(seconds)
+        order.append(("end", name))
+
+    return run
+
+
+def test_queues_beyond_the_limit_and_runs_in_fifo_order():
+    async def scenario():
+        updates, on_update = _recorder()
+        manager = JobManager(1, 2, on_update)
+        order = []
+        first = await manager.submit("research", "a", _job(order, "a"))
+        second = await manager.submit("research", "b", _job(order, "b"))
+        third = await manager.submit("research", "c", _job(order, "c"))
+        assert [first.status, second.status] == [JobStatus.RUNNING, JobStatus.QUEUED]
+        assert [manager.position(second), manager.position(third)] == [1, 2]
+        with pytest.raises(QueueFull) as rejected:
+            await manager.submit("research", "d", _job(order, "d"))
+        assert rejected.value.retry_after >= 1
+        await asyncio.sleep(0.1)
+        return order, updates
+
+    order, updates = asyncio.run(scenario())
+    assert [name for step, name in order if step == "start"] == ["a", "b", "c"]
+    assert {"completed"} == {u["status"] for u in updates if u["id"] and u["finished"]}
+
+
+def test_jobs_on_one_key_never_overlap():
+    async def scenario():
+        _, on_update = _recorder()
+        manager = JobManager(2, 10, on_update)
+        order = []
+        await manager.submit("research", "a", _job(order, "a", 0.05), key="x")
+        follow_up = await manager.submit("chat", "b", _job(order, "b"), key="x")
+        other = await manager.submit("research", "c", _job(order, "c"), key="y")
+        # The free slot goes to the job whose thread is idle.
+        assert (follow_up.status, other.status) == (JobStatus.QUEUED, JobStatus.RUNNING)
+        await asyncio.sleep(0.15)
+        return order
+
+    order = asyncio.run(scenario())
+    assert order.index(("end", "a")) < order.index(("start", "b"))
+
+
+def test_failing_update_does_not_stall_the_queue():
+    async def scenario():
+        async def on_update(update):
+            raise RuntimeError("bus is down")
+
+        manager = JobManager(1, 10, on_update)
+        order = []
+        await manager.submit("research", "a", _job(order, "a"))
+        queued = await manager.submit("research", "b", _job(order, "b"))
+        await asyncio.sleep(0.1)
+        return order, queued
+
+    order, queued = asyncio.run(scenario())
+    assert queued.status is JobStatus.COMPLETED
+    assert ("end", "b") in order
+
+
+def test_cancelling_a_running_job_ends_the_workflow_in_the_ui(monkeypatch):
+    async def scenario():
+        _, on_update = _recorder()
+        monkeypatch.setattr(server, "JOB_MANAGER", JobManager(1, 10, on_update))
+        monkeypatch.setattr(server, "EVENT_BUS", InProcessEventBus())
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            started = await c.post(
+                "/api/research", json={"topic": "test_mock tool_delay=5"}
+            )
+            await asyncio.sleep(0.1)
+            await c.delete(f"/api/jobs/{started.json()['jobId']}")
+            await asyncio.sleep(0.1)
+            job = (await c.get(f"/api/jobs/{started.json()['jobId']}")).json()
+        return job, [e["type"] for e in server.EVENT_BUS.history]
+
+    job, events = asyncio.run(scenario())
+    assert job["status"] == "cancelled"
+    assert events[-2:] == ["ERROR", "WORKFLOW_COMPLETED"]
+
+
+def test_chat_follows_the_queued_research_run(monkeypatch):
+    async def scenario():
+        _, on_update = _recorder()
+        monkeypatch.setattr(server, "JOB_MANAGER", JobManager(1, 10, on_update))
+        monkeypatch.setattr(server, "EVENT_BUS", InProcessEventBus())
+        continued = []
+
+        async def continue_research_task(message, thread_id=None):
+            continued.append(thread_id)
+
+        monkeypatch.setattr(server, "continue_research_task", continue_research_task)
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            topic = {"topic": "test_mock zero_delay=true"}
+            await c.post("/api/research", json=topic)
+            await c.post("/api/research", json=topic)
+            chat = (await c.post("/api/chat", json={"message": "more"})).json()
+            for _ in range(100):
+                if continued:
+                    break
+                await asyncio.sleep(0.05)
+            second = server.JOB_MANAGER.jobs()[1]
+        return chat, continued, second
+
+    chat, continued, second = asyncio.run(scenario())
+    assert chat["status"] == "queued"
+    assert continued == [second.key]
+    # The follow-up ran after the run it follows up on.
+    assert second.status is JobStatus.COMPLETED
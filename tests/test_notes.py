@@ -0,0 +1,80 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from research_workbench import notes
+from research_workbench.deep_research import _lookups_as_text, _writer_lookup
+from research_workbench.notes import PassageIndex, documents_from_tool_output
+from research_workbench.tools.search_notes import search_notes
+
+PAGES = (
+    "Title: Tides\nURL: https://a.example/tides\nContent: The moon's gravity "
+    "raises ocean tides twice a day.\n----\n"
+    "Title: Bread\nURL: https://b.example/bread\nContent: Yeast ferments sugar "
+    "and leavens bread dough.\n----\n"
+    "Error: https://c.example could not be fetched"
+)
+
+
+def _config(thread):
+    return {"configurable": {"thread_id": thread}}
+
+
+def test_bm25_ranks_the_matching_passage_first_and_skips_duplicates():
+    index = PassageIndex()
+    for url, title, content in documents_from_tool_output(PAGES):
+        assert index.add_document(url, title, content, source="web_search") == 1
+    tides = "The moon's gravity raises ocean tides twice a day."
+    assert index.add_document("https://a.example/tides", "Tides", tides, "x") == 0
+    hits = index.search("why do tides happen", k=2)
+    assert [p.url for _, p in hits] == ["https://a.example/tides"]
+    assert index.search("quantum chromodynamics") == []
+
+
+def test_long_documents_are_split_into_overlapping_passages():
+    index = PassageIndex()
+    words = [f"w{i}" for i in range(300)]
+    added = index.add_document("https://x.example", "", " ".join(words), "extract")
+    assert added == 3
+    first, second = index.passages[0].text.split(), index.passages[1].text.split()
+    assert len(first) == notes.PASSAGE_WORDS
+    assert first[-notes.PASSAGE_OVERLAP :] == second[: notes.PASSAGE_OVERLAP]
+
+
+def test_indexed_tool_output_is_searchable_within_its_thread_only(monkeypatch):
+    monkeypatch.setattr(notes, "_SESSIONS", notes.OrderedDict())
+
+    @tool("web_search")
+    async def fake_search(query: str) -> str:
+        """Fake search."""
+        return PAGES
+
+    async def scenario():
+        wrapped = notes.IndexingTool(fake_search)
+        await wrapped.ainvoke({"query": "tides"}, config=_config("t1"))
+        found = await search_notes.ainvoke({"query": "yeast"}, config=_config("t1"))
+        other = await search_notes.ainvoke({"query": "yeast"}, config=_config("t2"))
+        return found, other
+
+    found, other = asyncio.run(scenario())
+    assert found.startswith("Title: Bread\nURL: https://b.example/bread")
+    assert other.startswith("No matching notes found")
+
+
+def test_report_writer_may_only_search_notes(monkeypatch):
+    monkeypatch.setattr(notes, "_SESSIONS", notes.OrderedDict())
+    call = {"name": "web_search", "args": {"query": "x"}, "id": "c1"}
+    refused = asyncio.run(_writer_lookup(call, _config("t"), _config("t")))
+    assert refused.status == "error"
+    assert "only search_notes" in refused.content
+
+    lookup = {"name": "search_notes", "args": {"query": "tides"}, "id": "c2"}
+    result = asyncio.run(_writer_lookup(lookup, _config("t"), _config("t")))
+    assert result.status == "success" and result.tool_call_id == "c2"
+
+    text = _lookups_as_text([AIMessage(content="", tool_calls=[lookup]), result])
+    assert len(text) == 1 and text[0].type == "human"
+    assert '<call_search_notes>\n{"query": "tides"}' in text[0].content
+    assert "<result_search_notes>" in text[0].content
+    assert _lookups_as_text([]) == []
@@ -0,0 +1,73 @@
+import asyncio
+
+from aiohttp import web
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+
+from research_workbench.config import Configuration
+from research_workbench.prefetch import Prefetcher
+from research_workbench.tools import web_extract
+
+
+def test_prefetch_uses_the_run_settings_without_its_callbacks():
+    seen = []
+
+    @tool("web_extract")
+    async def extract(url: str, config: RunnableConfig = None) -> str:
+        """Extract a page."""
+        seen.append((config["configurable"], config.get("callbacks")))
+        return f"Title: {url}\nContent: text"
+
+    async def scenario():
+        prefetcher = Prefetcher(extract, Configuration(prefetch_enabled=True))
+        run_config = {"configurable": {"thread_id": "t", "extract_engine": "local"}}
+        prefetcher.schedule(["https://example.com/a"], run_config)
+        return await prefetcher.get("https://example.com/a")
+
+    assert asyncio.run(scenario()) == "Title: https://example.com/a\nContent: text"
+    ((configurable, callbacks),) = seen
+    assert configurable["extract_engine"] == "local"
+    assert configurable["thread_id"] == "t"
+    assert not callbacks
+
+
+def test_download_stops_once_the_budget_is_used_up():
+    sent = []
+
+    async def page(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/plain"})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        try:
+            for i in range(50):
+                await response.write(b"x" * 1000)
+                sent.append(i)
+                await asyncio.sleep(0.01)
+            await response.write_eof()
+        except ConnectionError:
+            pass
+        return response
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/page", page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}/page"
+        configuration = Configuration(prefetch_enabled=True, prefetch_byte_budget=3000)
+        prefetcher = Prefetcher(web_extract.web_extract, configuration)
+        try:
+            prefetcher.schedule([url], {"configurable": {"extract_engine": "local"}})
+            result = await prefetcher.get(url)
+            await asyncio.sleep(0.1)
+        finally:
+            await web_extract.get_aiohttp_session("page", 30).close()
+            await runner.cleanup()
+        return result, prefetcher.stats.counts
+
+    result, counts = asyncio.run(scenario())
+    assert result is None
+    assert counts["dropped_budget"] == 1
+    # The reader hung up long before the 50 KB page was sent.
+    assert len(sent) < 20
@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+
+from benchmarks.faults import FaultPlan, FaultServer
+from research_workbench.config import Configuration, SearchEngine
+from research_workbench.resilience import (
+    BREAKER_STATE,
+    CircuitBreaker,
+    ProviderError,
+    ProviderUnavailable,
+    call_provider,
+    get_breaker,
+)
+from research_workbench.tools.web_search import get_search_tool, get_searx_session
+
+
+def _configuration(**overrides) -> Configuration:
+    settings = dict(retry_attempts=3, retry_base_delay=0.001, retry_max_delay=0.001)
+    return Configuration(**{**settings, **overrides})
+
+
+def test_retries_transient_errors_until_success():
+    configuration = _configuration(breaker_failure_threshold=10)
+    failures = [ProviderError("retry-test", 503), ProviderError("retry-test", 429)]
+    calls = 0
+
+    async def request():
+        nonlocal calls
+        calls += 1
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    result = asyncio.run(call_provider("retry-test", request, configuration))
+    assert (result, calls) == ("ok", 3)
+
+
+def test_does_not_retry_client_errors():
+    configuration = _configuration()
+    calls = 0
+
+    async def request():
+        nonlocal calls
+        calls += 1
+        raise ProviderError("client-error-test", 401)
+
+    with pytest.raises(ProviderError):
+        asyncio.run(call_provider("client-error-test", request, configuration))
+    assert calls == 1
+    assert get_breaker("client-error-test", configuration).state == 0
+
+
+def test_breaker_opens_then_probes():
+    configuration = _configuration(
+        retry_attempts=1, breaker_failure_threshold=2, breaker_reset_timeout=0.05
+    )
+
+    async def failing():
+        raise ProviderError("breaker-test", 503)
+
+    async def succeeding():
+        return "ok"
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(ProviderError):
+                await call_provider("breaker-test", failing, configuration)
+        with pytest.raises(ProviderUnavailable):
+            await call_provider("breaker-test", succeeding, configuration)
+        await asyncio.sleep(0.06)
+        # The probe succeeds and closes the breaker.
+        return await call_provider("breaker-test", succeeding, configuration)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert get_breaker("breaker-test", configuration).state == CircuitBreaker.CLOSED
+
+
+def test_breakers_with_different_settings_export_separate_states():
+    strict = _configuration(breaker_failure_threshold=1, breaker_reset_timeout=60)
+    lenient = _configuration(breaker_failure_threshold=50, breaker_reset_timeout=60)
+    get_breaker("gauge-test", lenient)
+    get_breaker("gauge-test", strict).record_failure()
+    samples = "\n".join(BREAKER_STATE.samples())
+    assert 'provider="gauge-test",threshold="1",reset_timeout="60"} 1' in samples
+    assert 'provider="gauge-test",threshold="50",reset_timeout="60"} 0' in samples
+
+
+def test_failing_tavily_falls_back_to_searx(monkeypatch):
+    monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+
+    async def scenario():
+        tavily = FaultServer(FaultPlan(error_rate=1.0))
+        searx = FaultServer(FaultPlan())
+        tavily_url = await tavily.start()
+        searx_url = await searx.start()
+        try:
+            configurable = {
+                "search_engine": "tavily",
+                "tavily_api_url": f"{tavily_url}/tavily",
+                "searx_host": f"{searx_url}/search",
+                "retry_base_delay": 0.001,
+                "breaker_failure_threshold": 100,
+            }
+            tool = get_search_tool(Configuration(search_engine=SearchEngine.TAVILY))
+            result = await tool.ainvoke(
+                {"query": "fallback"}, config={"configurable": configurable}
+            )
+        finally:
+            await get_searx_session().close()
+            await tavily.stop()
+            await searx.stop()
+        return result, tavily.requests, searx.requests
+
+    result, tavily_requests, searx_requests = asyncio.run(scenario())
+    assert "fallback result 0" in result
+    # Every retry went to Tavily before the query moved to Searx.
+    assert (tavily_requests, searx_requests) == (3, 1)
+
+
+def test_fallback_can_be_disabled_per_run(monkeypatch):
+    monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+
+    async def scenario():
+        tavily = FaultServer(FaultPlan(error_rate=1.0))
+        searx = FaultServer(FaultPlan())
+        tavily_url = await tavily.start()
+        searx_url = await searx.start()
+        try:
+            configurable = {
+                "tavily_api_url": f"{tavily_url}/tavily",
+                "searx_host": f"{searx_url}/search",
+                "retry_attempts": 1,
+                "search_fallback": False,
+                "breaker_failure_threshold": 100,
+            }
+            tool = get_search_tool(Configuration())
+            result = await tool.ainvoke(
+                {"query": "no fallback"}, config={"configurable": configurable}
+            )
+        finally:
+            await tavily.stop()
+            await searx.stop()
+        return result, searx.requests
+
+    result, searx_requests = asyncio.run(scenario())
+    assert result.startswith("Error calling web_search")
+    assert searx_requests == 0
+
+
+def test_falsy_runnable_settings_are_kept():
+    configuration = Configuration.from_runnable_config(
+        {"configurable": {"retry_attempts": 0, "search_fallback": False}}
+    )
+    assert configuration.retry_attempts == 0
+    assert configuration.search_fallback is False
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from backend.session_pool import SessionPool, UnknownSession, WorkerCrashed
+
+FAST = "test_mock zero_delay=true researchers=2"
+SLOW = "test_mock tool_delay=30"
+
+
+def _pool(workers=2, publish=None):
+    events = []
+
+    async def record(event, thread):
+        events.append((thread, event["type"]))
+
+    return SessionPool(workers, publish or record, lambda data: ""), events
+
+
+async def _started(events, thread):
+    while not any(t == thread for t, _ in events):
+        await asyncio.sleep(0.05)
+
+
+def test_runs_and_follow_ups_stick_to_their_worker():
+    async def scenario():
+        pool, events = _pool()
+        await pool.start()
+        try:
+            await asyncio.wait_for(pool.run("a", FAST), 60)
+            await asyncio.wait_for(pool.continue_session("a", "and then?"), 60)
+            with pytest.raises(UnknownSession):
+                await pool.continue_session("never-ran", "hello")
+        finally:
+            await pool.stop()
+        return events
+
+    events = asyncio.run(scenario())
+    assert ("a", "WORKFLOW_COMPLETED") in events
+    assert {thread for thread, _ in events} == {"a"}
+
+
+def test_a_dead_worker_fails_only_its_own_calls_and_is_replaced():
+    async def scenario():
+        pool, events = _pool()
+        await pool.start()
+        try:
+            doomed = asyncio.create_task(pool.run("a", SLOW))
+            await asyncio.wait_for(_started(events, "a"), 60)
+            worker = pool._sticky["a"]
+            survivor = asyncio.create_task(pool.run("b", FAST))
+            await asyncio.sleep(0)
+            assert pool._sticky["b"] is not worker
+            worker.process.kill()
+            with pytest.raises(WorkerCrashed):
+                await asyncio.wait_for(doomed, 60)
+            await asyncio.wait_for(survivor, 60)
+            # Its threads are forgotten rather than silently restarted.
+            with pytest.raises(UnknownSession):
+                await pool.continue_session("a", "still there?")
+            await asyncio.wait_for(pool.run("c", FAST), 60)
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_a_failing_publish_takes_the_crash_path():
+    async def publish(event, thread):
+        raise KeyError("payload")
+
+    async def scenario():
+        pool, _ = _pool(workers=1, publish=publish)
+        await pool.start()
+        try:
+            first = pool._workers[0].process
+            with pytest.raises(WorkerCrashed):
+                await asyncio.wait_for(pool.run("a", FAST), 60)
+            assert pool._workers[0].process is not first
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from aiohttp import web
+
+from research_workbench.config import Configuration, ExtractEngine
+from research_workbench.tools import web_extract
+
+
+class LocalReaderTest(unittest.IsolatedAsyncioTestCase):
+    """`local_reader` against a server that sends the page in slow chunks."""
+
+    async def asyncSetUp(self):
+        async def page(request: web.Request) -> web.StreamResponse:
+            response = web.StreamResponse(headers={"Content-Type": "text/plain"})
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            try:
+                for part in (b"first ", b"second ", b"third"):
+                    await response.write(part)
+                    await asyncio.sleep(0.05)
+                await response.write_eof()
+            except ConnectionError:
+                pass  # The reader stopped at its size cap.
+            return response
+
+        app = web.Application()
+        app.router.add_get("/page", page)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{self.runner.addresses[0][1]}/page"
+        self.configuration = Configuration(extract_engine=ExtractEngine.LOCAL)
+
+    async def asyncTearDown(self):
+        session = web_extract.get_aiohttp_session("page", web_extract.PAGE_TIMEOUT)
+        await session.close()
+        await self.runner.cleanup()
+
+    async def test_reads_every_chunk(self):
+        result = await web_extract.local_reader(self.url, self.configuration)
+        self.assertEqual(result, "Title: No Title\nContent: first second third")
+
+    async def test_stops_at_max_page_bytes(self):
+        with mock.patch.object(web_extract, "MAX_PAGE_BYTES", 10):
+            result = await web_extract.local_reader(self.url, self.configuration)
+        self.assertEqual(result, "Title: No Title\nContent: first seco")
+
+
+if __name__ == "__main__":
+    unittest.main()